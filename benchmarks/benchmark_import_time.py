@@ -0,0 +1,63 @@
+"""
+Time importing the package and each of its modules in a new Python interpreter,
+and list which of the large dependencies each import loads.
+
+Usage:
+    python benchmarks/benchmark_import_time.py [repeats]
+"""
+
+import statistics
+import subprocess
+import sys
+
+MODULES = [
+    "ncas_amof_netcdf_template",
+    "ncas_amof_netcdf_template.values",
+    "ncas_amof_netcdf_template.tsv2dict",
+    "ncas_amof_netcdf_template.file_info",
+    "ncas_amof_netcdf_template.util",
+    "ncas_amof_netcdf_template.remove_empty_variables",
+    "ncas_amof_netcdf_template.create_netcdf",
+]
+DEPENDENCIES = ["netCDF4", "numpy", "pandas", "requests", "yaml"]
+
+SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+print(",".join(d for d in {dependencies!r} if d in sys.modules))
+"""
+
+
+def time_import(module):
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            SCRIPT.format(module=module, dependencies=DEPENDENCIES),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    seconds, loaded = result.stdout.split("\n")[:2]
+    return float(seconds), loaded
+
+
+def main(repeats=5):
+    # import everything once first, so all timings use a warm file system cache
+    time_import(MODULES[-1])
+    for module in MODULES:
+        timings = []
+        for _ in range(repeats):
+            seconds, loaded = time_import(module)
+            timings.append(seconds)
+        print(
+            f"{module}: {statistics.median(timings) * 1000:.0f} ms"
+            f" (loads {loaded or 'none'})"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,166 @@
+"""
+Compare reading variables and dimensions tsv files into dictionaries three ways,
+and check all give the same dictionaries:
+- pandas.read_csv and a row-by-row loop over DataFrame.iloc, as originally done
+- pandas.read_csv and a column-wise pass over the DataFrame, grouping rows into
+  variables with a cumulative sum and groupby
+- tsv_reader and tsv2dict, which reads the file with the csv module into plain
+  dictionaries and loops over those once. Splitting plain dictionaries into
+  columns first is slower than this loop, so the column-wise pass was not kept
+  when pandas was replaced.
+
+Usage:
+    python benchmarks/benchmark_tsv2dict.py [n_variables]
+"""
+
+import io
+import sys
+import timeit
+
+import pandas as pd
+
+from ncas_amof_netcdf_template import tsv2dict, tsv_reader
+
+
+def row_loop_vars(df_vars):
+    df_vars = df_vars.fillna("")
+    all_vars_dict = {}
+    current_var_dict = {}
+    first_loop = True
+    current_var = ""
+    for current_line in df_vars.iloc:
+        if current_line["Variable"] != "":
+            if not first_loop:
+                all_vars_dict[current_var] = current_var_dict
+            else:
+                first_loop = False
+            current_var = current_line["Variable"]
+            current_var_dict = {}
+        if current_line["Attribute"] != "":
+            if (
+                current_line["Value"] == ""
+                and "example value" in current_line.keys()
+                and current_line["example value"] != ""
+            ):
+                current_var_dict[current_line["Attribute"]] = (
+                    f"EXAMPLE: {current_line['example value']}"
+                )
+            else:
+                current_var_dict[current_line["Attribute"]] = current_line["Value"]
+    all_vars_dict[current_var] = current_var_dict
+    return all_vars_dict
+
+
+def row_loop_records(df):
+    df = df.fillna("")
+    all_dict = {}
+    for row in df.iloc:
+        row_dict = row.to_dict()
+        name = row_dict.pop("Name")
+        all_dict[name] = row_dict
+    return all_dict
+
+
+def column_pandas_vars(df_vars):
+    df_vars = df_vars.fillna("")
+    is_new_var = (df_vars["Variable"] != "").to_numpy()
+    block = is_new_var.cumsum()
+    values = df_vars["Value"]
+    if "example value" in df_vars.columns:
+        example_values = df_vars["example value"]
+        use_example = (values == "") & (example_values != "")
+        values = values.where(~use_example, "EXAMPLE: " + example_values.astype(str))
+    has_attr = (df_vars["Attribute"] != "").to_numpy()
+    attrs = df_vars["Attribute"].to_numpy()[has_attr]
+    values = values.to_numpy()[has_attr]
+    block_rows = pd.Series(block[has_attr]).groupby(block[has_attr]).indices
+    block_attrs = {
+        block_number: dict(zip(attrs[rows], values[rows]))
+        for block_number, rows in block_rows.items()
+    }
+    all_vars_dict = {}
+    if not is_new_var.any():
+        all_vars_dict[""] = block_attrs.get(0, {})
+    var_names = df_vars["Variable"].to_numpy()[is_new_var]
+    for block_number, var_name in enumerate(var_names, start=1):
+        all_vars_dict[var_name] = block_attrs.get(block_number, {})
+    return all_vars_dict
+
+
+def column_pandas_records(df):
+    df = df.fillna("")
+    names = df.pop("Name")
+    return dict(zip(names, df.to_dict(orient="records")))
+
+
+def make_tsvs(n_variables):
+    var_lines = ["Variable\tAttribute\tValue\texample value"]
+    for i in range(n_variables):
+        var_lines.append(f"variable_{i}\t\t\t")
+        var_lines.append("\ttype\tfloat32\t")
+        var_lines.append("\tdimension\ttime\t")
+        var_lines.append("\tunits\tK\t")
+        var_lines.append("\tlong_name\t\tAir Temperature")
+        var_lines.append("\t_FillValue\t-1.00E+20\t")
+        var_lines.append("\tcell_methods\t\ttime: mean")
+    dim_lines = ["Name\tLength\tunits"]
+    dim_lines += [f"dimension_{i}\t{i}\tm" for i in range(n_variables)]
+    return "\n".join(var_lines) + "\n", "\n".join(dim_lines) + "\n"
+
+
+def pandas_parse(parse, content):
+    return parse(pd.read_csv(io.StringIO(content), sep="\t"))
+
+
+def tsv_reader_parse(parse, content):
+    return parse(tsv_reader.parse_tsv(content))
+
+
+def main(n_variables=300, repeat=5):
+    vars_tsv, dims_tsv = make_tsvs(n_variables)
+
+    for name, row_loop, column_pandas, new, content in [
+        (
+            "variables",
+            row_loop_vars,
+            column_pandas_vars,
+            tsv2dict._rows2dict_vars,
+            vars_tsv,
+        ),
+        (
+            "dimensions",
+            row_loop_records,
+            column_pandas_records,
+            tsv2dict._rows2dict_dims,
+            dims_tsv,
+        ),
+    ]:
+        expected = pandas_parse(row_loop, content)
+        assert pandas_parse(column_pandas, content) == expected
+        assert tsv_reader_parse(new, content) == expected
+        times = [
+            min(timeit.repeat(parse, number=1, repeat=repeat))
+            for parse in [
+                lambda row_loop=row_loop, content=content: pandas_parse(
+                    row_loop, content
+                ),
+                lambda column_pandas=column_pandas, content=content: pandas_parse(
+                    column_pandas, content
+                ),
+                lambda new=new, content=content: tsv_reader_parse(new, content),
+            ]
+        ]
+        n_rows = content.count("\n") - 1
+        print(
+            f"{name} ({n_rows} rows): "
+            + ", ".join(
+                f"{label} {time * 1000:.1f} ms ({times[0] / time:.0f}x)"
+                for label, time in zip(
+                    ["pandas row loop", "pandas column-wise", "tsv_reader"], times
+                )
+            )
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
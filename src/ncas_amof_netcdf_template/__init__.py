@@ -1,8 +1,48 @@
 # Top level for ncas-amof-netcdf-template
-from . import create_netcdf
-from . import remove_empty_variables
-from . import tsv2dict
-from . import util
-from . import values
-from . import file_info
+import importlib
+from typing import TYPE_CHECKING
+
 from .__about__ import __version__
+
+__all__ = [
+    "__version__",
+    "batch",
+    "cache",
+    "create_netcdf",
+    "cv_index",
+    "file_info",
+    "remove_empty_variables",
+    "session",
+    "tsv2dict",
+    "tsv_reader",
+    "util",
+    "values",
+]
+
+# submodules are only imported when first used, so that e.g. scripts only using
+# values don't have to wait for netCDF4 and numpy to be imported
+_submodules = [name for name in __all__ if name != "__version__"]
+
+if TYPE_CHECKING:
+    from . import create_netcdf
+    from . import remove_empty_variables
+    from . import tsv2dict
+    from . import util
+    from . import values
+    from . import file_info
+    from . import cache
+    from . import cv_index
+    from . import tsv_reader
+    from . import session
+    from . import batch
+
+
+def __getattr__(name):
+    if name in _submodules:
+        return importlib.import_module(f".{name}", __name__)
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
+
+
+def __dir__():
+    return __all__
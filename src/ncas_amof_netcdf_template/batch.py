@@ -0,0 +1,505 @@
+"""
+Create netCDF files for many combinations of instrument, data product and date at
+once. The definitions for each instrument and data product are only loaded once,
+and the files are written in parallel by a pool of processes.
+
+"""
+
+import datetime as dt
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Optional, Union
+
+from . import create_netcdf
+from .file_info import FileInfo, get_file_info
+
+Item = tuple[str, str, str]
+
+
+class BatchResult:
+    """
+    Outcome of creating a batch of netCDF files.
+
+    Args:
+        paths (dict): path of each file made, keyed by (instrument, product, date)
+        errors (dict): error raised for each file that could not be made, keyed by
+                       (instrument, product, date)
+    """
+
+    def __init__(
+        self,
+        paths: Optional[dict[Item, str]] = None,
+        errors: Optional[dict[Item, Exception]] = None,
+    ) -> None:
+        self.paths = paths if paths is not None else {}
+        self.errors = errors if errors is not None else {}
+
+    def __repr__(self) -> str:
+        class_name = type(self).__name__
+        return (
+            f"{class_name}() - {len(self.paths)} files made, {len(self.errors)} errors"
+        )
+
+    @property
+    def ok(self) -> bool:
+        """
+        bool: all files were made
+        """
+        return not self.errors
+
+
+def date_range(start: str, end: str) -> list[str]:
+    """
+    List every day from start to end, inclusive.
+
+    Args:
+        start (str): first date, format YYYYmmdd
+        end (str): last date, format YYYYmmdd
+
+    Returns:
+        list: dates, format YYYYmmdd
+    """
+    first = dt.datetime.strptime(start, "%Y%m%d")
+    last = dt.datetime.strptime(end, "%Y%m%d")
+    return [
+        (first + dt.timedelta(days=i)).strftime("%Y%m%d")
+        for i in range((last - first).days + 1)
+    ]
+
+
+def _list_products(
+    instrument: str, tag: str, use_local_files: Optional[str]
+) -> list[str]:
+    """
+    List data products of an instrument from the instrument vocabularies, without
+    loading the definitions of every product as create_netcdf.list_products does.
+    """
+    file_info = FileInfo(instrument, "", tag=tag, use_local_files=use_local_files)
+    file_info.get_instrument_info()
+    if "Data Product(s)" not in file_info.instrument_data:
+        msg = f"No data products found for instrument {instrument}"
+        raise ValueError(msg)
+    return file_info.instrument_data["Data Product(s)"]
+
+
+def _build_file_info(
+    instrument: str,
+    product: str,
+    loc: str,
+    tag: str,
+    use_local_files: Optional[str],
+    platform: Optional[str],
+    dimension_lengths: dict[str, int],
+    unlimited_dimension: Optional[str] = None,
+) -> FileInfo:
+    """
+    Load the definitions for an instrument and data product, as create_netcdf.main
+    does, but raise an error for missing dimension lengths rather than asking for
+    them.
+    """
+    file_info = get_file_info(
+        instrument,
+        product,
+        deployment_mode=loc,
+        tag=tag,
+        use_local_files=use_local_files,
+    )
+    if platform is not None:
+        if "mobile" not in file_info.instrument_data["Mobile/Fixed (loc)"].lower():
+            print(
+                "[WARNING]: Changing platform for an "
+                f"observatory instrument {instrument}."
+            )
+        file_info.instrument_data["Mobile/Fixed (loc)"] = platform
+    for key, val in file_info.dimensions.items():
+        if not isinstance(val["Length"], int) and key != unlimited_dimension:
+            if key not in dimension_lengths:
+                msg = f"No length given for dimension {key} of {product}"
+                raise ValueError(msg)
+            val["Length"] = int(dimension_lengths[key])
+    return file_info
+
+
+def _make_files(
+    file_info: FileInfo, dates: list[str], kwargs: dict[str, Any], use_template: bool
+) -> list[tuple[str, Optional[str], Optional[Exception]]]:
+    """
+    Make and close a file for each date from the same definitions, either by
+    copying a template file or making each file from the same creation plan.
+
+    Returns:
+        list: date, path of file made and error raised, for each date
+    """
+    template = None
+    plan_kwargs = {
+        key: kwargs[key]
+        for key in [
+            "verbose",
+            "use_local_files",
+            "chunk_by_dimension",
+            "compression",
+            "complevel",
+            "shuffle",
+            "unlimited_dimension",
+        ]
+    }
+    try:
+        if use_template:
+            template = create_netcdf.NetCDFTemplate(file_info, **kwargs)
+        else:
+            plan = create_netcdf.CreationPlan(file_info, **plan_kwargs)
+    except Exception as e:
+        return [(date, None, e) for date in dates]
+
+    results = []
+    for date in dates:
+        try:
+            if template is not None:
+                nc = template.make_netcdf(date)
+            else:
+                nc = plan.make_netcdf(
+                    date,
+                    options=kwargs["options"],
+                    product_version=kwargs["product_version"],
+                    file_location=kwargs["file_location"],
+                )
+            path = nc.filepath()
+            nc.close()
+            results.append((date, path, None))
+        except Exception as e:
+            results.append((date, None, e))
+    if template is not None:
+        template.close()
+    return results
+
+
+def make_netcdfs(
+    instruments: Union[str, list[str]],
+    dates: list[str],
+    products: Union[str, list[str], None] = None,
+    dimension_lengths: Optional[dict[str, int]] = None,
+    platform: Optional[str] = None,
+    loc: str = "land",
+    verbose: int = 0,
+    options: str = "",
+    product_version: str = "1.0",
+    file_location: str = ".",
+    use_local_files: Optional[str] = None,
+    tag: str = "latest",
+    chunk_by_dimension: Optional[dict[str, int]] = None,
+    compression: Union[str, dict[str, str], None] = None,
+    complevel: Union[int, dict[str, int]] = 4,
+    shuffle: Union[bool, dict[str, bool]] = True,
+    max_workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    use_template: bool = True,
+    unlimited_dimension: Optional[str] = None,
+) -> BatchResult:
+    """
+    Create 'just-add-data' AMOF-compliant netCDF files for every combination of
+    instrument, data product and date. Each file is closed once it has been made.
+    Files that cannot be made don't stop the rest of the batch, their errors are
+    returned instead.
+
+    Args:
+        instruments (str or list): ncas instrument name(s)
+        dates (list): dates for files, format YYYYmmdd
+        products (str, list or None): data product(s) to make files for. If None,
+                                      all data products for each instrument are
+                                      made. Default None.
+        dimension_lengths (dict or None): dictionary of dimension:length, which must
+                                          include all dimensions without a fixed
+                                          length. Default None.
+        platform (str or None): observatory or location of the instrument. If None,
+                                use default platform for instrument from instrument
+                                vocabularies. Default None.
+        loc (str): one of 'land', 'sea', 'air', 'trajectory'. Default 'land'.
+        verbose (int): level of info to print out. Default 0.
+        options (str): options to be included in file name, separated by an
+                       underscore ('_'). Default ''.
+        product_version (str): version of the data file. Default '1.0'.
+        file_location (str): where to write the netCDF files. Default '.'.
+        use_local_files (str or None): path to local directory where tsv files are
+                                       stored. If "None", read from online.
+                                       Default None.
+        tag (str): tagged release of definitions, or 'latest' to get most recent
+                   release. Ignored if use_local_files is not None.
+                   Default "latest".
+        chunk_by_dimension (dict): chunk sizes to use in each dimension.
+                                   Default None (no chunking).
+        compression (str or dict): compression algorithm, for all variables or as
+                                   variable:compression pairs. Default None.
+        complevel (int or dict): level of compression, for all variables or as
+                                 variable:complevel pairs. Default 4.
+        shuffle (bool or dict): whether to use the HDF5 shuffle filter, for all
+                                variables or as variable:shuffle pairs.
+                                Default True.
+        max_workers (int or None): number of processes to write files with. If None,
+                                   use the number of CPUs. If 1, write all files in
+                                   this process. Default None.
+        chunksize (int or None): number of dates given to a process at a time. If
+                                 None, dates are split so each process gets about
+                                 four lots. Default None.
+        use_template (bool): make one empty file for each instrument and product
+                             in each process, and copy it for each date, rather
+                             than making every file from scratch. See
+                             create_netcdf.NetCDFTemplate. Default True.
+        unlimited_dimension (str or None): dimension to make unlimited, e.g. 'time'.
+                                           Its length doesn't need to be given.
+                                           Default None.
+
+    Returns:
+        BatchResult: paths of the files made, and errors for those that weren't
+    """
+    if isinstance(instruments, str):
+        instruments = [instruments]
+    if isinstance(products, str):
+        products = [products]
+    dimension_lengths = dimension_lengths or {}
+    max_workers = max_workers or os.cpu_count() or 1
+    kwargs = {
+        "verbose": verbose,
+        "options": options,
+        "product_version": product_version,
+        "file_location": file_location,
+        "use_local_files": use_local_files,
+        "chunk_by_dimension": chunk_by_dimension,
+        "compression": compression,
+        "complevel": complevel,
+        "shuffle": shuffle,
+        "unlimited_dimension": unlimited_dimension,
+    }
+    result = BatchResult()
+
+    # load the definitions for each instrument and product once, here, so worker
+    # processes don't need to read any tsv files
+    schemas = []
+    for instrument in instruments:
+        if products is not None:
+            instrument_products = products
+        else:
+            try:
+                instrument_products = _list_products(instrument, tag, use_local_files)
+            except Exception as e:
+                result.errors[(instrument, "", "")] = e
+                continue
+        for product in instrument_products:
+            try:
+                file_info = _build_file_info(
+                    instrument,
+                    product,
+                    loc,
+                    tag,
+                    use_local_files,
+                    platform,
+                    dimension_lengths,
+                    unlimited_dimension,
+                )
+            except Exception as e:
+                for date in dates:
+                    result.errors[(instrument, product, date)] = e
+                continue
+            schemas.append((instrument, product, file_info))
+
+    if chunksize is None:
+        n_files = len(schemas) * len(dates)
+        chunksize = max(1, -(-n_files // (max_workers * 4)))
+    jobs = [
+        (instrument, product, file_info, dates[i : i + chunksize])
+        for instrument, product, file_info in schemas
+        for i in range(0, len(dates), chunksize)
+    ]
+
+    def add_results(instrument, product, results):
+        for date, path, error in results:
+            if error is None:
+                result.paths[(instrument, product, date)] = path
+            else:
+                result.errors[(instrument, product, date)] = error
+            if verbose:
+                print(f"[INFO]: {instrument} {product} {date}: {path or error}")
+
+    if max_workers == 1:
+        for instrument, product, file_info, job_dates in jobs:
+            add_results(
+                instrument,
+                product,
+                _make_files(file_info, job_dates, kwargs, use_template),
+            )
+        return result
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_make_files, file_info, job_dates, kwargs, use_template): (
+                instrument,
+                product,
+                job_dates,
+            )
+            for instrument, product, file_info, job_dates in jobs
+        }
+        for future in as_completed(futures):
+            instrument, product, job_dates = futures[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                # e.g. worker process killed
+                results = [(date, None, e) for date in job_dates]
+            add_results(instrument, product, results)
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(
+        description=(
+            "Create AMOF-compliant netCDF files with no data for many instruments,"
+            " data products and dates."
+        )
+    )
+    parser.add_argument(
+        "instruments", type=str, nargs="+", help="Names of NCAS instruments."
+    )
+    dates_group = parser.add_mutually_exclusive_group(required=True)
+    dates_group.add_argument(
+        "-d",
+        "--dates",
+        type=str,
+        nargs="+",
+        help="Dates for data in files, YYYYmmdd format.",
+        dest="dates",
+    )
+    dates_group.add_argument(
+        "-r",
+        "--date-range",
+        type=str,
+        nargs=2,
+        metavar=("START", "END"),
+        help="Make files for every day from START to END, YYYYmmdd format.",
+        dest="date_range",
+    )
+    parser.add_argument(
+        "-p",
+        "--products",
+        nargs="*",
+        default=None,
+        help=(
+            "Products to make netCDF files for. If not given, netCDF files "
+            "for all applicable products of each instrument are made."
+        ),
+        dest="products",
+    )
+    parser.add_argument(
+        "-l",
+        "--dim-lengths",
+        nargs="*",
+        help="Length for each dimension, e.g. -l time 96 altitude 45.",
+        dest="dim_lengths",
+    )
+    parser.add_argument(
+        "-m",
+        "--deployment-mode",
+        type=str,
+        choices=["land", "sea", "air", "trajectory"],
+        help=(
+            "Deployment mode of instrument, one of 'land', 'sea', 'air', "
+            "'trajectory'. Default is 'land'."
+        ),
+        default="land",
+        dest="deployment",
+    )
+    parser.add_argument(
+        "--platform",
+        type=str,
+        default=None,
+        help=(
+            "Observatory or location of the instruments. If not given, the default"
+            " platform of each instrument is used."
+        ),
+        dest="platform",
+    )
+    parser.add_argument(
+        "--options",
+        type=str,
+        default="",
+        help="Options to include in file names, separated by an underscore ('_').",
+        dest="options",
+    )
+    parser.add_argument(
+        "-o",
+        "--file-location",
+        type=str,
+        default=".",
+        help="Where to write the netCDF files. Default is current directory.",
+        dest="file_location",
+    )
+    parser.add_argument(
+        "-t",
+        "--tag",
+        type=str,
+        default="latest",
+        help="Tagged release of AMF_CVs to use. Default is 'latest'.",
+        dest="tag",
+    )
+    parser.add_argument(
+        "--use-local-files",
+        type=str,
+        default=None,
+        help=(
+            "Path to local directory of AMF_CVs tsv files to use, instead of"
+            " reading them from GitHub."
+        ),
+        dest="use_local_files",
+    )
+    parser.add_argument(
+        "-j",
+        "--max-workers",
+        type=int,
+        default=None,
+        help="Number of processes to write files with. Default is number of CPUs.",
+        dest="max_workers",
+    )
+    parser.add_argument(
+        "--no-template",
+        action="store_false",
+        dest="use_template",
+        help="Make every file from scratch, rather than copying a template file.",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="count",
+        default=0,
+        help="Level of additional info to print.",
+    )
+    args = parser.parse_args()
+
+    dim_lengths = {}
+    if args.dim_lengths is not None:
+        if len(args.dim_lengths) % 2 != 0:
+            msg = "-l/--dim-lengths option should be `dimension length` pairs"
+            raise ValueError(msg)
+        for i in range(0, len(args.dim_lengths), 2):
+            dim_lengths[args.dim_lengths[i]] = int(args.dim_lengths[i + 1])
+
+    batch_result = make_netcdfs(
+        args.instruments,
+        args.dates if args.dates is not None else date_range(*args.date_range),
+        products=args.products,
+        dimension_lengths=dim_lengths,
+        platform=args.platform,
+        loc=args.deployment,
+        options=args.options,
+        file_location=args.file_location,
+        use_local_files=args.use_local_files,
+        tag=args.tag,
+        max_workers=args.max_workers,
+        use_template=args.use_template,
+        verbose=args.verbose,
+    )
+    for path in batch_result.paths.values():
+        print(path)
+    for (instrument, product, date), error in batch_result.errors.items():
+        print(f"[ERROR]: {instrument} {product} {date}: {error}", file=sys.stderr)
+    sys.exit(0 if batch_result.ok else 1)
@@ -0,0 +1,700 @@
+"""
+On-disk cache of files from the AMF_CVs and ncas-data-instrument-vocabs GitHub repos,
+so that files from tagged releases only need to be downloaded once, and files from
+branches are only downloaded again when they have changed.
+
+"""
+
+import io
+import json
+import os
+import re
+import shutil
+import threading
+import zipfile
+from typing import Optional, TYPE_CHECKING
+
+from . import session
+from . import tsv_reader
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+GITHUB_RAW_URL = "https://raw.githubusercontent.com"
+DEFAULT_MAX_SIZE = 200 * 1024 * 1024
+
+# release tags look like "v2.0.0", branches (e.g. "main") can change so are
+# checked with GitHub before cached files are used
+_PINNED_TAG_PATTERN = re.compile(r"^v?\d+(\.\d+)*$")
+# response headers used to ask GitHub if a file on a branch has changed
+_VALIDATOR_HEADERS = {"ETag": "If-None-Match", "Last-Modified": "If-Modified-Since"}
+
+
+def default_cache_dir() -> str:
+    """
+    Get the default location of the cache directory. This is the value of the
+    NCAS_AMOF_CACHE_DIR environment variable if set, otherwise
+    ``$XDG_CACHE_HOME/ncas_amof_netcdf_template`` (``~/.cache`` if XDG_CACHE_HOME
+    is not set).
+
+    Returns:
+        str: path to cache directory
+    """
+    if cache_dir := os.environ.get("NCAS_AMOF_CACHE_DIR"):
+        return cache_dir
+    xdg_cache = os.environ.get(
+        "XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")
+    )
+    return os.path.join(xdg_cache, "ncas_amof_netcdf_template")
+
+
+class CVCache:
+    """
+    Size-limited on-disk cache of files from GitHub repos, keyed by repo, tag and
+    path of the file within the repo. When the total size of the cache goes over
+    max_size, the least recently used files are removed. The size of the cache is
+    found once, then kept up to date as files are added, so the cache directory is
+    only searched again when files need to be removed.
+
+    Args:
+        directory (str or None): directory to store cached files in. If None, use
+                                 default_cache_dir(). Default None.
+        max_size (int): maximum total size of cached files, in bytes. Default 200 MB.
+    """
+
+    def __init__(
+        self, directory: Optional[str] = None, max_size: int = DEFAULT_MAX_SIZE
+    ) -> None:
+        self.directory = directory if directory is not None else default_cache_dir()
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._size: Optional[int] = None
+        self._size_lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        class_name = type(self).__name__
+        return f"{class_name}(directory='{self.directory}', max_size={self.max_size})"
+
+    def _file_path(self, repo: str, tag: str, path: str) -> str:
+        return os.path.join(self.directory, *repo.split("/"), tag, *path.split("/"))
+
+    def _validators_path(self, repo: str, tag: str, path: str) -> str:
+        return f"{self._file_path(repo, tag, path)}.validators"
+
+    @staticmethod
+    def _write(file_path: str, content: bytes) -> None:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        # write to temporary file first so other processes never read partial files
+        tmp_file_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(tmp_file_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_file_path, file_path)
+
+    @staticmethod
+    def _touch(file_path: str) -> None:
+        # mark file as recently used, unless another process has just evicted it
+        try:
+            os.utime(file_path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _file_size(file_path: str) -> int:
+        try:
+            return os.stat(file_path).st_size
+        except FileNotFoundError:
+            return 0
+
+    def _grow(self, change: int) -> None:
+        """
+        Add change to the size of the cache after files are written, and remove least
+        recently used files if it is now larger than max_size.
+        """
+        with self._size_lock:
+            if self._size is None:
+                # files just written are already on disk
+                self._size = self.size()
+            else:
+                self._size += change
+            too_large = self._size > self.max_size
+        if too_large:
+            self.evict()
+
+    def get(self, repo: str, tag: str, path: str) -> Optional[bytes]:
+        """
+        Get contents of cached file, and mark file as recently used.
+
+        Args:
+            repo (str): GitHub repo, as "<owner-name>/<repo-name>"
+            tag (str): tagged release of repo
+            path (str): path of file within repo
+
+        Returns:
+            bytes or None: file contents, or None if file is not in cache
+        """
+        file_path = self._file_path(repo, tag, path)
+        try:
+            with open(file_path, "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self._touch(file_path)
+        self.hits += 1
+        return content
+
+    def get_validated(
+        self, repo: str, tag: str, path: str
+    ) -> Optional[tuple[bytes, dict[str, str]]]:
+        """
+        Get contents of cached file from a branch, along with the ETag and
+        Last-Modified headers it was downloaded with, so GitHub can be asked whether
+        the file has changed before it is used. Does not count as a hit or miss.
+
+        Args:
+            repo (str): GitHub repo, as "<owner-name>/<repo-name>"
+            tag (str): branch of repo
+            path (str): path of file within repo
+
+        Returns:
+            tuple or None: file contents and headers, or None if file or its headers
+                           are not in cache
+        """
+        file_path = self._file_path(repo, tag, path)
+        validators_path = self._validators_path(repo, tag, path)
+        try:
+            with open(validators_path, "rb") as f:
+                validators = json.loads(f.read())
+            with open(file_path, "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        self._touch(validators_path)
+        self._touch(file_path)
+        return content, validators
+
+    def put(
+        self,
+        repo: str,
+        tag: str,
+        path: str,
+        content: bytes,
+        validators: Optional[dict[str, str]] = None,
+    ) -> None:
+        """
+        Add file to cache, removing least recently used files if cache is too large.
+
+        Args:
+            repo (str): GitHub repo, as "<owner-name>/<repo-name>"
+            tag (str): tagged release or branch of repo
+            path (str): path of file within repo
+            content (bytes): file contents
+            validators (dict or None): ETag and/or Last-Modified headers the file was
+                                       downloaded with, for files from branches.
+                                       Default None.
+        """
+        file_path = self._file_path(repo, tag, path)
+        validators_path = self._validators_path(repo, tag, path)
+        change = len(content) - self._file_size(file_path)
+        change -= self._file_size(validators_path)
+        # never leave headers next to contents they weren't downloaded with
+        try:
+            os.remove(validators_path)
+        except FileNotFoundError:
+            pass
+        self._write(file_path, content)
+        if validators:
+            validators_content = json.dumps(validators).encode()
+            self._write(validators_path, validators_content)
+            change += len(validators_content)
+        self._grow(change)
+
+    def contains(self, repo: str, tag: str, path: str) -> bool:
+        """
+        Check if file is in the cache, without counting as a hit or miss.
+
+        Args:
+            repo (str): GitHub repo, as "<owner-name>/<repo-name>"
+            tag (str): tagged release of repo
+            path (str): path of file within repo
+
+        Returns:
+            bool: file is cached
+        """
+        return os.path.isfile(self._file_path(repo, tag, path))
+
+    def _archive_path(self, repo: str, tag: str) -> str:
+        return os.path.join(self.directory, *repo.split("/"), f"{tag}.zip")
+
+    def get_archive(self, repo: str, tag: str) -> Optional[bytes]:
+        """
+        Get cached zip archive of a tagged release of a repo, and mark it as
+        recently used.
+
+        Args:
+            repo (str): GitHub repo, as "<owner-name>/<repo-name>"
+            tag (str): tagged release of repo
+
+        Returns:
+            bytes or None: zip archive, or None if archive is not in cache
+        """
+        archive_path = self._archive_path(repo, tag)
+        try:
+            with open(archive_path, "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self._touch(archive_path)
+        self.hits += 1
+        return content
+
+    def put_archive(self, repo: str, tag: str, content: bytes) -> None:
+        """
+        Add zip archive of a tagged release of a repo to cache, removing least
+        recently used files if cache is too large.
+
+        Args:
+            repo (str): GitHub repo, as "<owner-name>/<repo-name>"
+            tag (str): tagged release of repo
+            content (bytes): zip archive
+        """
+        archive_path = self._archive_path(repo, tag)
+        change = len(content) - self._file_size(archive_path)
+        self._write(archive_path, content)
+        self._grow(change)
+
+    def has_tag(self, repo: str, tag: str) -> bool:
+        """
+        Check if any files, or the zip archive, for a tagged release of a repo are in
+        the cache.
+
+        Args:
+            repo (str): GitHub repo, as "<owner-name>/<repo-name>"
+            tag (str): tagged release of repo
+
+        Returns:
+            bool: files for tag are cached
+        """
+        return os.path.isdir(
+            os.path.join(self.directory, *repo.split("/"), tag)
+        ) or os.path.isfile(self._archive_path(repo, tag))
+
+    def _cached_files(self) -> list[tuple[str, os.stat_result]]:
+        cached_files = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".tmp"):
+                    # still being written, by this or another process
+                    continue
+                file_path = os.path.join(root, name)
+                try:
+                    cached_files.append((file_path, os.stat(file_path)))
+                except FileNotFoundError:
+                    # removed by another process
+                    continue
+        return cached_files
+
+    def size(self) -> int:
+        """
+        Returns:
+            int: total size of all cached files, in bytes
+        """
+        return sum(stat.st_size for _, stat in self._cached_files())
+
+    @staticmethod
+    def _remove(file_path: str) -> None:
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            # removed by another process
+            pass
+
+    def evict(self) -> None:
+        """
+        Remove least recently used files until cache is no larger than max_size. The
+        ETag and Last-Modified headers of a file from a branch are removed with it,
+        and any headers left without their file are always removed.
+        """
+        cached_files = dict(self._cached_files())
+        for file_path in list(cached_files):
+            if (
+                file_path.endswith(".validators")
+                and file_path.removesuffix(".validators") not in cached_files
+            ):
+                self._remove(file_path)
+                del cached_files[file_path]
+        total_size = sum(stat.st_size for stat in cached_files.values())
+
+        # each file is removed together with its headers, if it has any
+        entries = []
+        for file_path, stat in cached_files.items():
+            if file_path.endswith(".validators"):
+                continue
+            paths = [file_path]
+            size = stat.st_size
+            validators_path = f"{file_path}.validators"
+            if validators_path in cached_files:
+                paths.append(validators_path)
+                size += cached_files[validators_path].st_size
+            entries.append((stat.st_mtime, size, paths))
+        entries.sort(key=lambda x: x[0])
+        for _, size, paths in entries:
+            if total_size <= self.max_size:
+                break
+            for file_path in paths:
+                self._remove(file_path)
+            total_size -= size
+        with self._size_lock:
+            self._size = total_size
+
+    def clear(self) -> None:
+        """
+        Remove all files from the cache, and reset hit and miss counters.
+        """
+        shutil.rmtree(self.directory, ignore_errors=True)
+        with self._size_lock:
+            self._size = None
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns:
+            dict: number of cache hits and misses, number of cached files, and total
+                  size of cached files
+        """
+        cached_files = self._cached_files()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "files": len(cached_files),
+            "size": sum(stat.st_size for _, stat in cached_files),
+        }
+
+
+class TagArchive:
+    """
+    All files from a tagged release of a GitHub repo, read from the zip archive of
+    the release held in memory, without extracting them.
+
+    Args:
+        content (bytes): zip archive, as downloaded from
+                         https://github.com/<owner>/<repo>/archive/refs/tags/<tag>.zip
+    """
+
+    def __init__(self, content: bytes) -> None:
+        self._zip = zipfile.ZipFile(io.BytesIO(content))
+        # files are all in a top-level directory, e.g. "AMF_CVs-2.0.0/", which
+        # isn't part of the path of the file within the repo
+        self._members = {
+            name.split("/", 1)[1]: name
+            for name in self._zip.namelist()
+            if "/" in name and not name.endswith("/")
+        }
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._members
+
+    def paths(self, prefix: str = "") -> list[str]:
+        """
+        Args:
+            prefix (str): only return paths starting with prefix, e.g.
+                          "product-definitions/tsv/". Default "".
+
+        Returns:
+            list: paths of all files in the archive, relative to top of the repo
+        """
+        return [path for path in self._members if path.startswith(prefix)]
+
+    def read(self, path: str) -> Optional[bytes]:
+        """
+        Args:
+            path (str): path of file within repo
+
+        Returns:
+            bytes or None: file contents, or None if file is not in archive
+        """
+        if path not in self._members:
+            return None
+        return self._zip.read(self._members[path])
+
+
+_cache: Optional[CVCache] = None
+_cache_enabled = os.environ.get("NCAS_AMOF_NO_CACHE", "") == ""
+_use_archives = os.environ.get("NCAS_AMOF_USE_ARCHIVES", "") != ""
+_archives: dict[tuple[str, str], TagArchive] = {}
+_archives_lock = threading.Lock()
+
+
+def get_cache() -> Optional[CVCache]:
+    """
+    Get the cache shared by all modules in this package.
+
+    Returns:
+        CVCache or None: shared cache, or None if caching is disabled
+    """
+    global _cache
+    if not _cache_enabled:
+        return None
+    if _cache is None:
+        _cache = CVCache()
+    return _cache
+
+
+def configure_cache(
+    directory: Optional[str] = None,
+    max_size: int = DEFAULT_MAX_SIZE,
+    enabled: bool = True,
+    use_archives: bool = False,
+) -> Optional[CVCache]:
+    """
+    Set up the cache shared by all modules in this package.
+
+    Args:
+        directory (str or None): directory to store cached files in. If None, use
+                                 default_cache_dir(). Default None.
+        max_size (int): maximum total size of cached files, in bytes. Default 200 MB.
+        enabled (bool): whether to cache files at all. Default True.
+        use_archives (bool): download the zip archive of each tagged release once,
+                             and read all files for that release from it, rather
+                             than downloading each file separately. Ignored if
+                             caching is disabled. Default False.
+
+    Returns:
+        CVCache or None: shared cache, or None if caching is disabled
+    """
+    global _cache, _cache_enabled, _use_archives
+    _cache_enabled = enabled
+    _use_archives = use_archives
+    _cache = CVCache(directory, max_size) if enabled else None
+    with _archives_lock:
+        _archives.clear()
+    return _cache
+
+
+def get_tag_archive(
+    repo: str, tag: str, missing_ok: bool = False
+) -> Optional[TagArchive]:
+    """
+    Get the zip archive of a tagged release of a GitHub repo, from memory or the
+    cache if available, otherwise by downloading it and adding it to the cache.
+
+    Args:
+        repo (str): GitHub repo, as "<owner-name>/<repo-name>"
+        tag (str): tagged release of repo
+        missing_ok (bool): if True, return None if the release does not exist (404),
+                           otherwise raise an error. Default False.
+
+    Returns:
+        TagArchive or None: files in tagged release, or None if caching is disabled
+                            or release does not exist and missing_ok
+    """
+    cv_cache = get_cache()
+    if cv_cache is None:
+        return None
+    # only download archive once, even if many threads need it at the same time
+    with _archives_lock:
+        archive = _load_tag_archive(cv_cache, repo, tag)
+        if archive is None:
+            r = session.get(f"https://github.com/{repo}/archive/refs/tags/{tag}.zip")
+            if missing_ok and r.status_code == 404:
+                return None
+            r.raise_for_status()
+            cv_cache.put_archive(repo, tag, r.content)
+            archive = _archives[(repo, tag)] = TagArchive(r.content)
+        return archive
+
+
+def _load_tag_archive(cv_cache: CVCache, repo: str, tag: str) -> Optional[TagArchive]:
+    """
+    Get the zip archive of a tagged release from memory or the cache, without
+    downloading it. Must be called holding _archives_lock.
+    """
+    if (repo, tag) not in _archives:
+        content = cv_cache.get_archive(repo, tag)
+        if content is None:
+            return None
+        _archives[(repo, tag)] = TagArchive(content)
+    return _archives[(repo, tag)]
+
+
+def split_github_url(url: str) -> Optional[tuple[str, str, str]]:
+    """
+    Split URL of file on raw.githubusercontent.com into repo, tag and path.
+
+    Args:
+        url (str): URL of file, e.g.
+                   https://raw.githubusercontent.com/<owner>/<repo>/<tag>/<path>
+
+    Returns:
+        tuple or None: repo (as "<owner>/<repo>"), tag and path, or None if URL is not
+                       a file on raw.githubusercontent.com
+    """
+    if not url.startswith(f"{GITHUB_RAW_URL}/"):
+        return None
+    parts = url[len(GITHUB_RAW_URL) + 1 :].split("/", 3)
+    if len(parts) != 4 or any(part in ["", ".", ".."] for part in parts[:3]):
+        return None
+    owner, repo, tag, path = parts
+    if ".." in path.split("/"):
+        return None
+    return f"{owner}/{repo}", tag, path
+
+
+def is_pinned_tag(tag: str) -> bool:
+    """
+    Check if tag is a release version, e.g. "v2.0.0", rather than a branch whose
+    contents may change.
+
+    Args:
+        tag (str): tag or branch name
+
+    Returns:
+        bool: tag is a release version
+    """
+    return _PINNED_TAG_PATTERN.match(tag) is not None
+
+
+def is_cached(url: str) -> bool:
+    """
+    Check if file at URL is available in the cache. Files from branches are never
+    counted as available, as GitHub has to be asked whether they have changed.
+
+    Args:
+        url (str): URL of file
+
+    Returns:
+        bool: file is in cache
+    """
+    cv_cache = get_cache()
+    parts = split_github_url(url)
+    if cv_cache is None or parts is None or not is_pinned_tag(parts[1]):
+        return False
+    repo, tag, path = parts
+    if _use_archives:
+        # only look in archives already downloaded, never download one here
+        with _archives_lock:
+            archive = _archives.get((repo, tag))
+            if archive is None and os.path.isfile(cv_cache._archive_path(repo, tag)):
+                archive = _load_tag_archive(cv_cache, repo, tag)
+        if archive is not None:
+            return path in archive
+    return cv_cache.contains(*parts)
+
+
+def fetch(url: str, missing_ok: bool = False) -> Optional[bytes]:
+    """
+    Get contents of file at URL. Files from tagged releases on
+    raw.githubusercontent.com are read from the cache if available, and added to the
+    cache if not. If the cache is set up to use archives, these files are instead
+    read from the zip archive of the tagged release. Files from branches are also
+    cached, but are only read from the cache after GitHub confirms, using the ETag
+    and Last-Modified headers, that they have not changed since they were
+    downloaded.
+
+    Args:
+        url (str): URL of file
+        missing_ok (bool): if True, return None if the file does not exist (404),
+                           otherwise raise an error. Default False.
+
+    Returns:
+        bytes or None: file contents, or None if file does not exist and missing_ok
+    """
+    cv_cache = get_cache()
+    parts = split_github_url(url)
+    cacheable = cv_cache is not None and parts is not None and is_pinned_tag(parts[1])
+    if cacheable and _use_archives:
+        repo, tag, path = parts
+        archive = get_tag_archive(repo, tag, missing_ok=missing_ok)
+        content = archive.read(path) if archive is not None else None
+        if content is None and not missing_ok:
+            msg = f"File {path} not found in release {tag} of {repo}"
+            raise FileNotFoundError(msg)
+        return content
+    if cacheable:
+        content = cv_cache.get(*parts)
+        if content is not None:
+            return content
+    revalidate = cv_cache is not None and parts is not None and not cacheable
+    cached = cv_cache.get_validated(*parts) if revalidate else None
+    headers = {}
+    if cached is not None:
+        headers = {
+            request_header: cached[1][header]
+            for header, request_header in _VALIDATOR_HEADERS.items()
+            if header in cached[1]
+        }
+    r = session.get(url, headers=headers)
+    if cached is not None and r.status_code == 304:
+        cv_cache.hits += 1
+        return cached[0]
+    if missing_ok and r.status_code == 404:
+        return None
+    r.raise_for_status()
+    if cacheable:
+        cv_cache.put(*parts, r.content)
+    elif revalidate:
+        validators = {
+            header: r.headers[header]
+            for header in _VALIDATOR_HEADERS
+            if header in r.headers
+        }
+        if validators:
+            cv_cache.put(*parts, r.content, validators=validators)
+    return r.content
+
+
+def read_tsv(tsv_file: str) -> "pd.DataFrame":
+    """
+    Read tsv file into a DataFrame, using the cache for files on GitHub.
+
+    Args:
+        tsv_file (str): URL or local path of tsv file
+
+    Returns:
+        DataFrame: contents of tsv file
+    """
+    import pandas as pd
+
+    if tsv_file.startswith(f"{GITHUB_RAW_URL}/"):
+        return pd.read_csv(io.BytesIO(fetch(tsv_file)), sep="\t")
+    return pd.read_csv(tsv_file, sep="\t")
+
+
+def read_tsv_rows(tsv_file: str) -> list[dict[str, tsv_reader.Value]]:
+    """
+    Read tsv file into rows with tsv_reader, using the cache for files on GitHub.
+
+    Args:
+        tsv_file (str): URL or local path of tsv file
+
+    Returns:
+        list: dictionary of column name to value for each row
+    """
+    if tsv_file.startswith(("https://", "http://")):
+        return tsv_reader.parse_tsv(fetch(tsv_file))
+    return tsv_reader.read_tsv(tsv_file)
+
+
+def load_tsv(tsv_file: str) -> Optional[list[dict[str, tsv_reader.Value]]]:
+    """
+    Read tsv file into rows with tsv_reader if it exists. Files online are only
+    downloaded once, rather than checking they exist before reading them.
+
+    Args:
+        tsv_file (str): URL or local path of tsv file
+
+    Returns:
+        list or None: dictionary of column name to value for each row, or None if
+                      file does not exist
+    """
+    if tsv_file.startswith(("https://", "http://")):
+        content = fetch(tsv_file, missing_ok=True)
+        if content is None:
+            return None
+        return tsv_reader.parse_tsv(content)
+    if not os.path.isfile(tsv_file):
+        return None
+    return tsv_reader.read_tsv(tsv_file)
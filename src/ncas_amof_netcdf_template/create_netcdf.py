@@ -6,16 +6,262 @@ standard.
 
 from netCDF4 import Dataset
 import datetime as dt
-import copy
 import numpy as np
 import getpass
+import os
+import shutil
 import socket
+import tempfile
 import warnings
-from typing import Optional, Union
+from typing import Any, Optional, Union
 
 from . import tsv2dict
 from .__about__ import __version__
-from .file_info import FileInfo, convert_instrument_dict_to_file_info
+from .file_info import FileInfo, convert_instrument_dict_to_file_info, get_file_info
+
+
+def _history_text(created_time: str) -> str:
+    """
+    Value of the history global attribute for a file created at created_time.
+    """
+    user = getpass.getuser()
+    machine = socket.gethostname()
+    return (
+        f"{created_time} - File created by {user} on {machine} "
+        f"using the ncas_amof_netcdf_template v{__version__} python package"
+    )
+
+
+# global attributes whose values depend on when the file is made
+VOLATILE_ATTRIBUTES = ["history", "last_revised_date"]
+
+
+def _global_attributes(
+    instrument_file_info: FileInfo,
+    use_local_files: Optional[str] = None,
+    loc: str = "land",
+    platform: Optional[str] = None,
+) -> tuple[dict[str, str], list[str]]:
+    """
+    Values of the global attributes for a file, apart from those that depend on when
+    the file is made.
+
+    Returns:
+        tuple: dictionary of attribute values, with None for attributes that depend
+               on when the file is made, and names of those attributes
+    """
+    instrument_data = instrument_file_info.instrument_data
+    if platform is None:
+        platform = instrument_data.get("Mobile/Fixed (loc)", "n/a")
+    attributes = {}
+    volatile_attributes = []
+    for key, value in instrument_file_info.attributes.items():
+        if value["Fixed Value"] != "":
+            attributes[key] = value["Fixed Value"]
+        elif key == "source":
+            attributes[key] = instrument_data.get("Descriptor", "n/a")
+        elif key == "institution":
+            attributes[key] = "National Centre for Atmospheric Science (NCAS)"
+        elif key == "platform":
+            attributes[key] = platform
+        elif key == "instrument_manufacturer":
+            attributes[key] = instrument_data.get("Manufacturer", "n/a")
+        elif key == "instrument_model":
+            attributes[key] = instrument_data.get("Model No.", "n/a")
+        elif key == "instrument_serial_number":
+            attributes[key] = instrument_data.get("Serial Number", "n/a")
+        elif key == "amf_vocabularies_release":
+            if use_local_files and value.get("Example", "") != "":
+                # read from the local global-attributes.tsv with the other attributes
+                tagurl = value["Example"]
+            elif use_local_files:
+                attrsdict = tsv2dict.tsv2dict_attrs(
+                    f"{use_local_files}/_common/global-attributes.tsv"
+                )
+                tagurl = attrsdict["amf_vocabularies_release"]["Example"]
+            else:
+                tagurl = f"https://github.com/ncasuk/AMF_CVs/releases/tag/{instrument_file_info.ncas_gen_version}"
+            attributes[key] = tagurl
+        elif key in VOLATILE_ATTRIBUTES:
+            attributes[key] = None
+            volatile_attributes.append(key)
+        elif key == "deployment_mode":
+            attributes[key] = loc
+        else:
+            attributes[key] = (
+                f"CHANGE: {value['Description']}. {value['Compliance checking rules']}"
+            )
+    return attributes, volatile_attributes
+
+
+def _set_global_attributes(
+    ncfile: Dataset,
+    attributes: dict[str, str],
+    volatile_attributes: list[str],
+    created_time: str,
+) -> None:
+    """
+    Add global attributes from _global_attributes to the netCDF file, filling in
+    those that depend on when the file is made.
+    """
+    if volatile_attributes:
+        attributes = dict(attributes)
+        if "history" in volatile_attributes:
+            attributes["history"] = _history_text(created_time)
+        if "last_revised_date" in volatile_attributes:
+            attributes["last_revised_date"] = created_time
+    ncfile.setncatts(attributes)
+
+
+def _is_int8(datatype: str) -> bool:
+    try:
+        return np.dtype(datatype) == np.int8
+    except TypeError:
+        return False
+
+
+def _variable_plans(
+    variables: dict[str, dict[str, Any]],
+    verbose: int = 0,
+    storage: Optional[tuple[dict[str, int], Any, Any, Any]] = None,
+) -> list[tuple[str, dict[str, Any], dict[str, Any]]]:
+    """
+    Work out the arguments to createVariable and the attributes for each variable.
+
+    Args:
+        variables (dict): variables, from FileInfo.variables
+        verbose (int): level of additional info to print. Default 0.
+        storage (tuple or None): chunk_by_dimension, compression, complevel and
+                                 shuffle, as given to make_netcdf, which override the
+                                 values in variables. If None, use the values in
+                                 variables. Default None.
+
+    Returns:
+        list: name, createVariable keyword arguments, and attributes for each
+              variable
+    """
+    plans = []
+    for key, value in variables.items():
+        tmp_value = dict(value)
+
+        # error, there are some variables with dimensions
+        # missing, error in spreadsheet
+        # if we encounter one, we're going to print out an error
+        # and forget about that variable
+        if "dimension" not in tmp_value.keys():
+            print(f"WARN: No dimensions for variable {key}")
+            var_dims = ()
+        else:
+            var_dims = tmp_value.pop("dimension")
+            # there was an error somewhere meaning 2 dimensions
+            # had a '.' instead of ',' between them
+            var_dims = var_dims.replace(".", ",")
+            var_dims = tuple(x.strip() for x in var_dims.split(","))
+
+        datatype = tmp_value.pop("type")
+        fill_value = (
+            float(tmp_value.pop("_FillValue")) if "_FillValue" in tmp_value else None
+        )
+        chunksizes = tmp_value.pop("chunksizes", None)
+        compression = tmp_value.pop("compression", None)
+        complevel = tmp_value.pop("complevel", 4)
+        shuffle = tmp_value.pop("shuffle", True)
+
+        if storage is not None:
+            chunk_by_dimension, compression, complevel, shuffle = storage
+            if "dimension" in value and all(
+                var_dim in chunk_by_dimension for var_dim in var_dims
+            ):
+                chunksizes = tuple(
+                    int(chunk_by_dimension[var_dim]) for var_dim in var_dims
+                )
+            if isinstance(compression, dict):
+                compression = compression.get(key)
+            elif not isinstance(compression, str):
+                compression = None
+            if isinstance(complevel, dict):
+                complevel = complevel.get(key, 4)
+            elif not isinstance(complevel, int):
+                complevel = 4
+            if isinstance(shuffle, dict):
+                shuffle = shuffle.get(key, True)
+            elif not isinstance(shuffle, bool):
+                shuffle = True
+
+        attributes = {}
+        for mdatkey, mdatvalue in tmp_value.items():
+            # flag meanings in the tsv files are separated by '|',
+            # should be space separated
+            if "|" in mdatvalue and "flag_meaning" in mdatkey:
+                mdatvalue = " ".join([i.strip() for i in mdatvalue.split("|")])
+            # flag values are bytes, can't add byte array
+            # into NETCDF4_CLASSIC so have to muddle a bit
+            if "flag_value" in mdatkey and "qc" in key and _is_int8(datatype):
+                # turn string "0b,1b..." into list of ints [0,1...]
+                mdatvalue = mdatvalue.strip(",")
+                newmdatvalue = [int(i.strip("b")) for i in mdatvalue.split(",")]
+                # turn list into array with int8 type
+                mdatvalue = np.array(newmdatvalue, dtype=np.int8)
+            # print warning for example values,
+            # and don't add example values for standard_name
+            if (
+                mdatkey == "standard_name"
+                and ("EXAMPLE" in mdatvalue or mdatvalue == "")
+                and verbose >= 1
+            ):
+                print(
+                    f"WARN: No standard name for variable {key}, "
+                    "standard_name attribute not added"
+                )
+            elif "EXAMPLE" in mdatvalue and verbose >= 1:
+                print(
+                    "WARN: example value for attribute " f"{mdatkey} for variable {key}"
+                )
+            # don't add EXAMPLE standard name
+            if not (
+                mdatkey == "standard_name"
+                and ("EXAMPLE" in mdatvalue or mdatvalue == "")
+            ):
+                # don't add empty attributes
+                if isinstance(mdatvalue, str) and mdatvalue == "" and verbose >= 1:
+                    print(
+                        f"WARN: No value for attribute {mdatkey} "
+                        "for variable {key}, attribute not added"
+                    )
+                else:
+                    attributes[mdatkey] = mdatvalue
+
+        plans.append(
+            (
+                key,
+                {
+                    "datatype": datatype,
+                    "dimensions": var_dims,
+                    "fill_value": fill_value,
+                    "chunksizes": chunksizes,
+                    "compression": compression,
+                    "complevel": complevel,
+                    "shuffle": shuffle,
+                },
+                attributes,
+            )
+        )
+    return plans
+
+
+def _create_variables(
+    ncfile: Dataset, plans: list[tuple[str, dict[str, Any], dict[str, Any]]]
+) -> None:
+    """
+    Create variables from _variable_plans in the netCDF file.
+    """
+    for key, kwargs, attributes in plans:
+        # make sure variable doesn't already exist, warn if it does
+        if key in ncfile.variables.keys():
+            print(f"WARN: variable {key} defined multiple times.")
+        else:
+            var = ncfile.createVariable(key, **kwargs)
+            var.setncatts(attributes)
 
 
 def add_attributes(
@@ -144,70 +390,10 @@ def add_attributes(
     if created_time is None:
         created_time = dt.datetime.now(tz=dt.timezone.utc).strftime("%Y%m%dT%H%M%S")
 
-    for key, value in instrument_file_info.attributes.items():
-        if value["Fixed Value"] != "":
-            ncfile.setncattr(key, value["Fixed Value"])
-        elif key == "source":
-            if "Descriptor" in instrument_file_info.instrument_data.keys():
-                ncfile.setncattr(
-                    key, instrument_file_info.instrument_data["Descriptor"]
-                )
-            else:
-                ncfile.setncattr(key, "n/a")
-        elif key == "institution":
-            ncfile.setncattr(key, "National Centre for Atmospheric Science (NCAS)")
-        elif key == "platform":
-            if "Mobile/Fixed (loc)" in instrument_file_info.instrument_data.keys():
-                ncfile.setncattr(
-                    key, instrument_file_info.instrument_data["Mobile/Fixed (loc)"]
-                )
-            else:
-                ncfile.setncattr(key, "n/a")
-        elif key == "instrument_manufacturer":
-            if "Manufacturer" in instrument_file_info.instrument_data.keys():
-                ncfile.setncattr(
-                    key, instrument_file_info.instrument_data["Manufacturer"]
-                )
-            else:
-                ncfile.setncattr(key, "n/a")
-        elif key == "instrument_model":
-            if "Model No." in instrument_file_info.instrument_data.keys():
-                ncfile.setncattr(key, instrument_file_info.instrument_data["Model No."])
-            else:
-                ncfile.setncattr(key, "n/a")
-        elif key == "instrument_serial_number":
-            if "Serial Number" in instrument_file_info.instrument_data.keys():
-                ncfile.setncattr(
-                    key, instrument_file_info.instrument_data["Serial Number"]
-                )
-            else:
-                ncfile.setncattr(key, "n/a")
-        elif key == "amf_vocabularies_release":
-            if use_local_files:
-                attrsdict = tsv2dict.tsv2dict_attrs(
-                    f"{use_local_files}/_common/global-attributes.tsv"
-                )
-                tagurl = attrsdict["amf_vocabularies_release"]["Example"]
-            else:
-                tagurl = f"https://github.com/ncasuk/AMF_CVs/releases/tag/{instrument_file_info.ncas_gen_version}"
-            ncfile.setncattr(key, tagurl)
-        elif key == "history":
-            user = getpass.getuser()
-            machine = socket.gethostname()
-            history_text = (
-                f"{created_time} - File created by {user} on {machine} "
-                f"using the ncas_amof_netcdf_template v{__version__} python package"
-            )
-            ncfile.setncattr(key, history_text)
-        elif key == "last_revised_date":
-            ncfile.setncattr(key, created_time)
-        elif key == "deployment_mode":
-            ncfile.setncattr(key, loc)
-        else:
-            ncfile.setncattr(
-                key,
-                f"CHANGE: {value['Description']}. {value['Compliance checking rules']}",
-            )
+    attributes, volatile_attributes = _global_attributes(
+        instrument_file_info, use_local_files=use_local_files, loc=loc
+    )
+    _set_global_attributes(ncfile, attributes, volatile_attributes, created_time)
 
 
 def add_dimensions(
@@ -388,109 +574,164 @@ def add_variables(
             )
             raise ValueError(msg)
 
-    for key, value in instrument_file_info.variables.items():
-        # make sure variable doesn't already exist, warn if it does
-        if key in ncfile.variables.keys():
-            print(f"WARN: variable {key} defined multiple times.")
-        else:
-            # therefore, value is instrument_dict[obj]['variables'][key]
-            # want to pop certain things here, but not for ever, so make tmp_value
-            tmp_value = copy.copy(value)
-
-            # error, there are some variables with dimensions
-            # missing, error in spreadsheet
-            # if we encounter one, we're going to print out an error
-            # and forget about that variable
-            if "dimension" not in tmp_value.keys():
-                print(f"WARN: No dimensions for variable {key}")
-                var_dims = ()
-            else:
-                var_dims = tmp_value.pop("dimension")
-                # there was an error somewhere meaning 2 dimensions
-                # had a '.' instead of ',' between them
-                var_dims = var_dims.replace(".", ",")
-                var_dims = tuple(x.strip() for x in var_dims.split(","))
+    _create_variables(ncfile, _variable_plans(instrument_file_info.variables, verbose))
 
-            datatype = tmp_value.pop("type")
 
-            if "_FillValue" in tmp_value:
-                fill_value = float(tmp_value.pop("_FillValue"))
-            else:
-                fill_value = None
+def _platform(instrument_file_info: FileInfo) -> str:
+    """
+    Platform of instrument, from "Mobile/Fixed (loc)" in the instrument data, e.g.
+    "iao" for "fixed - iao".
+    """
+    location = instrument_file_info.instrument_data["Mobile/Fixed (loc)"]
+    if location.split("-")[0].strip().lower() == "fixed":
+        return location.split("-")[-1].strip().lower()
+    return location.strip().lower()
 
-            if "chunksizes" in tmp_value:
-                chunksizes = tmp_value.pop("chunksizes")
-            else:
-                chunksizes = None
 
-            if "compression" in tmp_value:
-                compression = tmp_value.pop("compression")
-            else:
-                compression = None
+class CreationPlan:
+    """
+    Everything needed to make a netCDF file from an instrument's definitions, worked
+    out once: the global attributes, dimension lengths, and the arguments to
+    createVariable and attributes for each variable. Only the global attributes that
+    depend on when a file is made (see VOLATILE_ATTRIBUTES) are set for each file,
+    so the same plan can be used to make many files quickly. The definitions in
+    instrument_file_info are not changed.
 
-            if "complevel" in tmp_value:
-                complevel = tmp_value.pop("complevel")
-            else:
-                complevel = 4
+    Args:
+        instrument_file_info (FileInfo): information about the instrument, from
+                                         file_info.FileInfo, with lengths for all
+                                         dimensions.
+        verbose (int): level of additional info to print. Default 0.
+        use_local_files (str or None): path to local directory where tsv files are
+                                    stored. If "None", read from online. Default None.
+        chunk_by_dimension (dict): chunk sizes to use in each dimension.
+                                   Default None (no chunking).
+        compression (str or dict): compression algorithm to be used to store data,
+                                   for all variables or as variable:compression
+                                   pairs. Default None (no compression).
+        complevel (int or dict): level of compression to be used, for all variables
+                                 or as variable:complevel pairs. Default 4.
+        shuffle (bool or dict): whether to use the HDF5 shuffle filter before
+                                compressing with zlib, for all variables or as
+                                variable:shuffle pairs. Default True.
+        unlimited_dimension (str or None): dimension to make unlimited, e.g. 'time',
+                                           so data can be appended along it with
+                                           util.RecordWriter. Its length in
+                                           instrument_file_info is not used.
+                                           Default None.
+    """
 
-            if "shuffle" in tmp_value:
-                shuffle = tmp_value.pop("shuffle")
-            else:
-                shuffle = True
+    def __init__(
+        self,
+        instrument_file_info: FileInfo,
+        verbose: int = 0,
+        use_local_files: Optional[str] = None,
+        chunk_by_dimension: Optional[dict[str, int]] = None,
+        compression: Union[str, dict[str, str], None] = None,
+        complevel: Union[int, dict[str, int]] = 4,
+        shuffle: Union[bool, dict[str, bool]] = True,
+        unlimited_dimension: Optional[str] = None,
+    ) -> None:
+        self.instrument_name = instrument_file_info.instrument_name
+        self.data_product = instrument_file_info.data_product
+        self.platform = _platform(instrument_file_info)
+        self.global_attributes, self.volatile_attributes = _global_attributes(
+            instrument_file_info,
+            use_local_files=use_local_files,
+            platform=self.platform,
+        )
+        self.dimensions = {
+            name: None if name == unlimited_dimension else dim["Length"]
+            for name, dim in instrument_file_info.dimensions.items()
+        }
+        self.variables = _variable_plans(
+            instrument_file_info.variables,
+            verbose,
+            storage=(chunk_by_dimension or {}, compression, complevel, shuffle),
+        )
 
-            var = ncfile.createVariable(
-                key,
-                datatype,
-                var_dims,
-                fill_value=fill_value,
-                chunksizes=chunksizes,
-                compression=compression,
-                complevel=complevel,
-                shuffle=shuffle,
-            )
+    def __repr__(self) -> str:
+        class_name = type(self).__name__
+        return (
+            f"{class_name}('{self.instrument_name}', '{self.data_product}') -"
+            f" {len(self.variables)} variables"
+        )
 
-            for mdatkey, mdatvalue in tmp_value.items():
-                # flag meanings in the tsv files are separated by '|',
-                # should be space separated
-                if "|" in mdatvalue and "flag_meaning" in mdatkey:
-                    mdatvalue = " ".join([i.strip() for i in mdatvalue.split("|")])
-                # flag values are bytes, can't add byte array
-                # into NETCDF4_CLASSIC so have to muddle a bit
-                if "flag_value" in mdatkey and "qc" in key and var.dtype == np.int8:
-                    # turn string "0b,1b..." into list of ints [0,1...]
-                    mdatvalue = mdatvalue.strip(",")
-                    newmdatvalue = [int(i.strip("b")) for i in mdatvalue.split(",")]
-                    # turn list into array with int8 type
-                    mdatvalue = np.array(newmdatvalue, dtype=np.int8)
-                # print warning for example values,
-                # and don't add example values for standard_name
-                if (
-                    mdatkey == "standard_name"
-                    and ("EXAMPLE" in mdatvalue or mdatvalue == "")
-                    and verbose >= 1
-                ):
-                    print(
-                        f"WARN: No standard name for variable {key}, "
-                        "standard_name attribute not added"
-                    )
-                elif "EXAMPLE" in mdatvalue and verbose >= 1:
-                    print(
-                        "WARN: example value for attribute "
-                        f"{mdatkey} for variable {key}"
-                    )
-                # don't add EXAMPLE standard name
-                if not (
-                    mdatkey == "standard_name"
-                    and ("EXAMPLE" in mdatvalue or mdatvalue == "")
-                ):
-                    # don't add empty attributes
-                    if isinstance(mdatvalue, str) and mdatvalue == "" and verbose >= 1:
-                        print(
-                            f"WARN: No value for attribute {mdatkey} "
-                            "for variable {key}, attribute not added"
-                        )
-                    else:
-                        var.setncattr(mdatkey, mdatvalue)
+    def filename(
+        self, time: str, options: str = "", product_version: str = "1.0"
+    ) -> str:
+        """
+        Name of netCDF file, following the NCAS-GENERAL file naming convention.
+
+        Args:
+            time (str): time that the data represents, in YYYYmmdd-HHMMSS format or
+                        as much of as required.
+            options (str): options to be included in file name, separated by an
+                           underscore ('_'), with up to three options permitted.
+                           Default ''.
+            product_version (str): version of the data file. Default '1.0'.
+
+        Returns:
+            str: file name
+        """
+        if options != "":
+            no_options = len(options.split("_"))
+            if no_options > 3:
+                msg = f"Too many options, maximum allowed 3, given {no_options}"
+                raise ValueError(msg)
+            options = f"_{options}"
+
+        return (
+            f"{self.instrument_name}_{f'{self.platform}_' if self.platform != '' else ''}"
+            f"{time}_{self.data_product}{options}_v{product_version}.nc"
+        )
+
+    def apply(self, ncfile: Dataset, created_time: Optional[str] = None) -> None:
+        """
+        Add all global attributes, dimensions and variables to a netCDF file.
+
+        Args:
+            ncfile (obj): netCDF file object
+            created_time (str or None): time of file creation. If 'None', now will be
+                                        used.
+        """
+        if created_time is None:
+            created_time = dt.datetime.now(dt.timezone.utc).strftime(
+                "%Y-%m-%dT%H:%M:%S"
+            )
+        _set_global_attributes(
+            ncfile, self.global_attributes, self.volatile_attributes, created_time
+        )
+        for name, length in self.dimensions.items():
+            ncfile.createDimension(name, length)
+        _create_variables(ncfile, self.variables)
+
+    def make_netcdf(
+        self,
+        time: str,
+        options: str = "",
+        product_version: str = "1.0",
+        file_location: str = ".",
+    ) -> Dataset:
+        """
+        Make netCDF file for given time.
+
+        Args:
+            time (str): time that the data represents, in YYYYmmdd-HHMMSS format or
+                        as much of as required.
+            options (str): options to be included in file name, separated by an
+                           underscore ('_'), with up to three options permitted.
+                           Default ''.
+            product_version (str): version of the data file. Default '1.0'.
+            file_location (str): where to write the netCDF file. Default '.'.
+
+        Returns:
+            netCDF file object.
+        """
+        filename = self.filename(time, options=options, product_version=product_version)
+        ncfile = Dataset(f"{file_location}/{filename}", "w", format="NETCDF4_CLASSIC")
+        self.apply(ncfile)
+        return ncfile
 
 
 def make_netcdf(
@@ -516,6 +757,7 @@ def make_netcdf(
     complevel: Union[int, dict[str, int]] = 4,
     shuffle: Union[bool, dict[str, bool]] = True,
     instrument_file_info: Optional[FileInfo] = None,
+    unlimited_dimension: Optional[str] = None,
 ) -> Dataset:
     """
     Makes netCDF file for given instrument and arguments.
@@ -571,6 +813,9 @@ def make_netcdf(
         shuffle (bool or dict): whether to use the HDF5 shuffle filter before compressing with
                                 zlib, significantly improving compression. Default is True.
                                 Ignored if compression is not zlib.
+        unlimited_dimension (str or None): dimension to make unlimited, e.g. 'time', so
+                                           data can be appended along it with
+                                           util.RecordWriter. Default None.
 
     Returns:
         netCDF file object or nothing.
@@ -670,84 +915,176 @@ def make_netcdf(
                     )
                     raise ValueError(msg)
 
-    chunk_by_dimension = chunk_by_dimension or {}
-
-    # add chunks to variables with defined chunk dimensions
-    for var in (var_dict := instrument_file_info.variables):
-        if "dimension" in var_dict[var].keys():
-            var_dims = var_dict[var]["dimension"]
-            var_dims = var_dims.replace(".", ",")
-            var_dims = [x.strip() for x in var_dims.split(",")]
-            if all(var_dim in chunk_by_dimension.keys() for var_dim in var_dims):
-                chunksizes = tuple(
-                    [int(chunk_by_dimension[var_dim]) for var_dim in var_dims]
-                )
-                var_dict[var]["chunksizes"] = chunksizes
-        if isinstance(compression, str):
-            var_dict[var]["compression"] = compression
-        elif isinstance(compression, dict) and var in compression.keys():
-            var_dict[var]["compression"] = compression[var]
-        else:
-            var_dict[var]["compression"] = None
-
-        if isinstance(complevel, int):
-            var_dict[var]["complevel"] = complevel
-        elif isinstance(complevel, dict) and var in complevel.keys():
-            var_dict[var]["complevel"] = complevel[var]
-        else:
-            var_dict[var]["complevel"] = 4
-
-        if isinstance(shuffle, bool):
-            var_dict[var]["shuffle"] = shuffle
-        elif isinstance(shuffle, dict) and var in shuffle.keys():
-            var_dict[var]["shuffle"] = shuffle[var]
-        else:
-            var_dict[var]["shuffle"] = True
+    plan = CreationPlan(
+        instrument_file_info,
+        verbose=verbose,
+        use_local_files=use_local_files,
+        chunk_by_dimension=chunk_by_dimension,
+        compression=compression,
+        complevel=complevel,
+        shuffle=shuffle,
+        unlimited_dimension=unlimited_dimension,
+    )
+    instrument_file_info.instrument_data["Mobile/Fixed (loc)"] = plan.platform
+    return plan.make_netcdf(
+        time,
+        options=options,
+        product_version=product_version,
+        file_location=file_location,
+    )
 
-    if (
-        instrument_file_info.instrument_data["Mobile/Fixed (loc)"]
-        .split("-")[0]
-        .strip()
-        .lower()
-        == "fixed"
-    ):
-        platform = (
-            instrument_file_info.instrument_data["Mobile/Fixed (loc)"]
-            .split("-")[-1]
-            .strip()
-            .lower()
-        )
-    else:
-        platform = (
-            instrument_file_info.instrument_data["Mobile/Fixed (loc)"].strip().lower()
-        )
-    instrument_file_info.instrument_data["Mobile/Fixed (loc)"] = platform
 
-    if options != "":
-        no_options = len(options.split("_"))
-        if no_options > 3:
-            msg = f"Too many options, maximum allowed 3, given {no_options}"
-            raise ValueError(msg)
-        options = f"_{options}"
+# ioctl request to share data blocks between files, on file systems supporting it
+_FICLONE = 0x40049409
 
-    filename = (
-        f"{instrument_file_info.instrument_name}_{f'{platform}_' if platform != '' else ''}"
-        f"{time}_{instrument_file_info.data_product}{options}_v{product_version}.nc"
-    )
 
-    ncfile = Dataset(f"{file_location}/{filename}", "w", format="NETCDF4_CLASSIC")
-    created_time = dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+def _copy_file(src: str, dst: str) -> None:
+    """
+    Copy file, sharing the data with the original (reflink) where the file system
+    allows, otherwise copying within the kernel with copy_file_range if available.
+    """
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            import fcntl
+
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            return
+        except (ImportError, OSError):
+            pass
+        if hasattr(os, "copy_file_range"):
+            size = os.fstat(fsrc.fileno()).st_size
+            copied = 0
+            try:
+                while copied < size:
+                    n = os.copy_file_range(fsrc.fileno(), fdst.fileno(), size - copied)
+                    if n == 0:
+                        break
+                    copied += n
+            except OSError:
+                copied = -1
+            if copied == size:
+                return
+            fsrc.seek(0)
+            fdst.seek(0)
+            fdst.truncate()
+        shutil.copyfileobj(fsrc, fdst)
+
+
+class NetCDFTemplate:
+    """
+    Empty netCDF file made once from an instrument's definitions, which is copied to
+    make a file for each date. Only the last_revised_date and history global
+    attributes are changed in each copy, so making many files only needs to copy
+    bytes rather than create every dimension, variable and attribute again.
+    Takes the same arguments as make_netcdf. The template file is kept in a hidden
+    directory in file_location until close is called, or the with block ends.
 
-    add_attributes(
-        ncfile,
-        instrument_file_info=instrument_file_info,
-        use_local_files=use_local_files,
-        created_time=created_time,
-    )
-    add_dimensions(ncfile, instrument_file_info=instrument_file_info)
-    add_variables(ncfile, instrument_file_info=instrument_file_info, verbose=verbose)
+    Args:
+        instrument_file_info (FileInfo): information about the instrument, from
+                                         file_info.FileInfo, with lengths for all
+                                         dimensions.
+        verbose (int): level of additional info to print. Default 0.
+        options (str): options to be included in file name. Default ''.
+        product_version (str): version of the data file. Default '1.0'.
+        file_location (str): where to write the netCDF files. Default '.'.
+        use_local_files (str or None): path to local directory where tsv files are
+                                    stored. If "None", read from online. Default None.
+        chunk_by_dimension (dict): chunk sizes to use in each dimension.
+                                   Default None (no chunking).
+        compression (str or dict): compression algorithm to be used to store data.
+                                   Default None (no compression).
+        complevel (int or dict): level of compression to be used. Default 4.
+        shuffle (bool or dict): whether to use the HDF5 shuffle filter before
+                                compressing with zlib. Default True.
+        unlimited_dimension (str or None): dimension to make unlimited, e.g. 'time'.
+                                           Default None.
+    """
 
-    return ncfile
+    # stands in for the date in the name of the template file
+    TIME_PLACEHOLDER = "TEMPLATE"
+
+    def __init__(
+        self,
+        instrument_file_info: FileInfo,
+        verbose: int = 0,
+        options: str = "",
+        product_version: str = "1.0",
+        file_location: str = ".",
+        use_local_files: Optional[str] = None,
+        chunk_by_dimension: Optional[dict[str, int]] = None,
+        compression: Union[str, dict[str, str], None] = None,
+        complevel: Union[int, dict[str, int]] = 4,
+        shuffle: Union[bool, dict[str, bool]] = True,
+        unlimited_dimension: Optional[str] = None,
+    ) -> None:
+        self.file_location = file_location
+        # on the same file system as the files, so they can share its data
+        self._directory = tempfile.mkdtemp(prefix=".nant-template-", dir=file_location)
+        try:
+            plan = CreationPlan(
+                instrument_file_info,
+                verbose=verbose,
+                use_local_files=use_local_files,
+                chunk_by_dimension=chunk_by_dimension,
+                compression=compression,
+                complevel=complevel,
+                shuffle=shuffle,
+                unlimited_dimension=unlimited_dimension,
+            )
+            ncfile = plan.make_netcdf(
+                self.TIME_PLACEHOLDER,
+                options=options,
+                product_version=product_version,
+                file_location=self._directory,
+            )
+            self.path = ncfile.filepath()
+            ncfile.close()
+            self._plan = plan
+            self._options = options
+            self._product_version = product_version
+        except BaseException:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            raise
+
+    def __repr__(self) -> str:
+        class_name = type(self).__name__
+        return f"{class_name}('{self.path}')"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def make_netcdf(self, time: str) -> Dataset:
+        """
+        Make netCDF file for given time by copying the template.
+
+        Args:
+            time (str): time that the data represents, in YYYYmmdd-HHMMSS format or
+                        as much of as required.
+
+        Returns:
+            netCDF file object, open to add data.
+        """
+        filename = self._plan.filename(
+            time, options=self._options, product_version=self._product_version
+        )
+        path = f"{self.file_location}/{filename}"
+        _copy_file(self.path, path)
+        ncfile = Dataset(path, "a")
+        created_time = dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+        if "last_revised_date" in self._plan.volatile_attributes:
+            ncfile.setncattr("last_revised_date", created_time)
+        if "history" in self._plan.volatile_attributes:
+            ncfile.setncattr("history", _history_text(created_time))
+        return ncfile
+
+    def close(self) -> None:
+        """
+        Remove the template file.
+        """
+        shutil.rmtree(self._directory, ignore_errors=True)
 
 
 def list_products(
@@ -799,6 +1136,7 @@ def make_product_netcdf(
     compression: Union[str, dict[str, str], None] = None,
     complevel: Union[int, dict[str, int]] = 4,
     shuffle: Union[bool, dict[str, bool]] = True,
+    unlimited_dimension: Optional[str] = None,
 ) -> Dataset:
     """
     Create an AMOF-like netCDF file for a given data product. This means files can be
@@ -841,6 +1179,10 @@ def make_product_netcdf(
         shuffle (bool or dict): whether to use the HDF5 shuffle filter before compressing with
                                 zlib, significantly improving compression. Default is True.
                                 Ignored if compression is not zlib.
+        unlimited_dimension (str or None): dimension to make unlimited, e.g. 'time', so
+                                           data can be appended along it with
+                                           util.RecordWriter. Its length doesn't
+                                           need to be given. Default None.
 
     Returns:
         netCDF file object or nothing.
@@ -865,7 +1207,7 @@ def make_product_netcdf(
 
     # make sure we have dimension lengths for all expected dimensions
     for key, val in product_file_info.dimensions.items():
-        if not isinstance(val["Length"], int):
+        if not isinstance(val["Length"], int) and key != unlimited_dimension:
             if key in dimension_lengths.keys():
                 val["Length"] = int(dimension_lengths[key])
             else:
@@ -884,6 +1226,7 @@ def make_product_netcdf(
         compression=compression,
         complevel=complevel,
         shuffle=shuffle,
+        unlimited_dimension=unlimited_dimension,
     )
     return nc
 
@@ -905,6 +1248,7 @@ def main(
     compression: Union[str, dict[str, str], None] = None,
     complevel: Union[int, dict[str, int]] = 4,
     shuffle: Union[bool, dict[str, bool]] = True,
+    unlimited_dimension: Optional[str] = None,
 ) -> Union[Dataset, list[Dataset]]:
     """
     Create 'just-add-data' AMOF-compliant netCDF file
@@ -951,6 +1295,10 @@ def main(
                                 zlib, significantly improving compression. Default is True.
                                 Ignored if compression is not zlib.
                                    the netCDF4 python module. Default is None (no compression).
+        unlimited_dimension (str or None): dimension to make unlimited, e.g. 'time', so
+                                           data can be appended along it with
+                                           util.RecordWriter. Its length doesn't
+                                           need to be given. Default None.
 
     Returns:
         netCDF file object or nothing
@@ -988,17 +1336,13 @@ def main(
         raise ValueError(msg)
 
     for product in products:
-        instrument_file_info = FileInfo(
+        instrument_file_info = get_file_info(
             instrument,
             product,
             deployment_mode=loc,
             tag=tag,
             use_local_files=use_local_files,
         )
-        instrument_file_info.get_product_info()
-        instrument_file_info.get_deployment_info()
-        instrument_file_info.get_instrument_info()
-        instrument_file_info.get_common_info()
 
         # check if platform needs changing
         if platform is not None:
@@ -1016,7 +1360,7 @@ def main(
 
         # make sure we have dimension lengths for all expected dimensions
         for key, val in instrument_file_info.dimensions.items():
-            if not isinstance(val["Length"], int):
+            if not isinstance(val["Length"], int) and key != unlimited_dimension:
                 if key in dimension_lengths.keys():
                     val["Length"] = int(dimension_lengths[key])
                 else:
@@ -1032,10 +1376,12 @@ def main(
                 options=options,
                 product_version=product_version,
                 file_location=file_location,
+                use_local_files=use_local_files,
                 chunk_by_dimension=chunk_by_dimension,
                 compression=compression,
                 complevel=complevel,
                 shuffle=shuffle,
+                unlimited_dimension=unlimited_dimension,
             )
         )
     if len(ncfiles) == 1:
@@ -0,0 +1,267 @@
+"""
+Compile all the product definitions of a release of AMF_CVs, along with the
+instrument vocabularies, into a single index that can be saved, and loaded again
+without reading any tsv files.
+"""
+
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Optional
+
+from . import cache
+from . import tsv2dict
+from . import values
+from .file_info import (
+    FileInfo,
+    _instrument_data,
+    _parse_attrs,
+    _parse_dims,
+    _parse_vars,
+)
+
+# increase if the contents of the index change, so old saved indexes aren't used
+INDEX_FORMAT = 1
+DEPLOYMENT_MODES = ["land", "sea", "air", "trajectory"]
+
+_indexes: dict[tuple[str, Optional[str]], "CVIndex"] = {}
+_indexes_lock = threading.Lock()
+
+
+class CVIndex:
+    """
+    Variables, dimensions and global attributes of every data product and
+    deployment mode in a release of AMF_CVs, and instrument data for every
+    instrument in the NCAS and community instrument vocabularies.
+
+    Args:
+        tag (str): tagged release of AMF_CVs
+        vocab_tag (str): tagged release of ncas-data-instrument-vocabs
+        products (dict): "attributes", "dimensions" and "variables" dictionaries for
+                         each data product
+        deployment_modes (dict): "attributes", "dimensions" and "variables"
+                                 dictionaries for each deployment mode
+        instruments (dict): instrument data for each instrument, in "ncas" and
+                            "community" dictionaries
+    """
+
+    def __init__(
+        self,
+        tag: str,
+        vocab_tag: str,
+        products: dict[str, dict[str, dict[str, Any]]],
+        deployment_modes: dict[str, dict[str, dict[str, Any]]],
+        instruments: dict[str, dict[str, dict[str, Any]]],
+    ) -> None:
+        self.tag = tag
+        self.vocab_tag = vocab_tag
+        self.products = products
+        self.deployment_modes = deployment_modes
+        self.instruments = instruments
+
+    def __repr__(self) -> str:
+        class_name = type(self).__name__
+        return f"{class_name}(tag='{self.tag}', vocab_tag='{self.vocab_tag}') - {len(self.products)} products"
+
+    def instrument_info(self, instrument_name: str) -> Optional[dict[str, Any]]:
+        """
+        Get instrument data for an instrument, from the NCAS instrument vocabulary if
+        the name starts with "ncas-", otherwise from the community vocabulary.
+
+        Args:
+            instrument_name (str): name of the instrument
+
+        Returns:
+            dict or None: instrument data, or None if instrument is not found
+        """
+        table = "ncas" if instrument_name.startswith("ncas-") else "community"
+        return self.instruments[table].get(instrument_name)
+
+    def to_bytes(self) -> bytes:
+        """
+        Returns:
+            bytes: index, in the format read by CVIndex.from_bytes
+        """
+        return pickle.dumps(
+            {"format": INDEX_FORMAT, **vars(self)}, protocol=pickle.HIGHEST_PROTOCOL
+        )
+
+    @classmethod
+    def from_bytes(cls, content: bytes) -> "CVIndex":
+        """
+        Args:
+            content (bytes): index, as made by CVIndex.to_bytes
+
+        Returns:
+            CVIndex: loaded index
+        """
+        index_dict = pickle.loads(content)
+        index_format = index_dict.pop("format", None)
+        if index_format != INDEX_FORMAT:
+            msg = f"Index has format {index_format}, expected {INDEX_FORMAT}"
+            raise ValueError(msg)
+        return cls(**index_dict)
+
+    def save(self, path: str) -> None:
+        """
+        Save index to file.
+
+        Args:
+            path (str): file to save index to
+        """
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> "CVIndex":
+        """
+        Load index from file made by CVIndex.save. Only load files from trusted
+        sources, as the index is stored using pickle.
+
+        Args:
+            path (str): file to load index from
+
+        Returns:
+            CVIndex: loaded index
+        """
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+def compile_index(
+    tag: str = "latest", use_local_files: Optional[str] = None, max_workers: int = 8
+) -> CVIndex:
+    """
+    Read the tsv files for all data products, deployment modes and instruments, and
+    compile them into one index.
+
+    Args:
+        tag (str): tagged release version of AMF_CVs, or "latest" to get most
+                   recent version. Default is "latest".
+        use_local_files (str or None): path to local directory where tsv files are
+                                       stored, laid out as for FileInfo. If "None",
+                                       read from online. If not "None", "tag" must
+                                       be specified. Default None.
+        max_workers (int): maximum number of tsv files to download at once.
+                           Default 8.
+
+    Returns:
+        CVIndex: index of all product definitions and instruments
+    """
+    # only used for its tsv URLs, so instrument and product names don't matter
+    urls = FileInfo("", "", tag=tag, use_local_files=use_local_files)
+    tag = urls.ncas_gen_version
+    if use_local_files is not None:
+        vocab_tag = tag
+        products_root = f"{use_local_files}/{tag}/product-definitions/tsv"
+    else:
+        vocab_tag = cache.split_github_url(urls._get_ncas_instrument_tsv_url())[1]
+        products_root = None
+    products = [
+        row["Data Product"]
+        for row in cache.read_tsv_rows(
+            values.get_all_data_products_url(use_local_files=products_root, tag=tag)
+        )
+    ]
+
+    sources = []
+    for obj in products + DEPLOYMENT_MODES:
+        for prop, parse, get_url in [
+            ("attributes", _parse_attrs, urls._attributes_tsv_url),
+            ("dimensions", _parse_dims, urls._dimensions_tsv_url),
+            ("variables", _parse_vars, urls._variables_tsv_url),
+        ]:
+            sources.append((obj, prop, parse, get_url(obj)))
+    instrument_urls = {
+        "ncas": urls._get_ncas_instrument_tsv_url(),
+        "community": urls._get_community_instrument_tsv_url(),
+    }
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        tables = list(executor.map(cache.load_tsv, [url for *_, url in sources]))
+        instrument_indexes = dict(
+            zip(
+                instrument_urls,
+                executor.map(
+                    partial(tsv2dict.get_instrument_index, missing_ok=True),
+                    instrument_urls.values(),
+                ),
+            )
+        )
+
+    definitions = {obj: {} for obj in products + DEPLOYMENT_MODES}
+    for (obj, prop, parse, _), rows in zip(sources, tables):
+        definitions[obj][prop] = parse(rows) if rows is not None else {}
+
+    instruments = {}
+    for table, instrument_index in instrument_indexes.items():
+        instruments[table] = {
+            name: _instrument_data(inst_dict)
+            for name, inst_dict in (instrument_index or {}).items()
+            if name != ""
+        }
+
+    return CVIndex(
+        tag=tag,
+        vocab_tag=vocab_tag,
+        products={product: definitions[product] for product in products},
+        deployment_modes={mode: definitions[mode] for mode in DEPLOYMENT_MODES},
+        instruments=instruments,
+    )
+
+
+def get_index(tag: str = "latest", use_local_files: Optional[str] = None) -> CVIndex:
+    """
+    Get index for a release of AMF_CVs. Indexes for tagged releases, or read from
+    local files, are kept in memory, and indexes for tagged releases read from
+    online are also saved in the cache, so each is only compiled once. Indexes for
+    branches are compiled again each time, as the branch may have changed. A saved
+    index keeps the instrument vocabularies it was compiled with; clear the cache to
+    pick up a newer release of them.
+
+    Args:
+        tag (str): tagged release version of AMF_CVs, or "latest" to get most
+                   recent version. Default is "latest".
+        use_local_files (str or None): path to local directory where tsv files are
+                                       stored, laid out as for FileInfo. If "None",
+                                       read from online. Default None.
+
+    Returns:
+        CVIndex: index of all product definitions and instruments
+    """
+    if tag == "latest" and use_local_files is None:
+        tag = values.get_latest_CVs_version()
+    memoize = use_local_files is not None or cache.is_pinned_tag(tag)
+    if memoize:
+        with _indexes_lock:
+            if (tag, use_local_files) in _indexes:
+                return _indexes[(tag, use_local_files)]
+
+    cv_cache = cache.get_cache()
+    cacheable = (
+        use_local_files is None and cv_cache is not None and cache.is_pinned_tag(tag)
+    )
+    cache_path = f".index/cv-index-{INDEX_FORMAT}.pickle"
+    index = None
+    if cacheable:
+        content = cv_cache.get("ncasuk/AMF_CVs", tag, cache_path)
+        if content is not None:
+            index = CVIndex.from_bytes(content)
+    if index is None:
+        index = compile_index(tag=tag, use_local_files=use_local_files)
+        if cacheable:
+            cv_cache.put("ncasuk/AMF_CVs", tag, cache_path, index.to_bytes())
+
+    if memoize:
+        with _indexes_lock:
+            _indexes[(tag, use_local_files)] = index
+    return index
+
+
+def clear_index_memo() -> None:
+    """
+    Forget all indexes kept in memory.
+    """
+    with _indexes_lock:
+        _indexes.clear()
@@ -2,12 +2,24 @@
 Take tsv files a return a class with all the data needed for creating the netCDF files.
 """
 
-import requests
-import pandas as pd
+import copy
 import re
-from typing import Optional, Union
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional, Union, TYPE_CHECKING
 
-from .util import check_int
+from . import cache
+from . import session
+from . import tsv2dict
+from . import values
+from .tsv_reader import Value
+
+if TYPE_CHECKING:
+    from .cv_index import CVIndex
+
+_templates: dict[tuple[str, str, str, str, Optional[str]], "FileInfo"] = {}
+_templates_lock = threading.Lock()
 
 
 class FileInfo:
@@ -90,6 +102,31 @@ class FileInfo:
     def __str__(self) -> str:
         return f"Class with information for '{self.instrument_name}' instrument and '{self.data_product}' data product"
 
+    def copy(self) -> "FileInfo":
+        """
+        Make a copy of the class, which can be changed without changing the original.
+        Only the dictionaries are copied, so this is much quicker than making and
+        loading a new class.
+
+        Returns:
+            FileInfo: copy of the class
+        """
+        file_info_copy = copy.copy(self)
+        file_info_copy.attributes = {
+            name: dict(attr) for name, attr in self.attributes.items()
+        }
+        file_info_copy.dimensions = {
+            name: dict(dim) for name, dim in self.dimensions.items()
+        }
+        file_info_copy.variables = {
+            name: dict(var) for name, var in self.variables.items()
+        }
+        file_info_copy.instrument_data = {
+            key: list(value) if isinstance(value, list) else value
+            for key, value in self.instrument_data.items()
+        }
+        return file_info_copy
+
     def get_common_info(self) -> None:
         """
         Get all the common variables, dimensions and attributes, and add to class
@@ -119,10 +156,102 @@ class FileInfo:
         Get all the attribute data related to a defined instrument in the
         ncas-data-instrument-vocabs repo, and add to class property.
         """
-        if self.instrument_name.startswith("ncas-"):
-            self._tsv2dict_instruments(self._get_ncas_instrument_tsv_url())
+        self._tsv2dict_instruments(self._instrument_tsv_url())
+
+    def load_all(self, max_workers: int = 8) -> None:
+        """
+        Get all the variables, dimensions and attributes for the data product,
+        deployment mode and instrument, and add to class properties. All tsv files are
+        downloaded at the same time, but are added to the class properties in the same
+        order as calling get_product_info, get_deployment_info, get_instrument_info
+        and get_common_info in turn, so the result is the same.
+
+        Args:
+            max_workers (int): maximum number of tsv files to download at once.
+                               Default 8.
+        """
+        product = self.data_product
+        mode = self.deployment_mode
+        load_instruments = partial(tsv2dict.get_instrument_index, missing_ok=True)
+        sources = [
+            (
+                self._rows2dict_attrs,
+                cache.load_tsv,
+                partial(self._attributes_tsv_url, product),
+            ),
+            (
+                self._rows2dict_dims,
+                cache.load_tsv,
+                partial(self._dimensions_tsv_url, product),
+            ),
+            (
+                self._rows2dict_vars,
+                cache.load_tsv,
+                partial(self._variables_tsv_url, product),
+            ),
+            (
+                self._rows2dict_dims,
+                cache.load_tsv,
+                partial(self._dimensions_tsv_url, mode),
+            ),
+            (
+                self._rows2dict_vars,
+                cache.load_tsv,
+                partial(self._variables_tsv_url, mode),
+            ),
+            (self._add_instrument_data, load_instruments, self._instrument_tsv_url),
+            (
+                self._rows2dict_attrs,
+                cache.load_tsv,
+                partial(self._attributes_tsv_url, mode),
+            ),
+        ]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # get urls in threads too, as the instrument tsv url may need to look up
+            # the latest release of the instrument vocabs
+            futures = [
+                executor.submit(lambda load, get_url: load(get_url()), load, get_url)
+                for _, load, get_url in sources
+            ]
+            for (add_to_class, _, _), future in zip(sources, futures):
+                add_to_class(future.result())
+
+    def load_from_index(self, index: Optional["CVIndex"] = None) -> None:
+        """
+        Get all the variables, dimensions and attributes for the data product,
+        deployment mode and instrument from a compiled index of the AMF_CVs release,
+        and add to class properties. The result is the same as from load_all, but no
+        tsv files are read if the index has already been compiled.
+
+        Args:
+            index (CVIndex or None): index to use. If None, use
+                                     cv_index.get_index for the AMF_CVs release of
+                                     the class. Default None.
+        """
+        if index is None:
+            from .cv_index import get_index
+
+            index = get_index(self.ncas_gen_version, self.use_local_files)
+        # copy definitions, so changes to the class properties don't change index
+        mode = copy.deepcopy(index.deployment_modes[self.deployment_mode])
+        if self.data_product in index.products:
+            product = copy.deepcopy(index.products[self.data_product])
+            self.attributes.update(product["attributes"])
+            self.dimensions.update(product["dimensions"])
+            self.variables.update(product["variables"])
         else:
-            self._tsv2dict_instruments(self._get_community_instrument_tsv_url())
+            # product not in list of data products when index was compiled
+            self.get_product_info()
+        self.dimensions.update(mode["dimensions"])
+        self.variables.update(mode["variables"])
+        instrument_data = index.instrument_info(self.instrument_name)
+        if instrument_data is None:
+            print(
+                f"[WARNING] No details found for instrument {self.instrument_name}..."
+            )
+        else:
+            self.instrument_data.update(copy.deepcopy(instrument_data))
+        self.attributes.update(mode["attributes"])
 
     def _tsv2dict_vars(self, tsv_file: str) -> None:
         """
@@ -132,37 +261,19 @@ class FileInfo:
         Args:
             tsv_file (str): URL to location of tsv file
         """
-        if self._check_website_exists(tsv_file):
-            df_vars = pd.read_csv(tsv_file, sep="\t")
-            df_vars = df_vars.fillna("")
-
-            current_var_dict = {}
-            first_loop = True
-            current_var = ""
-
-            for current_line in df_vars.iloc:
-                if current_line["Variable"] != "":
-                    if not first_loop:
-                        self.variables[current_var] = current_var_dict
-                    else:
-                        first_loop = False
-                    current_var = current_line["Variable"]
-                    current_var_dict = {}
-                if current_line["Attribute"] != "":
-                    if (
-                        current_line["Value"] == ""
-                        and "example value" in current_line.keys()
-                        and current_line["example value"] != ""
-                    ):
-                        current_var_dict[current_line["Attribute"]] = (
-                            f"EXAMPLE: {current_line['example value']}"
-                        )
-                    else:
-                        current_var_dict[current_line["Attribute"]] = current_line[
-                            "Value"
-                        ]
-
-            self.variables[current_var] = current_var_dict
+        self._rows2dict_vars(cache.load_tsv(tsv_file))
+
+    def _rows2dict_vars(self, rows_vars: Optional[list[dict[str, Value]]]) -> None:
+        """
+        From the contents of a tsv file, if it exists, add dictionary of variables and
+        their attributes to variables property.
+
+        Args:
+            rows_vars (list or None): rows of tsv file, or None if file does
+                                      not exist
+        """
+        if rows_vars is not None:
+            self.variables.update(_parse_vars(rows_vars))
 
     def _tsv2dict_dims(self, tsv_file: str) -> None:
         """
@@ -172,16 +283,19 @@ class FileInfo:
         Args:
             tsv_file (str): URL to location of tsv file
         """
-        if self._check_website_exists(tsv_file):
-            df_dims = pd.read_csv(tsv_file, sep="\t")
-            df_dims = df_dims.fillna("")
+        self._rows2dict_dims(cache.load_tsv(tsv_file))
+
+    def _rows2dict_dims(self, rows_dims: Optional[list[dict[str, Value]]]) -> None:
+        """
+        From the contents of a tsv file, if it exists, add dictionary of dimensions and
+        additional info to dimensions property.
 
-            for dim in df_dims.iloc:
-                dim_dict = dim.to_dict()
-                dim_name = dim_dict.pop("Name")
-                if check_int(dim_dict["Length"]):
-                    dim_dict["Length"] = int(dim_dict["Length"])
-                self.dimensions[dim_name] = dim_dict
+        Args:
+            rows_dims (list or None): rows of tsv file, or None if file does
+                                      not exist
+        """
+        if rows_dims is not None:
+            self.dimensions.update(_parse_dims(rows_dims))
 
     def _tsv2dict_attrs(self, tsv_file: str) -> None:
         """
@@ -191,14 +305,19 @@ class FileInfo:
         Args:
             tsv_file (str): URL to location of tsv file
         """
-        if self._check_website_exists(tsv_file):
-            df_attrs = pd.read_csv(tsv_file, sep="\t")
-            df_attrs = df_attrs.fillna("")
+        self._rows2dict_attrs(cache.load_tsv(tsv_file))
 
-            for attr in df_attrs.iloc:
-                attr_dict = attr.to_dict()
-                attr_name = attr_dict.pop("Name")
-                self.attributes[attr_name] = attr_dict
+    def _rows2dict_attrs(self, rows_attrs: Optional[list[dict[str, Value]]]) -> None:
+        """
+        From the contents of a tsv file, if it exists, add dictionary of attributes and
+        values to attribute property.
+
+        Args:
+            rows_attrs (list or None): rows of tsv file, or None if file does
+                                       not exist
+        """
+        if rows_attrs is not None:
+            self.attributes.update(_parse_attrs(rows_attrs))
 
     def _tsv2dict_instruments(self, tsv_file: str) -> None:
         """
@@ -208,32 +327,32 @@ class FileInfo:
         Args:
             tsv_file (str): URL to location of tsv file
         """
-        if self._check_website_exists(tsv_file):
-            df_instruments = pd.read_csv(tsv_file, sep="\t")
-            df_instrument = df_instruments.where(
-                df_instruments["New Instrument Name"] == self.instrument_name
-            ).dropna(subset=["New Instrument Name"])
-            if len(df_instrument) == 0:
+        self._add_instrument_data(
+            tsv2dict.get_instrument_index(tsv_file, missing_ok=True)
+        )
+
+    def _add_instrument_data(
+        self,
+        instruments: Optional[dict[str, dict[str, Union[str, list[str]]]]],
+    ) -> None:
+        """
+        From the instruments in a tsv file, if it exists, add dictionary of instrument
+        data to instrument_data property.
+
+        Args:
+            instruments (dict or None): instruments in tsv file, from
+                                        tsv2dict.get_instrument_index, or None if
+                                        file does not exist
+        """
+        if instruments is not None:
+            if self.instrument_name not in instruments:
                 print(
                     f"[WARNING] No details found for instrument {self.instrument_name}..."
                 )
             else:
-                for inst in df_instrument.iloc:
-                    instrument_dict = inst.to_dict()
-                    data_products = re.split(
-                        r",| |\|", instrument_dict["Data Product(s)"]
-                    )
-                    data_products = list(filter(None, data_products))
-                    instrument_dict["Data Product(s)"] = data_products
-                    for i in [
-                        "Manufacturer",
-                        "Model No.",
-                        "Serial Number",
-                        "Data Product(s)",
-                        "Mobile/Fixed (loc)",
-                        "Descriptor",
-                    ]:
-                        self.instrument_data[i] = instrument_dict[i]
+                self.instrument_data.update(
+                    _instrument_data(instruments[self.instrument_name])
+                )
 
     def _check_instrument_has_product(self) -> bool:
         """
@@ -256,7 +375,7 @@ class FileInfo:
         Returns:
             str: tag name of latest version release
         """
-        return requests.get(f"{url}/releases/latest").url.split("/")[-1]
+        return values.get_latest_version(url.removeprefix("https://github.com/"))
 
     def _check_website_exists(self, url: str) -> bool:
         """
@@ -268,7 +387,9 @@ class FileInfo:
         Returns:
             bool: website is reachable
         """
-        status = requests.get(url).status_code
+        if cache.is_cached(url):
+            return True
+        status = session.get(url).status_code
         return status == 200
 
     def _check_github_cvs_version_exists(
@@ -279,8 +400,7 @@ class FileInfo:
         """
         if release_tag is None:
             release_tag = self.ncas_gen_version
-        url = f"https://github.com/ncasuk/AMF_CVs/releases/{release_tag}"
-        return self._check_website_exists(url)
+        return values.check_version_exists("ncasuk/AMF_CVs", release_tag)
 
     def _dimensions_tsv_url(self, obj: str) -> str:
         """
@@ -348,6 +468,15 @@ class FileInfo:
         )
         return f"{file_loc}/{path}/global-attributes{option}.tsv"
 
+    def _instrument_tsv_url(self) -> str:
+        """
+        Get the URL for the tsv file of either NCAS or community instruments,
+        depending on the instrument name
+        """
+        if self.instrument_name.startswith("ncas-"):
+            return self._get_ncas_instrument_tsv_url()
+        return self._get_community_instrument_tsv_url()
+
     def _get_ncas_instrument_tsv_url(self) -> str:
         """
         Get the URL for the tsv file of NCAS instruments
@@ -381,6 +510,160 @@ class FileInfo:
         return f"{main_loc}/product-definitions/tsv/_instrument_vocabs/community-instrument-name-and-descriptors.tsv"
 
 
+def get_file_info(
+    instrument_name: str,
+    data_product: str,
+    deployment_mode: str = "land",
+    tag: str = "latest",
+    use_local_files: Optional[str] = None,
+) -> FileInfo:
+    """
+    Get FileInfo class with all the variables, dimensions and attributes for the data
+    product, deployment mode and instrument loaded. For tagged releases and local
+    files, the first FileInfo made for each combination of instrument, data product,
+    deployment mode and release is kept, and a copy of it is returned each time, so
+    making many files only needs the tsv files to be read once. The copy can be
+    changed without affecting later calls.
+
+    Args:
+        instrument_name (str): name of the instrument
+        data_product (str): name of data product to use
+        deployment_mode (str): value of the 'deployment_mode' global attribute. One of
+                               "land", "sea", "air", or "trajectory". Default is
+                               "land".
+        tag (str): tagged release version of AMF_CVs, or "latest" to get most
+                   recent version. Default is "latest".
+        use_local_files (str or None): path to local directory where tsv files are
+                                       stored. If "None", read from online. If not
+                                       "None", "tag" must be specified. Default
+                                       None.
+
+    Returns:
+        FileInfo: loaded class, which can be changed
+    """
+    file_info = FileInfo(
+        instrument_name,
+        data_product,
+        deployment_mode=deployment_mode,
+        tag=tag,
+        use_local_files=use_local_files,
+    )
+    key = (
+        instrument_name,
+        data_product,
+        deployment_mode,
+        file_info.ncas_gen_version,
+        use_local_files,
+    )
+    with _templates_lock:
+        template = _templates.get(key)
+    if template is None:
+        file_info.load_all()
+        # branches such as "main" can change, so are always read again
+        if use_local_files is not None or cache.is_pinned_tag(
+            file_info.ncas_gen_version
+        ):
+            with _templates_lock:
+                template = _templates.setdefault(key, file_info)
+        else:
+            return file_info
+    return template.copy()
+
+
+def clear_file_info_templates() -> None:
+    """
+    Forget all FileInfo classes kept by get_file_info.
+    """
+    with _templates_lock:
+        _templates.clear()
+
+
+def _parse_vars(rows_vars: list[dict[str, Value]]) -> dict[str, dict[str, str]]:
+    """
+    Get dictionary of variables and their attributes from the rows of a variables
+    tsv file.
+
+    Args:
+        rows_vars (list): rows of tsv file
+
+    Returns:
+        dict: variables and their attributes
+    """
+    return tsv2dict._rows2dict_vars(rows_vars)
+
+
+def _parse_dims(
+    rows_dims: list[dict[str, Value]],
+) -> dict[str, dict[str, Union[str, int]]]:
+    """
+    Get dictionary of dimensions and additional info from the rows of a dimensions
+    tsv file.
+
+    Args:
+        rows_dims (list): rows of tsv file
+
+    Returns:
+        dict: dimensions and additional info
+    """
+    # util imports numpy, so only import it when needed
+    from .util import check_int
+
+    dimensions = tsv2dict._rows2dict_dims(rows_dims)
+    for dim_dict in dimensions.values():
+        if check_int(dim_dict["Length"]):
+            dim_dict["Length"] = int(dim_dict["Length"])
+    return dimensions
+
+
+def _parse_attrs(rows_attrs: list[dict[str, Value]]) -> dict[str, dict[str, str]]:
+    """
+    Get dictionary of attributes and values from the rows of a global attributes
+    tsv file.
+
+    Args:
+        rows_attrs (list): rows of tsv file
+
+    Returns:
+        dict: attributes and values
+    """
+    return tsv2dict._rows2dict_attrs(rows_attrs)
+
+
+def _instrument_data(
+    inst_dict: dict[str, Union[str, list[str]]],
+) -> dict[str, Union[str, float, list[str]]]:
+    """
+    Get instrument data for the instrument_data property from the information about
+    an instrument in tsv2dict.get_instrument_index.
+
+    Args:
+        inst_dict (dict): information about the instrument
+
+    Returns:
+        dict: instrument data
+    """
+    instrument_data = {}
+    for i in [
+        "Manufacturer",
+        "Model No.",
+        "Serial Number",
+        "Data Product(s)",
+        "Mobile/Fixed (loc)",
+        "Descriptor",
+    ]:
+        value = inst_dict[i]
+        # keep values as they were when the table was filtered with pandas,
+        # which left missing values as NaN and made whole numbers floats
+        if i == "Data Product(s)":
+            value = list(value)
+        elif value == "":
+            value = float("nan")
+        elif isinstance(value, int) and not isinstance(value, bool):
+            value = float(value)
+        instrument_data[i] = value
+    return instrument_data
+
+
 def convert_instrument_dict_to_file_info(
     instrument_dict: dict[
         str, dict[str, Union[str, list[str], dict[str, dict[str, Union[str, float]]]]]
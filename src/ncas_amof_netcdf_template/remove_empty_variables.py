@@ -4,67 +4,165 @@ As a variable cannot be removed from a netCDF file, a new file
 has to be created, with the option of removing the old one.
 """
 
+import copy
+import glob
+import itertools
+import json
+import math
 import os
-from netCDF4 import Dataset
-import requests
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from netCDF4 import Dataset, Variable, default_fillvals
 import numpy as np
-from typing import Union, Optional
+from typing import Any, Union, Optional
+from collections.abc import Iterator
+from . import cache
 from . import values
+from .file_info import _parse_vars
+
+AMF_CVS_URL = "https://raw.githubusercontent.com/ncasuk/AMF_CVs"
+
+_product_variables: dict[
+    tuple[str, str, Optional[str]],
+    tuple[list[str], dict[str, dict[str, Union[str, float]]]],
+] = {}
+_product_variables_lock = threading.Lock()
+
+
+def _read_json(path: str) -> Optional[dict[str, Any]]:
+    if not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _local_product_variables(
+    product: str, skip_check: bool, tag: str, use_local_files: str
+) -> dict[str, dict[str, Union[str, float]]]:
+    """
+    Get variables and their metadata for a product from local files, either a copy
+    of the json files in the AMF_CVs folder of AMF_CVs, or, if those aren't there,
+    the product's variables tsv file.
+    """
+    json_loc = f"{use_local_files}/{tag}/AMF_CVs"
+    tsv_loc = f"{use_local_files}/{tag}/product-definitions/tsv"
+    var_json = _read_json(f"{json_loc}/AMF_product_{product}_variable.json")
+    if var_json is not None:
+        if not skip_check:
+            product_json = _read_json(f"{json_loc}/AMF_product.json")
+            if product_json is None or product not in product_json["product"]:
+                msg = f"product {product} is not in {json_loc}/AMF_product.json"
+                raise ValueError(msg)
+        return var_json[f"product_{product}_variable"]
+
+    if not skip_check:
+        products_tsv = values.get_all_data_products_url(use_local_files=tsv_loc)
+        product_rows = cache.load_tsv(products_tsv) or []
+        if product not in [row["Data Product"] for row in product_rows]:
+            msg = f"product {product} is not in {products_tsv}"
+            raise ValueError(msg)
+    var_rows = cache.load_tsv(f"{tsv_loc}/{product}/variables-specific.tsv")
+    if var_rows is None:
+        msg = f"No variables found for product {product} in {json_loc} or {tsv_loc}"
+        raise ValueError(msg)
+    return _parse_vars(var_rows)
 
 
 def get_product_variables_metadata(
-    product: str, skip_check: bool = False, tag: str = "latest"
+    product: str,
+    skip_check: bool = False,
+    tag: str = "latest",
+    use_local_files: Optional[str] = None,
 ) -> tuple[list[str], dict[str, dict[str, Union[str, float]]]]:
     """
     Get variables and their metadata associated with a product.
     `product` should be in
     https://github.com/ncasuk/AMF_CVs/blob/main/AMF_CVs/AMF_product.json
 
+    Files from tagged releases are kept in the cache, and the variables for each
+    product and tagged release (or local files) are kept in memory, so they are
+    only read once in each process.
+
     Args:
         product (str): Product describing the data from the
                        instrument for the netCDF file.
         skip_check (bool): Skips checking if product in the
                            product json file. Default False.
         tag (str): Tagged release version of AMF_CVs to check
+        use_local_files (str or None): path to local directory where files from
+                                       AMF_CVs are stored, laid out as for
+                                       FileInfo. The json files are read from
+                                       the AMF_CVs folder of each release if
+                                       there, otherwise the product's variables
+                                       tsv file is read. If "None", read from
+                                       online. If not "None", "tag" must be
+                                       specified. Default None.
 
     Returns:
         list: All product-specific variables.
         dict: Dictionary of variables and their attributes.
 
     """
+    if use_local_files is not None and tag == "latest":
+        msg = "Incompatible options - if 'use_local_files' is given, 'tag' version must be specified."
+        raise ValueError(msg)
     if tag == "latest":
         tag = values.get_latest_CVs_version()
 
-    if not skip_check:
-        product_list = get_json_from_github(
-            f"https://raw.githubusercontent.com/ncasuk/AMF_CVs/{tag}/AMF_CVs/AMF_product.json"
-        )["product"]
-
-        # Check for valid product
-        if product not in product_list:
-            msg = (
-                f"product {product} is not in "
-                f"https://github.com/ncasuk/AMF_CVs/blob/{tag}/AMF_CVs/AMF_product.json"
-            )
-            raise ValueError(msg)
+    key = (product, tag, use_local_files)
+    with _product_variables_lock:
+        memo = _product_variables.get(key)
+    if memo is not None:
+        variables, var_dict = memo
+        return list(variables), copy.deepcopy(var_dict)
+
+    if use_local_files is not None:
+        var_dict = _local_product_variables(product, skip_check, tag, use_local_files)
+    else:
+        if not skip_check:
+            product_list = get_json_from_github(
+                f"{AMF_CVS_URL}/{tag}/AMF_CVs/AMF_product.json"
+            )["product"]
+
+            # Check for valid product
+            if product not in product_list:
+                msg = (
+                    f"product {product} is not in "
+                    f"https://github.com/ncasuk/AMF_CVs/blob/{tag}/AMF_CVs/AMF_product.json"
+                )
+                raise ValueError(msg)
 
-    # Get the stuff
-    var_dict = get_json_from_github(
-        f"https://raw.githubusercontent.com/ncasuk/AMF_CVs/{tag}/AMF_CVs/AMF_product_{product}_variable.json"
-    )[f"product_{product}_variable"]
+        # Get the stuff
+        var_dict = get_json_from_github(
+            f"{AMF_CVS_URL}/{tag}/AMF_CVs/AMF_product_{product}_variable.json"
+        )[f"product_{product}_variable"]
     variables = list(var_dict.keys())
 
-    return variables, var_dict
+    # branches such as "main" can change, so are always read again
+    if use_local_files is not None or cache.is_pinned_tag(tag):
+        with _product_variables_lock:
+            _product_variables[key] = (variables, var_dict)
+        var_dict = copy.deepcopy(var_dict)
+    return list(variables), var_dict
+
+
+def clear_product_variables_memo() -> None:
+    """
+    Forget the variables for all products kept in memory.
+    """
+    with _product_variables_lock:
+        _product_variables.clear()
 
 
 def get_json_from_github(
     url: str,
 ) -> dict[str, dict[str, dict[str, Union[str, float]]]]:
     """
-    Returns desired json file from https://github.com/ncasuk/AMF_CVs/tree/main/AMF_CVs
+    Returns desired json file from https://github.com/ncasuk/AMF_CVs/tree/main/AMF_CVs,
+    using the cache for files from tagged releases.
     URL should be in form
     https://raw.githubusercontent.com/ncasuk/AMF_CVs/main/AMF_CVs/___.json,
-    otherwise a JSONDecodeError will be returned by the r.json() call
+    otherwise a JSONDecodeError will be raised
 
     Args:
         url (str): URL of json file
@@ -73,54 +171,135 @@ def get_json_from_github(
         dict: JSON data from URL
 
     """
-    r = requests.get(url)
-    return r.json()
+    return json.loads(cache.fetch(url))
 
 
-def main(
-    infile: str,
-    outfile: Optional[str] = None,
-    overwrite: bool = True,
-    verbose: int = 0,
-    tag: str = "latest",
-    skip_check: bool = False,
-) -> None:
-    """
-    If a product-specific variable is empty, we want to remove it.
-    However, removing a variable from a netcdf file is not possible,
-    so we have to create a new one, and just not copy over the
-    empty variable.
+def _product_from_filename(infile: str) -> str:
+    return os.path.basename(infile).split("_")[3]
+
+
+# most data read at once when checking if a variable is empty
+_EMPTY_CHECK_BYTES = 1024 * 1024
+# default most data held in memory at once when copying a variable
+DEFAULT_MAX_MEMORY = 64 * 1024 * 1024
 
-    Args:
-        infile (str): File path and name of current netCDF file.
-        outfile (str): Name of temporary netCDF file to create (or not so temporary,
-                       see overwrite). If None, then an file with `tmp` appended to
-                       start of infile filename will be created. Default None.
-        overwrite (any): Optional. If truthy, outfile overwrites infile. If falsy,
-                         both outfile and infile remain. Default True.
-        verbose (any): Optional. If truthy, prints variables that are
-                       being removed from infile. Default 0.
-        tag (str): Optional. Tag release version of AMF_CVs being used. Passed to
-                   get_product_variables_metadata function. Default "latest".
-        skip_check (bool): Optional. Skip checking for product in AMF_CVs product json
-                           file. Passed to get_product_variables_metadata function.
-                           Default False.
 
+def _slabs(variable: Variable, max_bytes: int) -> Iterator[tuple[slice, ...]]:
     """
+    Split variable into slabs of at most max_bytes, made of whole chunks where the
+    variable is chunked (so at least one chunk, however big). Slabs are as long as
+    possible in the last dimensions, so each is as contiguous as possible.
+    """
+    shape = variable.shape
+    if variable.ndim == 0 or variable.size == 0:
+        yield ()
+        return
+    # size of variable-length types, such as strings, isn't known until read
+    itemsize = variable.dtype.itemsize if isinstance(variable.dtype, np.dtype) else 8
+    chunking = variable.chunking()
+    unit = [1] * variable.ndim if chunking == "contiguous" else chunking
+    block = [min(u, n) for u, n in zip(unit, shape)]
+    for axis in reversed(range(variable.ndim)):
+        other_bytes = math.prod(block[:axis] + block[axis + 1 :]) * itemsize
+        length = max_bytes // other_bytes
+        length -= length % unit[axis]
+        block[axis] = min(shape[axis], max(block[axis], length))
+        if block[axis] < shape[axis]:
+            break
+    starts = [range(0, n, b) for n, b in zip(shape, block)]
+    for start in itertools.product(*starts):
+        yield tuple(slice(i, min(i + b, n)) for i, b, n in zip(start, block, shape))
 
-    in_ncfile = Dataset(infile, "r")
-    product = infile.split("/")[-1].split("_")[3]
 
-    if outfile is None:
-        infile_name = infile.split("/")[-1]
-        infile_dir = "/".join(infile.split("/")[:-1]) or "."
-        outfile = f"{infile_dir}/tmp_{infile_name}"
+def _unallocated_variables(infile: str, names: list[str]) -> set[str]:
+    """
+    Get variables with no data stored in the file, i.e. that have never been
+    written to, from the HDF5 storage size of each. Needs h5py, which isn't a
+    dependency of this package, so no variables are returned if it isn't installed.
+    """
+    try:
+        import h5py
+    except ImportError:
+        return set()
+    unallocated = set()
+    try:
+        with h5py.File(infile, "r") as f:
+            for name in names:
+                dataset = f.get(name)
+                if (
+                    isinstance(dataset, h5py.Dataset)
+                    and dataset.id.get_storage_size() == 0
+                ):
+                    unallocated.add(name)
+    except OSError:
+        # e.g. netCDF3 file
+        return set()
+    return unallocated
 
-    toexclude = []
-    product_vars, _ = get_product_variables_metadata(
-        product, tag=tag, skip_check=skip_check
+
+def _has_data(variable: Variable) -> bool:
+    """
+    Check whether variable has any values that would not be masked when read,
+    reading a slab of whole chunks at a time and stopping at the first value
+    found. Values are read without masking, then compared with the fill value,
+    missing_value and valid range, in the same way as netCDF4 masks values.
+    """
+    if variable.dtype == str or variable.dtype.kind not in "biuf":
+        # strings are never masked
+        return variable.size > 0
+    attrs = variable.ncattrs()
+    if "_FillValue" in attrs:
+        fill_value = variable._FillValue
+    else:
+        fill_value = default_fillvals.get(variable.dtype.str[1:])
+    missing_values = (
+        np.ravel(variable.missing_value) if "missing_value" in attrs else None
+    )
+    valid_min = valid_max = None
+    if "valid_range" in attrs:
+        valid_min, valid_max = variable.valid_range[:2]
+    else:
+        if "valid_min" in attrs:
+            valid_min = variable.valid_min
+        if "valid_max" in attrs:
+            valid_max = variable.valid_max
+    # ignore ranges that aren't numbers, like "<derived from file>"
+    valid_min, valid_max = (
+        limit if isinstance(limit, (int, float, np.number)) else None
+        for limit in (valid_min, valid_max)
     )
 
+    variable.set_auto_maskandscale(False)
+    try:
+        for slab in _slabs(variable, _EMPTY_CHECK_BYTES):
+            block = np.asarray(variable[slab])
+            if fill_value is None:
+                valid = np.ones(block.shape, dtype=bool)
+            elif np.isnan(fill_value):
+                valid = ~np.isnan(block)
+            else:
+                valid = block != fill_value
+            if missing_values is not None:
+                valid &= ~np.isin(block, missing_values)
+            if valid_min is not None:
+                valid &= block >= valid_min
+            if valid_max is not None:
+                valid &= block <= valid_max
+            if valid.any():
+                return True
+    finally:
+        variable.set_auto_maskandscale(True)
+    return False
+
+
+def _find_empty_variables(in_ncfile: Dataset, product_vars: list[str]) -> list[str]:
+    """
+    Get product-specific variables in file which have no data. Variables that
+    have never been written to are found without reading any data if h5py is
+    installed, and others are read a slab at a time until a value is found.
+    """
+    toexclude = []
+    to_check = []
     for var in in_ncfile.variables.keys():
         if var in product_vars:
             if (
@@ -128,18 +307,50 @@ def main(
                 and in_ncfile[var].valid_min == "<derived from file>"
             ):
                 toexclude.append(var)
-            elif np.all(in_ncfile[var][:].mask):
-                toexclude.append(var)
+            else:
+                to_check.append(var)
+    unallocated = _unallocated_variables(in_ncfile.filepath(), to_check)
+    toexclude.extend(
+        var for var in to_check if var in unallocated or not _has_data(in_ncfile[var])
+    )
+    # keep variables in the order they are in the file
+    return [var for var in in_ncfile.variables.keys() if var in toexclude]
+
+
+def _compression_kwargs(variable: Variable) -> dict[str, Any]:
+    """
+    Get createVariable arguments to compress a new variable in the same way as
+    variable.
+    """
+    filters = variable.filters() or {}
+    kwargs = {
+        "shuffle": filters.get("shuffle", False),
+        "fletcher32": filters.get("fletcher32", False),
+    }
+    for compression in ["zlib", "zstd", "bzip2"]:
+        if filters.get(compression):
+            kwargs["compression"] = compression
+            kwargs["complevel"] = filters.get("complevel", 4)
+    return kwargs
 
-    if verbose:
-        print(f"empty variables being removed: {toexclude}")
 
+def _copy_without(
+    in_ncfile: Dataset,
+    outfile: str,
+    toexclude: list[str],
+    max_memory: int = DEFAULT_MAX_MEMORY,
+) -> None:
+    """
+    Copy everything in in_ncfile to a new file, except variables in toexclude.
+    Variables keep their chunking and compression, and are copied a slab of whole
+    chunks at a time, of at most max_memory bytes.
+    """
     dst = Dataset(outfile, "w", format="NETCDF4_CLASSIC")
     # copy global attributes all at once via dictionary
     dst.setncatts(in_ncfile.__dict__)
     # copy dimensions
     for name, dimension in in_ncfile.dimensions.items():
-        dst.createDimension(name, (len(dimension)))
+        dst.createDimension(name, None if dimension.isunlimited() else len(dimension))
     # copy all file data except for the excluded
     for name, variable in in_ncfile.variables.items():
         if name not in toexclude:
@@ -159,13 +370,407 @@ def main(
                 variable.dimensions,
                 fill_value=fill_value,
                 chunksizes=chunksizes,
+                endian=variable.endian(),
+                **_compression_kwargs(variable),
             )
             # copy variable attributes all at once via dictionary
             dst[name].setncatts(in_ncfile_name_attrs)
-            dst[name][:] = in_ncfile[name][:]
-
+            if variable.size == 0:
+                continue
+            # copy values as stored, without masking or scaling them
+            variable.set_auto_maskandscale(False)
+            dst[name].set_auto_maskandscale(False)
+            try:
+                for slab in _slabs(variable, max_memory):
+                    dst[name][slab] = variable[slab]
+            finally:
+                variable.set_auto_maskandscale(True)
     dst.close()
-    in_ncfile.close()
+
+
+def _remove_from_file(
+    infile: str,
+    product_vars: list[str],
+    outfile: Optional[str] = None,
+    overwrite: bool = True,
+    verbose: int = 0,
+    max_memory: int = DEFAULT_MAX_MEMORY,
+) -> list[str]:
+    """
+    Remove empty product-specific variables from a file, given the names of the
+    product-specific variables.
+
+    Returns:
+        list: names of variables removed
+    """
+    in_ncfile = Dataset(infile, "r")
+
+    if outfile is None:
+        infile_name = infile.split("/")[-1]
+        infile_dir = "/".join(infile.split("/")[:-1]) or "."
+        outfile = f"{infile_dir}/tmp_{infile_name}"
+
+    try:
+        toexclude = _find_empty_variables(in_ncfile, product_vars)
+        if verbose:
+            print(f"empty variables being removed: {toexclude}")
+        _copy_without(in_ncfile, outfile, toexclude, max_memory=max_memory)
+    finally:
+        in_ncfile.close()
 
     if overwrite:
         os.rename(outfile, infile)
+    return toexclude
+
+
+def main(
+    infile: str,
+    outfile: Optional[str] = None,
+    overwrite: bool = True,
+    verbose: int = 0,
+    tag: str = "latest",
+    skip_check: bool = False,
+    max_memory: int = DEFAULT_MAX_MEMORY,
+    use_local_files: Optional[str] = None,
+) -> list[str]:
+    """
+    If a product-specific variable is empty, we want to remove it.
+    However, removing a variable from a netcdf file is not possible,
+    so we have to create a new one, and just not copy over the
+    empty variable.
+
+    Args:
+        infile (str): File path and name of current netCDF file.
+        outfile (str): Name of temporary netCDF file to create (or not so temporary,
+                       see overwrite). If None, then an file with `tmp` appended to
+                       start of infile filename will be created. Default None.
+        overwrite (any): Optional. If truthy, outfile overwrites infile. If falsy,
+                         both outfile and infile remain. Default True.
+        verbose (any): Optional. If truthy, prints variables that are
+                       being removed from infile. Default 0.
+        tag (str): Optional. Tag release version of AMF_CVs being used. Passed to
+                   get_product_variables_metadata function. Default "latest".
+        skip_check (bool): Optional. Skip checking for product in AMF_CVs product json
+                           file. Passed to get_product_variables_metadata function.
+                           Default False.
+        max_memory (int): Optional. Most data, in bytes, to hold in memory at once
+                          when copying each variable, although at least one chunk
+                          is always read at a time. Default 64 MiB.
+        use_local_files (str or None): Optional. Path to local directory where files
+                                       from AMF_CVs are stored. Passed to
+                                       get_product_variables_metadata function.
+                                       Default None.
+
+    Returns:
+        list: names of variables removed
+    """
+    product_vars, _ = get_product_variables_metadata(
+        _product_from_filename(infile),
+        tag=tag,
+        skip_check=skip_check,
+        use_local_files=use_local_files,
+    )
+    return _remove_from_file(
+        infile,
+        product_vars,
+        outfile=outfile,
+        overwrite=overwrite,
+        verbose=verbose,
+        max_memory=max_memory,
+    )
+
+
+class RemovalReport:
+    """
+    Outcome of removing empty variables from many files.
+
+    Args:
+        removed (dict): names of variables removed from each file, keyed by file path
+        errors (dict): error raised for each file that could not be processed, keyed
+                       by file path
+    """
+
+    def __init__(
+        self,
+        removed: Optional[dict[str, list[str]]] = None,
+        errors: Optional[dict[str, Exception]] = None,
+    ) -> None:
+        self.removed = removed if removed is not None else {}
+        self.errors = errors if errors is not None else {}
+
+    def __repr__(self) -> str:
+        class_name = type(self).__name__
+        return (
+            f"{class_name}() - {len(self.removed)} files processed,"
+            f" {len(self.errors)} errors"
+        )
+
+    @property
+    def ok(self) -> bool:
+        """
+        bool: all files were processed
+        """
+        return not self.errors
+
+    def summary(self) -> str:
+        """
+        Returns:
+            str: one line for each file, listing the variables removed or the error
+                 raised, followed by totals
+        """
+        lines = [
+            f"{path}: removed {', '.join(names) if names else 'nothing'}"
+            for path, names in sorted(self.removed.items())
+        ]
+        lines.extend(
+            f"{path}: ERROR {error}" for path, error in sorted(self.errors.items())
+        )
+        n_removed = sum(len(names) for names in self.removed.values())
+        lines.append(
+            f"{n_removed} variables removed from {len(self.removed)} files,"
+            f" {len(self.errors)} errors"
+        )
+        return "\n".join(lines)
+
+
+def _expand_paths(paths: Union[str, list[str]]) -> list[str]:
+    """
+    Get netCDF files from file paths, directories and glob patterns.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.nc"))))
+        elif glob.has_magic(path):
+            files.extend(sorted(glob.glob(path, recursive=True)))
+        else:
+            files.append(path)
+    # remove duplicates, keeping order
+    return list(dict.fromkeys(files))
+
+
+def _remove_from_files(
+    infiles: list[str], product_vars: list[str], overwrite: bool, max_memory: int
+) -> list[tuple[str, Optional[list[str]], Optional[Exception]]]:
+    """
+    Remove empty variables from files of the same product.
+
+    Returns:
+        list: file, variables removed and error raised, for each file
+    """
+    results = []
+    for infile in infiles:
+        try:
+            removed = _remove_from_file(
+                infile, product_vars, overwrite=overwrite, max_memory=max_memory
+            )
+            results.append((infile, removed, None))
+        except Exception as e:
+            results.append((infile, None, e))
+    return results
+
+
+def remove_from_files(
+    paths: Union[str, list[str]],
+    overwrite: bool = True,
+    verbose: int = 0,
+    tag: str = "latest",
+    skip_check: bool = False,
+    max_workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    max_memory: int = DEFAULT_MAX_MEMORY,
+    use_local_files: Optional[str] = None,
+) -> RemovalReport:
+    """
+    Remove empty product-specific variables from many files at once. Files are
+    grouped by data product, taken from their file names, so the variables for
+    each product are only fetched once, and files are processed in parallel by a
+    pool of processes. Files that can't be processed don't stop the rest.
+
+    Args:
+        paths (str or list): netCDF files, directories containing netCDF files, or
+                             glob patterns such as 'data/**/*.nc'.
+        overwrite (bool): If True, the new file for each file replaces it. If
+                          False, both remain, with the new file named as for main.
+                          Default True.
+        verbose (int): If truthy, print the variables removed from each file as
+                       it is done. Default 0.
+        tag (str): Tag release version of AMF_CVs being used. Default "latest".
+        skip_check (bool): Skip checking for products in AMF_CVs product json file.
+                           Default False.
+        max_workers (int or None): number of processes to use. If None, the number
+                                   of CPUs is used. If 1, files are processed in
+                                   this process. Default None.
+        chunksize (int or None): number of files given to a process at once. If
+                                 None, chosen from the number of files and
+                                 max_workers. Default None.
+        max_memory (int): most data, in bytes, each process holds in memory at
+                          once when copying a variable, although at least one
+                          chunk is always read at a time. Default 64 MiB.
+        use_local_files (str or None): path to local directory where files from
+                                       AMF_CVs are stored, as for
+                                       get_product_variables_metadata. If not
+                                       "None", "tag" must be specified. Default
+                                       None.
+
+    Returns:
+        RemovalReport: variables removed from each file, and errors for those
+                       that couldn't be processed
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    if use_local_files is not None and tag == "latest":
+        msg = "Incompatible options - if 'use_local_files' is given, 'tag' version must be specified."
+        raise ValueError(msg)
+    if tag == "latest":
+        tag = values.get_latest_CVs_version()
+    report = RemovalReport()
+
+    by_product: dict[str, list[str]] = {}
+    for infile in _expand_paths(paths):
+        try:
+            product = _product_from_filename(infile)
+        except IndexError:
+            msg = f"Can't get data product from file name {infile}"
+            report.errors[infile] = ValueError(msg)
+            continue
+        by_product.setdefault(product, []).append(infile)
+
+    # fetch the variables for each product once, here, so worker processes don't
+    # need to make any requests
+    jobs = []
+    for product, infiles in by_product.items():
+        try:
+            product_vars, _ = get_product_variables_metadata(
+                product,
+                tag=tag,
+                skip_check=skip_check,
+                use_local_files=use_local_files,
+            )
+        except Exception as e:
+            for infile in infiles:
+                report.errors[infile] = e
+            continue
+        jobs.append((product_vars, infiles))
+
+    if chunksize is None:
+        n_files = sum(len(infiles) for _, infiles in jobs)
+        chunksize = max(1, -(-n_files // (max_workers * 4)))
+    jobs = [
+        (product_vars, infiles[i : i + chunksize])
+        for product_vars, infiles in jobs
+        for i in range(0, len(infiles), chunksize)
+    ]
+
+    def add_results(results):
+        for infile, removed, error in results:
+            if error is None:
+                report.removed[infile] = removed
+            else:
+                report.errors[infile] = error
+            if verbose:
+                print(f"[INFO]: {infile}: {removed if error is None else error}")
+
+    if max_workers == 1:
+        for product_vars, infiles in jobs:
+            add_results(
+                _remove_from_files(infiles, product_vars, overwrite, max_memory)
+            )
+        return report
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                _remove_from_files, infiles, product_vars, overwrite, max_memory
+            ): infiles
+            for product_vars, infiles in jobs
+        }
+        for future in as_completed(futures):
+            try:
+                results = future.result()
+            except Exception as e:
+                # e.g. worker process killed
+                results = [(infile, None, e) for infile in futures[future]]
+            add_results(results)
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(
+        description="Remove empty product-specific variables from netCDF files."
+    )
+    parser.add_argument(
+        "paths",
+        type=str,
+        nargs="+",
+        help="netCDF files, directories of netCDF files, or glob patterns.",
+    )
+    parser.add_argument(
+        "-t",
+        "--tag",
+        type=str,
+        default="latest",
+        help="Tagged release of AMF_CVs to use. Default is 'latest'.",
+        dest="tag",
+    )
+    parser.add_argument(
+        "-l",
+        "--use-local-files",
+        type=str,
+        default=None,
+        help=(
+            "Path to local copy of AMF_CVs files, to use instead of GitHub."
+            " Needs -t/--tag."
+        ),
+        dest="use_local_files",
+    )
+    parser.add_argument(
+        "-j",
+        "--max-workers",
+        type=int,
+        default=None,
+        help="Number of processes to use. Default is number of CPUs.",
+        dest="max_workers",
+    )
+    parser.add_argument(
+        "-M",
+        "--max-memory",
+        type=int,
+        default=DEFAULT_MAX_MEMORY // (1024 * 1024),
+        help=(
+            "Most data to hold in memory at once when copying a variable, in MiB."
+            " Default is 64."
+        ),
+        dest="max_memory",
+    )
+    parser.add_argument(
+        "-k",
+        "--keep",
+        action="store_false",
+        dest="overwrite",
+        help="Keep the original files, writing new files with a 'tmp_' prefix.",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="count",
+        default=0,
+        help="Level of additional info to print.",
+    )
+    args = parser.parse_args()
+
+    removal_report = remove_from_files(
+        args.paths,
+        overwrite=args.overwrite,
+        verbose=args.verbose,
+        tag=args.tag,
+        max_workers=args.max_workers,
+        max_memory=args.max_memory * 1024 * 1024,
+        use_local_files=args.use_local_files,
+    )
+    print(removal_report.summary())
+    sys.exit(0 if removal_report.ok else 1)
@@ -0,0 +1,125 @@
+"""
+HTTP session shared by all modules in this package for requests to GitHub, which
+keeps connections open between requests, limits how many requests are made at
+once, and retries requests that are rate limited or fail with a server error.
+"""
+
+import threading
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import requests
+
+DEFAULT_MAX_CONNECTIONS = 10
+DEFAULT_MAX_CONCURRENT = 8
+DEFAULT_RETRIES = 5
+DEFAULT_BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session: Optional["requests.Session"] = None
+_session_lock = threading.Lock()
+_settings = {
+    "max_connections": DEFAULT_MAX_CONNECTIONS,
+    "retries": DEFAULT_RETRIES,
+    "backoff_factor": DEFAULT_BACKOFF_FACTOR,
+}
+_concurrent = threading.BoundedSemaphore(DEFAULT_MAX_CONCURRENT)
+
+
+def _make_session(
+    max_connections: int, retries: int, backoff_factor: float
+) -> "requests.Session":
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    # only retry on the response status, so e.g. being offline still fails quickly
+    retry = Retry(
+        total=retries,
+        connect=0,
+        read=0,
+        other=0,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=["GET", "HEAD"],
+        # give the last response back rather than raising, so callers handle
+        # errors in the same way as for requests that weren't retried
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=max_connections,
+        pool_maxsize=max_connections,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> "requests.Session":
+    """
+    Get the HTTP session shared by all modules in this package.
+
+    Returns:
+        requests.Session: shared session
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _make_session(**_settings)
+        return _session
+
+
+def configure_session(
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+    retries: int = DEFAULT_RETRIES,
+    backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+) -> "requests.Session":
+    """
+    Set up the HTTP session shared by all modules in this package.
+
+    Args:
+        max_connections (int): number of connections to each host to keep open.
+                               Default 10.
+        max_concurrent (int): maximum number of requests made at once, across all
+                              threads. Default 8.
+        retries (int): number of times to retry requests that fail with status code
+                       429 or 5xx. Default 5.
+        backoff_factor (float): wait backoff_factor * 2 ** (n - 1) seconds before
+                                the nth retry, unless the response says how long
+                                to wait with a Retry-After header. Default 0.5.
+
+    Returns:
+        requests.Session: shared session
+    """
+    global _session, _concurrent
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _settings.update(
+            max_connections=max_connections,
+            retries=retries,
+            backoff_factor=backoff_factor,
+        )
+        _session = _make_session(**_settings)
+        _concurrent = threading.BoundedSemaphore(max_concurrent)
+        return _session
+
+
+def get(url: str, **kwargs) -> "requests.Response":
+    """
+    Make GET request with the shared session, waiting if the maximum number of
+    requests are already being made.
+
+    Args:
+        url (str): URL to request
+        **kwargs: passed on to requests.Session.get
+
+    Returns:
+        requests.Response: response to request
+    """
+    session = get_session()
+    with _concurrent:
+        return session.get(url, **kwargs)
@@ -4,14 +4,17 @@ useful for creating netCDF files.
 
 """
 
-import pandas as pd
 import re
-import requests
-import os
+import threading
 import warnings
 from typing import Union, Optional
 
+from . import cache
 from . import values
+from .tsv_reader import Value
+
+_instrument_indexes: dict[str, dict[str, dict[str, Union[str, list[str]]]]] = {}
+_instrument_indexes_lock = threading.Lock()
 
 
 def tsv2dict_vars(tsv_file: str) -> dict[str, dict[str, Union[str, float]]]:
@@ -26,29 +29,34 @@ def tsv2dict_vars(tsv_file: str) -> dict[str, dict[str, Union[str, float]]]:
     Returns:
         dictionary of variables and attributes
     """
-    df_vars = pd.read_csv(tsv_file, sep="\t")
-    df_vars = df_vars.fillna("")
+    return _rows2dict_vars(cache.read_tsv_rows(tsv_file))
+
 
+def _rows2dict_vars(
+    rows: list[dict[str, Value]],
+) -> dict[str, dict[str, Union[str, float]]]:
+    """
+    Return dictionary of variables and their attributes from tsv file rows. The
+    rows are plain dictionaries, so one loop over them is quicker than splitting
+    them into columns and grouping those, as was done for pandas DataFrames.
+    """
     all_vars_dict = {}
     current_var_dict = {}
     first_loop = True
     current_var = ""
 
-    for current_line in df_vars.iloc:
+    for current_line in rows:
         if current_line["Variable"] != "":
             if not first_loop:
                 all_vars_dict[current_var] = current_var_dict
-                current_var_dict = {}
             else:
                 first_loop = False
             current_var = current_line["Variable"]
             current_var_dict = {}
-            # continue
         if current_line["Attribute"] != "":
             if (
                 current_line["Value"] == ""
-                and "example value" in current_line.keys()
-                and current_line["example value"] != ""
+                and current_line.get("example value", "") != ""
             ):
                 current_var_dict[current_line["Attribute"]] = (
                     f"EXAMPLE: {current_line['example value']}"
@@ -72,17 +80,14 @@ def tsv2dict_dims(tsv_file: str) -> dict[str, dict[str, str]]:
     Returns:
         dictionary of dimensions and info
     """
-    df_dims = pd.read_csv(tsv_file, sep="\t")
-    df_dims = df_dims.fillna("")
-
-    all_dims_dict = {}
+    return _rows2dict_dims(cache.read_tsv_rows(tsv_file))
 
-    for dim in df_dims.iloc:
-        dim_dict = dim.to_dict()
-        dim_name = dim_dict.pop("Name")
-        all_dims_dict[dim_name] = dim_dict
 
-    return all_dims_dict
+def _rows2dict_dims(rows: list[dict[str, Value]]) -> dict[str, dict[str, str]]:
+    """
+    Return dictionary of dimensions and additional info from tsv file rows.
+    """
+    return _rows_by_name(rows, "Name")
 
 
 def tsv2dict_attrs(tsv_file: str) -> dict[str, dict[str, str]]:
@@ -97,17 +102,30 @@ def tsv2dict_attrs(tsv_file: str) -> dict[str, dict[str, str]]:
     Returns:
         dictionary of global attributes and associated values and info
     """
-    df_attrs = pd.read_csv(tsv_file, sep="\t")
-    df_attrs = df_attrs.fillna("")
+    return _rows2dict_attrs(cache.read_tsv_rows(tsv_file))
 
-    all_attrs_dict = {}
 
-    for dim in df_attrs.iloc:
-        dim_dict = dim.to_dict()
-        dim_name = dim_dict.pop("Name")
-        all_attrs_dict[dim_name] = dim_dict
+def _rows2dict_attrs(rows: list[dict[str, Value]]) -> dict[str, dict[str, str]]:
+    """
+    Return dictionary of global attributes and associated values and info from tsv
+    file rows.
+    """
+    return _rows_by_name(rows, "Name")
 
-    return all_attrs_dict
+
+def _rows_by_name(
+    rows: list[dict[str, Value]], name_column: str
+) -> dict[str, dict[str, Value]]:
+    """
+    Return dictionary of the other values in each of the tsv file rows, keyed by the
+    value in name_column.
+    """
+    all_dict = {}
+    for row in rows:
+        row_dict = dict(row)
+        name = row_dict.pop(name_column)
+        all_dict[name] = row_dict
+    return all_dict
 
 
 def tsv2dict_instruments(tsv_file: str) -> dict[str, dict[str, str]]:
@@ -122,23 +140,72 @@ def tsv2dict_instruments(tsv_file: str) -> dict[str, dict[str, str]]:
     Returns:
         dictionary of instruments and associated information
     """
-    df_instruments = pd.read_csv(tsv_file, sep="\t")
-    df_instruments = df_instruments.fillna("")
+    return {
+        inst_name: _copy_instrument(inst_dict)
+        for inst_name, inst_dict in get_instrument_index(tsv_file).items()
+    }
+
+
+def get_instrument_index(
+    tsv_file: str, missing_ok: bool = False
+) -> Optional[dict[str, dict[str, Union[str, list[str]]]]]:
+    """
+    Get dictionary of instruments and associated information from an instrument
+    vocab tsv file, as from tsv2dict_instruments. Each tsv file from a tagged
+    release, or stored locally, is only read once, and the same dictionary is
+    returned every time after that, so it should not be changed.
 
-    all_instruments = {}
+    Args:
+        tsv_file (str): URL or local path of tsv file
+        missing_ok (bool): return None if tsv file does not exist, rather than
+                           raising an error. Default False.
 
-    for current_instrument in df_instruments.iloc:
-        inst_dict = current_instrument.to_dict()
-        inst_name = inst_dict.pop("New Instrument Name")
+    Returns:
+        dictionary of instruments and associated information, or None if tsv file
+        does not exist and missing_ok is True
+    """
+    with _instrument_indexes_lock:
+        if tsv_file in _instrument_indexes:
+            return _instrument_indexes[tsv_file]
+
+    rows = cache.load_tsv(tsv_file) if missing_ok else cache.read_tsv_rows(tsv_file)
+    if rows is None:
+        return None
+    all_instruments = _rows_by_name(rows, "New Instrument Name")
+    for inst_name, inst_dict in all_instruments.items():
         inst_dict["instrument_name"] = inst_name
         data_products = re.split(r",| |\|", inst_dict["Data Product(s)"])
         data_products = list(filter(None, data_products))
         inst_dict["Data Product(s)"] = data_products
-        all_instruments[inst_name] = inst_dict
 
+    # branches such as "main" can change, so are always read again
+    github_parts = cache.split_github_url(tsv_file)
+    if github_parts is None or cache.is_pinned_tag(github_parts[1]):
+        with _instrument_indexes_lock:
+            all_instruments = _instrument_indexes.setdefault(tsv_file, all_instruments)
     return all_instruments
 
 
+def clear_instrument_indexes() -> None:
+    """
+    Forget all instrument vocab tsv files read by get_instrument_index.
+    """
+    with _instrument_indexes_lock:
+        _instrument_indexes.clear()
+
+
+def _copy_instrument(
+    inst_dict: dict[str, Union[str, list[str]]],
+) -> dict[str, Union[str, list[str]]]:
+    """
+    Return copy of instrument information that can be changed without changing the
+    instrument index.
+    """
+    inst_copy = dict(inst_dict)
+    inst_copy["Data Product(s)"] = list(inst_dict["Data Product(s)"])
+    return inst_copy
+
+
 def create_variables_tsv_url(
     product: str, use_local_files: Optional[str] = None, tag: str = "latest"
 ) -> str:
@@ -226,6 +293,46 @@ def create_attributes_tsv_url(
     return f"{file_loc}/{product}/global-attributes-specific.tsv"
 
 
+def _product_specific_dicts(
+    product: str, use_local_files: Optional[str] = None, tag: str = "latest"
+) -> dict[str, dict[str, dict[str, Union[str, float]]]]:
+    """
+    Collect variables, dimensions and attributes specific to a data product, if
+    the tsv files for them exist. Each tsv file is only read once.
+
+    Args:
+        product (str): data product
+        use_local_files (str or None): path to local directory where tsv files are
+                                    stored. If "None", read from online. Default None.
+        tag (str): tagged release of definitions, or 'latest' to get most recent
+                release. Ignored if use_local_files is not None. Default "latest".
+
+    Returns:
+        dictionary of attributes, dimensions and variables specific to product
+    """
+    product_specific = {"attributes": {}, "dimensions": {}, "variables": {}}
+
+    rows_attrs = cache.load_tsv(
+        create_attributes_tsv_url(product, use_local_files=use_local_files, tag=tag)
+    )
+    if rows_attrs is not None:
+        product_specific["attributes"] = _rows2dict_attrs(rows_attrs)
+
+    rows_dims = cache.load_tsv(
+        create_dimensions_tsv_url(product, use_local_files=use_local_files, tag=tag)
+    )
+    if rows_dims is not None:
+        product_specific["dimensions"] = _rows2dict_dims(rows_dims)
+
+    rows_vars = cache.load_tsv(
+        create_variables_tsv_url(product, use_local_files=use_local_files, tag=tag)
+    )
+    if rows_vars is not None:
+        product_specific["variables"] = _rows2dict_vars(rows_vars)
+
+    return product_specific
+
+
 def instrument_dict(
     desired_instrument: str,
     loc: str = "land",
@@ -257,17 +364,16 @@ def instrument_dict(
     )
 
     instrument_dict = {}
-    main_instruments = tsv2dict_instruments(
+    inst_dict = get_instrument_index(
         values.get_instruments_url(use_local_files=use_local_files, tag=tag)
-    )
-    if desired_instrument in main_instruments.keys():
-        instrument_dict["info"] = main_instruments[desired_instrument]
-    else:
-        instrument_dict["info"] = tsv2dict_instruments(
+    ).get(desired_instrument)
+    if inst_dict is None:
+        inst_dict = get_instrument_index(
             values.get_community_instruments_url(
                 use_local_files=use_local_files, tag=tag
             )
         )[desired_instrument]
+    instrument_dict["info"] = _copy_instrument(inst_dict)
 
     # Add common stuff
     instrument_dict["common"] = {}
@@ -283,36 +389,10 @@ def instrument_dict(
 
     # Add stuff for each product of instrument it specifics exist
     for product in instrument_dict["info"]["Data Product(s)"]:
-        instrument_dict[product] = {}
-        instrument_dict[product]["attributes"] = {}
-        instrument_dict[product]["dimensions"] = {}
-        instrument_dict[product]["variables"] = {}
-
-        attr_url = create_attributes_tsv_url(
-            product, use_local_files=use_local_files, tag=tag
-        )
-        dim_url = create_dimensions_tsv_url(
-            product, use_local_files=use_local_files, tag=tag
-        )
-        var_url = create_variables_tsv_url(
+        instrument_dict[product] = _product_specific_dicts(
             product, use_local_files=use_local_files, tag=tag
         )
 
-        if (use_local_files and os.path.isfile(attr_url)) or (
-            not use_local_files and requests.get(attr_url).status_code == 200
-        ):
-            instrument_dict[product]["attributes"] = tsv2dict_attrs(attr_url)
-
-        if (use_local_files and os.path.isfile(dim_url)) or (
-            not use_local_files and requests.get(dim_url).status_code == 200
-        ):
-            instrument_dict[product]["dimensions"] = tsv2dict_dims(dim_url)
-
-        if (use_local_files and os.path.isfile(var_url)) or (
-            not use_local_files and requests.get(var_url).status_code == 200
-        ):
-            instrument_dict[product]["variables"] = tsv2dict_vars(var_url)
-
     return instrument_dict
 
 
@@ -363,36 +443,10 @@ def product_dict(
     product_dict["common"]["variables"] = tsv2dict_vars(common_variables_url)
 
     # Add stuff for each product of instrument it specifics exist
-    product_dict[desired_product] = {}
-    product_dict[desired_product]["attributes"] = {}
-    product_dict[desired_product]["dimensions"] = {}
-    product_dict[desired_product]["variables"] = {}
-
-    attr_url = create_attributes_tsv_url(
-        desired_product, use_local_files=use_local_files, tag=tag
-    )
-    dim_url = create_dimensions_tsv_url(
-        desired_product, use_local_files=use_local_files, tag=tag
-    )
-    var_url = create_variables_tsv_url(
+    product_dict[desired_product] = _product_specific_dicts(
         desired_product, use_local_files=use_local_files, tag=tag
     )
 
-    if (use_local_files and os.path.isfile(attr_url)) or (
-        not use_local_files and requests.get(attr_url).status_code == 200
-    ):
-        product_dict[desired_product]["attributes"] = tsv2dict_attrs(attr_url)
-
-    if (use_local_files and os.path.isfile(dim_url)) or (
-        not use_local_files and requests.get(dim_url).status_code == 200
-    ):
-        product_dict[desired_product]["dimensions"] = tsv2dict_dims(dim_url)
-
-    if (use_local_files and os.path.isfile(var_url)) or (
-        not use_local_files and requests.get(var_url).status_code == 200
-    ):
-        product_dict[desired_product]["variables"] = tsv2dict_vars(var_url)
-
     # Add basic info bits
     product_dict["info"] = {}
     product_dict["info"]["Mobile/Fixed (loc)"] = platform
@@ -426,8 +480,8 @@ def list_all_products(use_local_files: Optional[str] = None, tag: str = "latest"
     data_products_url = values.get_all_data_products_url(
         use_local_files=use_local_files, tag=tag
     )
-    df_data_products = pd.read_csv(data_products_url, sep="\t")
-    return list(df_data_products["Data Product"])
+    rows = cache.read_tsv_rows(data_products_url)
+    return [row["Data Product"] for row in rows]
 
 
 if __name__ == "__main__":
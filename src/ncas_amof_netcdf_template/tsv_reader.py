@@ -0,0 +1,176 @@
+"""
+Read tsv files into a list of rows, each a dictionary of column name to value,
+using only the standard library. Values are converted in the same way as
+pandas.read_csv followed by fillna(""), so the rows match what the rest of the
+package got from pandas DataFrames, but without the cost of importing pandas.
+"""
+
+import csv
+import io
+import os
+import re
+from typing import Union
+
+# values pandas.read_csv reads as missing by default
+NA_VALUES = {
+    "",
+    "#N/A",
+    "#N/A N/A",
+    "#NA",
+    "-1.#IND",
+    "-1.#QNAN",
+    "-NaN",
+    "-nan",
+    "1.#IND",
+    "1.#QNAN",
+    "<NA>",
+    "N/A",
+    "NA",
+    "NULL",
+    "NaN",
+    "None",
+    "n/a",
+    "nan",
+    "null",
+}
+TRUE_VALUES = {"True", "TRUE", "true"}
+FALSE_VALUES = {"False", "FALSE", "false"}
+# pandas ignores spaces around numbers, but not around infinity, and only reads
+# ASCII digits as numbers
+_INT_PATTERN = re.compile(r"^ *[+-]?\d+ *$", re.ASCII)
+_FLOAT_PATTERN = re.compile(
+    r"^( *[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)? *|[+-]?(inf|Inf|INF|infinity|Infinity))$",
+    re.ASCII,
+)
+
+_use_pandas = os.environ.get("NCAS_AMOF_TSV_READER", "") == "pandas"
+
+Value = Union[str, int, float, bool]
+
+
+def use_pandas(enabled: bool = True) -> None:
+    """
+    Choose whether to read tsv files with pandas instead of the standard library.
+    This can also be set with the ``NCAS_AMOF_TSV_READER=pandas`` environment
+    variable.
+
+    Args:
+        enabled (bool): read tsv files with pandas. Default True.
+    """
+    global _use_pandas
+    _use_pandas = enabled
+
+
+def _unique_columns(header: list[str]) -> list[str]:
+    """
+    Name columns as pandas does, with unnamed columns called "Unnamed: <i>" and
+    repeated names given a ".<n>" suffix.
+    """
+    columns = []
+    for i, name in enumerate(header):
+        name = name if name != "" else f"Unnamed: {i}"
+        unique_name = name
+        n = 0
+        while unique_name in columns:
+            n += 1
+            unique_name = f"{name}.{n}"
+        columns.append(unique_name)
+    return columns
+
+
+def _convert_column(column: list[str]) -> list[Value]:
+    """
+    Convert values in a column to the types pandas would give them, with missing
+    values as "".
+    """
+    present = [value for value in column if value not in NA_VALUES]
+    has_missing = len(present) != len(column)
+    if not present:
+        return [""] * len(column)
+    if all(value in TRUE_VALUES or value in FALSE_VALUES for value in present):
+        return ["" if value in NA_VALUES else value in TRUE_VALUES for value in column]
+    if not has_missing and all(_INT_PATTERN.match(value) for value in present):
+        return [int(value) for value in column]
+    if all(
+        _INT_PATTERN.match(value) or _FLOAT_PATTERN.match(value) for value in present
+    ):
+        return ["" if value in NA_VALUES else float(value) for value in column]
+    return ["" if value in NA_VALUES else value for value in column]
+
+
+def _read_lines(content: str) -> list[list[str]]:
+    """
+    Split tsv file contents into lines of values. As with pandas, lines that are
+    empty or only spaces are skipped, unless the spaces are quoted.
+    """
+    physical_lines = []
+
+    def record(lines):
+        for line in lines:
+            physical_lines.append(line)
+            yield line
+
+    lines = []
+    for line in csv.reader(record(io.StringIO(content)), delimiter="\t"):
+        blank = len(physical_lines) == 1 and physical_lines[0].strip(" \r\n") == ""
+        physical_lines.clear()
+        if not blank:
+            lines.append(line)
+    return lines
+
+
+def _parse_with_pandas(content: str) -> list[dict[str, Value]]:
+    import pandas as pd
+
+    df = pd.read_csv(io.StringIO(content), sep="\t").fillna("")
+    return df.to_dict(orient="records")
+
+
+def parse_tsv(content: Union[str, bytes]) -> list[dict[str, Value]]:
+    """
+    Read the contents of a tsv file into rows.
+
+    Args:
+        content (str or bytes): contents of tsv file, with column names in first
+                                line
+
+    Returns:
+        list: dictionary of column name to value for each row. Missing values are
+              "", and numbers and booleans are converted as by pandas.read_csv.
+    """
+    if isinstance(content, bytes):
+        content = content.decode("utf-8-sig")
+    else:
+        content = content.removeprefix("\ufeff")
+    if _use_pandas:
+        return _parse_with_pandas(content)
+
+    lines = _read_lines(content)
+    if not lines:
+        # nothing to read, pandas would raise an error here
+        return _parse_with_pandas(content)
+    columns = _unique_columns(lines[0])
+    rows = lines[1:]
+    if any(len(row) > len(columns) for row in rows):
+        # pandas uses extra values as the index, leave that to pandas
+        return _parse_with_pandas(content)
+
+    data = [
+        _convert_column([row[i] if i < len(row) else "" for row in rows])
+        for i in range(len(columns))
+    ]
+    return [dict(zip(columns, values)) for values in zip(*data)]
+
+
+def read_tsv(tsv_file: str) -> list[dict[str, Value]]:
+    """
+    Read a local tsv file into rows.
+
+    Args:
+        tsv_file (str): path to tsv file
+
+    Returns:
+        list: dictionary of column name to value for each row, as from parse_tsv
+    """
+    with open(tsv_file, "rb") as f:
+        return parse_tsv(f.read())
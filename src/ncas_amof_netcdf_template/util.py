@@ -5,13 +5,15 @@ Reasonably helpful functions that can be often used.
 
 import csv
 import datetime as dt
-from netCDF4 import Dataset
 import numpy as np
 import warnings
 import json
-import yaml
 import xml.etree.ElementTree as ET
-from typing import Any, Union, Optional
+from typing import Any, Union, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from netCDF4 import Dataset, Variable
+    import pandas as pd
 
 
 def _map_data_type(data_type: str) -> type:
@@ -178,6 +180,8 @@ def read_yaml_metadata(metafile: str) -> dict[str, dict[str, Union[str, type]]]:
     Returns:
         dict: metadata from YAML as dictionary
     """
+    import yaml
+
     with open(metafile, "rt") as meta:
         raw_metadata = yaml.safe_load(meta)
     for key, value in raw_metadata.items():
@@ -265,7 +269,7 @@ def get_metadata(
 
 
 def add_metadata_to_netcdf(
-    ncfile: Dataset,
+    ncfile: "Dataset",
     metadata_file: Optional[str] = None,
     file_format: Optional[str] = None,
 ) -> None:
@@ -313,7 +317,7 @@ def add_metadata_to_netcdf(
 
 
 def add_metadata_from_dict(
-    ncfile: Dataset, metadata_dict: dict[str, str | int | float]
+    ncfile: "Dataset", metadata_dict: dict[str, str | int | float]
 ) -> None:
     """
     Take metadata from dictionary and add to global attributes in netCDF file.
@@ -331,17 +335,34 @@ def add_metadata_from_dict(
             ncfile.setncattr(key, value)
 
 
+def _to_datetime64(dt_times: Any) -> np.ndarray[Any, Any]:
+    """
+    Convert datetime objects, a numpy datetime64 array or a pandas DatetimeIndex to
+    a datetime64 array. Timezones are dropped, so times are always taken as UTC.
+    """
+    if getattr(dt_times, "tz", None) is not None:
+        # timezone-aware pandas DatetimeIndex
+        dt_times = dt_times.tz_localize(None)
+    times = np.asarray(dt_times)
+    if times.dtype.kind != "M":
+        if times.size and getattr(times.flat[0], "tzinfo", None) is not None:
+            times = np.array([i.replace(tzinfo=None) for i in times.flat])
+        times = times.astype("datetime64[us]")
+    return times
+
+
 def get_times(
-    dt_times: list[dt.datetime],
+    dt_times: Union[list[dt.datetime], np.ndarray[Any, Any], "pd.DatetimeIndex"],
+    as_arrays: bool = False,
 ) -> tuple[
-    list[float],
-    list[float],
-    list[int],
-    list[int],
-    list[int],
-    list[int],
-    list[int],
-    list[float],
+    Union[list[float], np.ndarray[Any, Any]],
+    Union[list[float], np.ndarray[Any, Any]],
+    Union[list[int], np.ndarray[Any, Any]],
+    Union[list[int], np.ndarray[Any, Any]],
+    Union[list[int], np.ndarray[Any, Any]],
+    Union[list[int], np.ndarray[Any, Any]],
+    Union[list[int], np.ndarray[Any, Any]],
+    Union[list[float], np.ndarray[Any, Any]],
     float,
     float,
     str,
@@ -350,30 +371,45 @@ def get_times(
     Returns all time units for AMOF netCDF files from series of datetime objects.
 
     Args:
-        dt_times (list-like object): object with datetime objects for times
+        dt_times (list-like object): object with datetime objects for times, or a
+                                     numpy datetime64 array or pandas
+                                     DatetimeIndex. Times are taken to be UTC.
+        as_arrays (bool): return unix_times, day-of-year, years, months, days,
+                          hours, minutes and seconds as numpy arrays rather than
+                          lists. Default False.
 
     Returns:
-        lists: unix_times, day-of-year, years, months, days, hours, minutes, seconds
+        lists (or arrays): unix_times, day-of-year, years, months, days, hours,
+        minutes, seconds
         floats: unix time of first and last times (time_coverage_start and
         time_coverage_end)
         str: date in YYYYmmdd format of first time, (file_date)
     """
-    unix_times = [i.replace(tzinfo=dt.timezone.utc).timestamp() for i in dt_times]
-    doy = [i.timetuple().tm_yday for i in dt_times]
-    years = [i.year for i in dt_times]
-    months = [i.month for i in dt_times]
-    days = [i.day for i in dt_times]
-    hours = [i.hour for i in dt_times]
-    minutes = [i.minute for i in dt_times]
-    seconds = [i.second + i.microsecond / 1000000 for i in dt_times]
-    time_coverage_start_dt = unix_times[0]
-    time_coverage_end_dt = unix_times[-1]
-    doy = list(
-        np.array(doy)
-        + np.array([i / 24 for i in hours])
-        + np.array([i / (24 * 60) for i in minutes])
-        + np.array([i / (24 * 60 * 60) for i in seconds])
+    times = _to_datetime64(dt_times)
+    unix_times = (times - np.datetime64(0, "s")) / np.timedelta64(1, "s")
+    years_start = times.astype("datetime64[Y]")
+    months_start = times.astype("datetime64[M]")
+    days_start = times.astype("datetime64[D]")
+    time_of_day = times - days_start
+    years = years_start.astype(int) + 1970
+    months = months_start.astype(int) % 12 + 1
+    days = (days_start - months_start).astype(int) + 1
+    hours = (time_of_day // np.timedelta64(1, "h")).astype(int)
+    minutes = (time_of_day % np.timedelta64(1, "h") // np.timedelta64(1, "m")).astype(
+        int
+    )
+    seconds = (time_of_day % np.timedelta64(1, "m") // np.timedelta64(1, "s")) + (
+        time_of_day % np.timedelta64(1, "s") / np.timedelta64(1, "s")
+    )
+    doy = (
+        (days_start - years_start).astype(int)
+        + 1
+        + hours / 24
+        + minutes / (24 * 60)
+        + seconds / (24 * 60 * 60)
     )
+    time_coverage_start_dt = float(unix_times[0])
+    time_coverage_end_dt = float(unix_times[-1])
     file_date = ""
     if years[0] == years[-1]:
         file_date += str(years[0])
@@ -389,15 +425,11 @@ def get_times(
                             file_date += str(zero_pad_number(int(seconds[0])))
     else:
         raise ValueError("Incompatible dates - data from over 2 years")
+    time_units = [unix_times, doy, years, months, days, hours, minutes, seconds]
+    if not as_arrays:
+        time_units = [i.tolist() for i in time_units]
     return (
-        unix_times,
-        doy,
-        years,
-        months,
-        days,
-        hours,
-        minutes,
-        seconds,
+        *time_units,
         time_coverage_start_dt,
         time_coverage_end_dt,
         file_date,
@@ -405,7 +437,7 @@ def get_times(
 
 
 def change_qc_flags(
-    ncfile: Dataset,
+    ncfile: "Dataset",
     ncfile_varname: str,
     flag_meanings: list[str] = [],
     flag_values: Optional[list[int]] = None,
@@ -466,7 +498,7 @@ def change_qc_flags(
 
 
 def update_variable(
-    ncfile: Dataset,
+    ncfile: "Dataset",
     ncfile_varname: str,
     data: Union[np.ndarray[Any, Any], list[Any]],
     qc_data_error: bool = True,
@@ -490,21 +522,489 @@ def update_variable(
         ncfile.variables[ncfile_varname].valid_max = np.float64(np.nanmax(data)).astype(
             ncfile.variables[ncfile_varname].datatype
         )
-    if (
-        "qc" in ncfile_varname.lower()
-        and "flag_values" in ncfile.variables[ncfile_varname].ncattrs()
-    ):
-        if not np.isin(data, ncfile.variables[ncfile_varname].flag_values).all():
-            valid_values = ncfile.variables[ncfile_varname].flag_values.tolist()
-            msg = (
+    _check_qc_data(ncfile, ncfile_varname, data, qc_data_error)
+    ncfile.variables[ncfile_varname][:] = data
+
+
+def _check_qc_data(
+    ncfile: "Dataset",
+    ncfile_varname: str,
+    data: Union[np.ndarray[Any, Any], list[Any]],
+    qc_data_error: bool,
+) -> None:
+    """
+    Check data for a QC flag variable only contains values in its flag_values
+    attribute, raising an error or printing a warning if not.
+    """
+    msg = _invalid_qc_data_message(ncfile.variables[ncfile_varname], data)
+    if msg is not None:
+        if qc_data_error:
+            raise ValueError(msg)
+        else:
+            print(f"[WARN]: {msg}")
+
+
+def _invalid_qc_data_message(
+    var: "Variable", data: Union[np.ndarray[Any, Any], list[Any]]
+) -> Optional[str]:
+    if "qc" in var.name.lower() and "flag_values" in var.ncattrs():
+        result = check_qc_flags(data, var.flag_values)
+        if not result.ok:
+            valid_values = np.asarray(var.flag_values).tolist()
+            first_invalid = tuple(int(i[0]) for i in result.invalid_positions)
+            return (
                 "Invalid data being added to QC variable, "
-                f"only {valid_values} are allowed."
+                f"only {valid_values} are allowed. Found {result.n_invalid}"
+                f" invalid values, the first at index {first_invalid}."
             )
-            if qc_data_error:
-                raise ValueError(msg)
-            else:
+    return None
+
+
+# number of elements checked at a time by check_qc_flags
+_QC_CHECK_BLOCK_SIZE = 1 << 20
+
+
+class QCFlagCheck:
+    """
+    Outcome of checking data for a QC flag variable against its flag values.
+
+    Args:
+        counts (dict): number of times each flag value is used, keyed by flag value
+        n_invalid (int): number of values that are not flag values
+        invalid_positions (tuple of arrays): indices of values that are not flag
+                                             values, one array per dimension of the
+                                             data, as returned by np.nonzero
+    """
+
+    def __init__(
+        self,
+        counts: dict[Any, int],
+        n_invalid: int,
+        invalid_positions: tuple[np.ndarray[Any, Any], ...],
+    ) -> None:
+        self.counts = counts
+        self.n_invalid = n_invalid
+        self.invalid_positions = invalid_positions
+
+    def __repr__(self) -> str:
+        class_name = type(self).__name__
+        return f"{class_name}(counts={self.counts}) - {self.n_invalid} invalid values"
+
+    @property
+    def ok(self) -> bool:
+        """
+        bool: all values are flag values
+        """
+        return self.n_invalid == 0
+
+
+def _value_counts(
+    block: np.ndarray[Any, Any], flags: np.ndarray[Any, Any]
+) -> np.ndarray[Any, Any]:
+    """
+    Count how many times each of flags appears in block.
+    """
+    if block.dtype.kind in "iu" and block.dtype.itemsize <= 2 and len(flags) > 4:
+        # count every possible value of the data type at once, then look up flags,
+        # which is quicker than comparing against each of many flags in turn
+        info = np.iinfo(block.dtype)
+        in_range = flags[(flags >= info.min) & (flags <= info.max)]
+        unsigned = np.dtype(f"u{block.dtype.itemsize}")
+        histogram = np.bincount(
+            block.view(unsigned), minlength=1 << (8 * unsigned.itemsize)
+        )
+        counts = dict(
+            zip(
+                in_range.tolist(),
+                histogram[in_range.astype(block.dtype).view(unsigned)].tolist(),
+            )
+        )
+        return np.array([counts.get(flag, 0) for flag in flags.tolist()], dtype=int)
+    return np.array([np.count_nonzero(block == flag) for flag in flags], dtype=int)
+
+
+def check_qc_flags(
+    data: Union[np.ndarray[Any, Any], list[Any]],
+    flag_values: Union[np.ndarray[Any, Any], list[Any]],
+) -> QCFlagCheck:
+    """
+    Count how many times each flag value is used in data for a QC flag variable, and
+    find any values that are not flag values. Masked values are ignored. Data is
+    checked in blocks, so little extra memory is needed, and 8 and 16 bit integer
+    data with many flag values is counted in one pass with np.bincount. Positions
+    of invalid values are only looked for if there are any.
+
+    Args:
+        data (array or list): Data for QC flag variable.
+        flag_values (array or list): Allowed flag values, e.g. the flag_values
+                                     attribute of the variable.
+
+    Returns:
+        QCFlagCheck: number of times each flag value is used, and the number and
+                     positions of invalid values
+    """
+    data = np.asanyarray(data)
+    flags = np.unique(np.asarray(flag_values))
+    values = np.ma.getdata(data).reshape(-1)
+    mask = np.ma.getmaskarray(data).reshape(-1) if np.ma.isMaskedArray(data) else None
+
+    counts = np.zeros(len(flags), dtype=np.int64)
+    n_checked = 0
+    for start in range(0, values.size, _QC_CHECK_BLOCK_SIZE):
+        block = values[start : start + _QC_CHECK_BLOCK_SIZE]
+        if mask is not None:
+            block = block[~mask[start : start + _QC_CHECK_BLOCK_SIZE]]
+        counts += _value_counts(block, flags)
+        n_checked += block.size
+    n_invalid = n_checked - int(counts.sum())
+
+    invalid = []
+    if n_invalid:
+        for start in range(0, values.size, _QC_CHECK_BLOCK_SIZE):
+            block_invalid = np.isin(
+                values[start : start + _QC_CHECK_BLOCK_SIZE], flags, invert=True
+            )
+            if mask is not None:
+                block_invalid &= ~mask[start : start + _QC_CHECK_BLOCK_SIZE]
+            invalid.append(np.flatnonzero(block_invalid) + start)
+    flat_invalid = np.concatenate(invalid) if invalid else np.empty(0, dtype=np.intp)
+    if data.ndim == 0:
+        invalid_positions = ()
+    else:
+        invalid_positions = np.unravel_index(flat_invalid, data.shape)
+    return QCFlagCheck(
+        counts=dict(zip(flags.tolist(), counts.tolist())),
+        n_invalid=n_invalid,
+        invalid_positions=invalid_positions,
+    )
+
+
+def _shape_error_message(var: "Variable", data: np.ndarray[Any, Any]) -> Optional[str]:
+    if data.ndim == 0:
+        return None
+    if data.ndim != var.ndim:
+        return (
+            f"Data has {data.ndim} dimensions, expected {var.ndim}"
+            f" {var.dimensions}."
+        )
+    for dim, size, data_size in zip(var.get_dims(), var.shape, data.shape):
+        if data_size != size and not dim.isunlimited():
+            return (
+                f"Data has length {data_size} in dimension {dim.name},"
+                f" expected {size}."
+            )
+    return None
+
+
+def update_variables(
+    ncfile: "Dataset",
+    data: dict[str, Union[np.ndarray[Any, Any], list[Any]]],
+    qc_data_error: bool = True,
+) -> None:
+    """
+    Adds data to many variables at once, and updates valid_min and valid_max
+    variable attrs if they exist. All data is checked before anything is written:
+    each array must match the shape of its variable (or be a single value), and
+    data for QC flag variables must only contain values in flag_values. If any
+    checks fail, an error listing every problem is raised and the file is not
+    changed.
+
+    Args:
+        ncfile (netCDF Dataset): Dataset object of netCDF file.
+        data (dict): Data to be added, as variable name:array pairs.
+        qc_data_error (bool): Raise error if trying to add values to QC flag
+                               variables that are not in the flag_values attribute.
+                               Otherwise, just a warning is printed. Default True.
+    """
+    arrays = {}
+    stats = {}
+    errors = []
+    for name, values in data.items():
+        if name not in ncfile.variables:
+            errors.append(f"{name}: Variable not in file.")
+            continue
+        var = ncfile.variables[name]
+        values = np.asanyarray(values)
+        msg = _shape_error_message(var, values)
+        if msg is None:
+            msg = _invalid_qc_data_message(var, values)
+            if msg is not None and not qc_data_error:
                 print(f"[WARN]: {msg}")
-    ncfile.variables[ncfile_varname][:] = data
+                msg = None
+        if msg is not None:
+            errors.append(f"{name}: {msg}")
+            continue
+        arrays[name] = values
+        if "valid_min" in var.ncattrs():
+            stats[name] = _RunningStats()
+            stats[name].update(values)
+    if errors:
+        msg = "Could not update variables:\n" + "\n".join(errors)
+        raise ValueError(msg)
+
+    for name, values in arrays.items():
+        var = ncfile.variables[name]
+        var[:] = values
+        if name in stats:
+            stats[name].write_valid_range(var)
+
+
+class _RunningStats:
+    """
+    Running minimum, maximum and count of NaN values of data written to a variable
+    in pieces. Masked values are ignored.
+    """
+
+    def __init__(self) -> None:
+        self.min: Optional[np.float64] = None
+        self.max: Optional[np.float64] = None
+        self.nan_count = 0
+
+    def update(self, values: np.ndarray[Any, Any]) -> None:
+        if values.size == 0:
+            return
+        data = np.ma.getdata(values)
+        mask = np.ma.getmaskarray(values)
+        if np.issubdtype(data.dtype, np.floating):
+            nans = np.isnan(data) & ~mask
+            self.nan_count += int(np.count_nonzero(nans))
+            mask = mask | nans
+        if mask.all():
+            return
+        valid = data[~mask] if mask.any() else data
+        block_min = np.float64(valid.min())
+        block_max = np.float64(valid.max())
+        if self.min is not None:
+            block_min = min(self.min, block_min)
+            block_max = max(self.max, block_max)
+        self.min = block_min
+        self.max = block_max
+
+    def write_valid_range(self, var: "Variable") -> None:
+        """
+        Set valid_min and valid_max of variable, if it has them and any valid data
+        has been seen.
+        """
+        if self.min is None or "valid_min" not in var.ncattrs():
+            return
+        var.valid_min = self.min.astype(var.datatype)
+        var.valid_max = self.max.astype(var.datatype)
+
+
+class RecordWriter:
+    """
+    Append data to a netCDF file in blocks of records along an unlimited dimension,
+    such as a file made with create_netcdf.main(..., unlimited_dimension="time").
+    All variables using the dimension are written together, so only one block of
+    data needs to be held in memory at a time. As with update_variable, data for QC
+    flag variables is checked, and valid_min and valid_max are updated to cover all
+    data appended so far. These attributes are written, and the file synced to
+    disk, every sync_every records and when flush is called or the with block ends.
+
+    Args:
+        ncfile (netCDF Dataset): Dataset object of netCDF file.
+        dimension (str): name of unlimited dimension. Default "time".
+        sync_every (int or None): sync file to disk after this many records have
+                                  been appended since the last sync. If None, only
+                                  sync when flush is called. Default None.
+        qc_data_error (bool): Raise error if trying to add values to QC flag
+                              variables that are not in the flag_values attribute.
+                              Otherwise, just a warning is printed. Default True.
+    """
+
+    def __init__(
+        self,
+        ncfile: "Dataset",
+        dimension: str = "time",
+        sync_every: Optional[int] = None,
+        qc_data_error: bool = True,
+    ) -> None:
+        if not ncfile.dimensions[dimension].isunlimited():
+            msg = f"Dimension {dimension} is not unlimited"
+            raise ValueError(msg)
+        self.ncfile = ncfile
+        self.dimension = dimension
+        self.sync_every = sync_every
+        self.qc_data_error = qc_data_error
+        self.n_records = len(ncfile.dimensions[dimension])
+        self._unsynced_records = 0
+        # position of the dimension in each variable that uses it
+        self._axes = {
+            name: var.dimensions.index(dimension)
+            for name, var in ncfile.variables.items()
+            if dimension in var.dimensions
+        }
+        self._stats: dict[str, _RunningStats] = {}
+
+    def __repr__(self) -> str:
+        class_name = type(self).__name__
+        return (
+            f"{class_name}(dimension='{self.dimension}') -"
+            f" {self.n_records} records, {len(self._axes)} variables"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.flush()
+
+    @property
+    def variables(self) -> list[str]:
+        """
+        list: names of variables using the unlimited dimension
+        """
+        return list(self._axes)
+
+    def append(self, data: dict[str, Union[np.ndarray[Any, Any], list[Any]]]) -> None:
+        """
+        Append a block of records to variables. All arrays must have the same
+        number of records along the unlimited dimension. Variables not given are
+        left as fill values for these records.
+
+        Args:
+            data (dict): array of data for each variable, keyed by variable name
+        """
+        arrays = {}
+        n_records = None
+        for name, values in data.items():
+            if name not in self._axes:
+                msg = f"Variable {name} does not use dimension {self.dimension}"
+                raise ValueError(msg)
+            values = np.asanyarray(values)
+            axis = self._axes[name]
+            if values.ndim != len(self.ncfile.variables[name].dimensions):
+                msg = (
+                    f"Data for variable {name} has {values.ndim} dimensions, expected"
+                    f" {len(self.ncfile.variables[name].dimensions)}"
+                )
+                raise ValueError(msg)
+            if n_records is None:
+                n_records = values.shape[axis]
+            elif values.shape[axis] != n_records:
+                msg = (
+                    f"Data for variable {name} has {values.shape[axis]} records,"
+                    f" expected {n_records}"
+                )
+                raise ValueError(msg)
+            _check_qc_data(self.ncfile, name, values, self.qc_data_error)
+            arrays[name] = values
+        if not n_records:
+            return
+
+        start = self.n_records
+        for name, values in arrays.items():
+            var = self.ncfile.variables[name]
+            index = [slice(None)] * values.ndim
+            index[self._axes[name]] = slice(start, start + n_records)
+            var[tuple(index)] = values
+            if "valid_min" in var.ncattrs():
+                self._stats.setdefault(name, _RunningStats()).update(values)
+
+        self.n_records += n_records
+        self._unsynced_records += n_records
+        if self.sync_every is not None and self._unsynced_records >= self.sync_every:
+            self.sync()
+
+    def sync(self) -> None:
+        """
+        Write valid_min and valid_max attributes, and sync file to disk.
+        """
+        for name, stats in self._stats.items():
+            stats.write_valid_range(self.ncfile.variables[name])
+        self.ncfile.sync()
+        self._unsynced_records = 0
+
+    def flush(self) -> None:
+        """
+        Write everything appended so far to disk. The file is left open.
+        """
+        self.sync()
+
+
+class SlabWriter:
+    """
+    Write variables in pieces, for example chunk by chunk, so large variables never
+    need to be held in memory all at once. The minimum and maximum of the data
+    written to each variable, and the number of NaN values, are kept across calls
+    to update, and valid_min and valid_max are set from them when finalise is
+    called or the with block ends. Each element should only be written once, as
+    values that are overwritten still count towards these. As with
+    update_variable, data for QC flag variables is checked.
+
+    Args:
+        ncfile (netCDF Dataset): Dataset object of netCDF file.
+        qc_data_error (bool): Raise error if trying to add values to QC flag
+                              variables that are not in the flag_values attribute.
+                              Otherwise, just a warning is printed. Default True.
+    """
+
+    def __init__(self, ncfile: "Dataset", qc_data_error: bool = True) -> None:
+        self.ncfile = ncfile
+        self.qc_data_error = qc_data_error
+        self._stats: dict[str, _RunningStats] = {}
+
+    def __repr__(self) -> str:
+        class_name = type(self).__name__
+        return f"{class_name}() - {len(self._stats)} variables updated"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.finalise()
+
+    @property
+    def nan_counts(self) -> dict[str, int]:
+        """
+        dict: number of NaN values written to each variable so far
+        """
+        return {name: stats.nan_count for name, stats in self._stats.items()}
+
+    def valid_range(self, ncfile_varname: str) -> tuple[Any, Any]:
+        """
+        Get the minimum and maximum of the data written to a variable so far.
+
+        Args:
+            ncfile_varname (str): Name of variable in netCDF file.
+
+        Returns:
+            tuple: minimum and maximum, or (None, None) if no valid data has been
+                   written
+        """
+        stats = self._stats.get(ncfile_varname, _RunningStats())
+        return stats.min, stats.max
+
+    def update(
+        self,
+        ncfile_varname: str,
+        data: Union[np.ndarray[Any, Any], list[Any]],
+        index: Any = Ellipsis,
+    ) -> None:
+        """
+        Add data to part of a variable.
+
+        Args:
+            ncfile_varname (str): Name of variable in netCDF file.
+            data (array or list): Data to be added to netCDF variable.
+            index (slice, int, tuple or Ellipsis): part of the variable to write
+                                                  data to, e.g. np.s_[0:100, :].
+                                                  Default Ellipsis (whole
+                                                  variable).
+        """
+        var = self.ncfile.variables[ncfile_varname]
+        data = np.asanyarray(data)
+        _check_qc_data(self.ncfile, ncfile_varname, data, self.qc_data_error)
+        var[index] = data
+        self._stats.setdefault(ncfile_varname, _RunningStats()).update(data)
+
+    def finalise(self) -> None:
+        """
+        Set valid_min and valid_max attributes of every variable updated that has
+        them, from all the data written so far.
+        """
+        for name, stats in self._stats.items():
+            stats.write_valid_range(self.ncfile.variables[name])
 
 
 def zero_pad_number(n: int) -> str:
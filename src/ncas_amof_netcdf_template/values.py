@@ -3,9 +3,100 @@ Get various URLs from AMF_CVs GitHub repo for vocab releases.
 
 """
 
-import requests
+import threading
+import time
 from typing import Optional
 
+from . import cache
+from . import session
+
+# seconds to remember the latest release version of a repo before checking again
+_latest_version_ttl = 3600.0
+_latest_versions: dict[str, tuple[float, str]] = {}
+_existing_versions: dict[tuple[str, str], tuple[float, bool]] = {}
+_versions_lock = threading.Lock()
+
+
+def set_latest_version_ttl(ttl: float) -> None:
+    """
+    Set how long the latest release version of a repo, and whether a release version
+    exists, are remembered for before being checked on GitHub again.
+
+    Args:
+        ttl (float): time, in seconds, to remember versions for. Use 0 to always
+                     check GitHub.
+    """
+    global _latest_version_ttl
+    _latest_version_ttl = ttl
+
+
+def clear_version_memo() -> None:
+    """
+    Forget all release versions found so far, so they will be looked up on GitHub
+    when next needed.
+    """
+    with _versions_lock:
+        _latest_versions.clear()
+        _existing_versions.clear()
+
+
+def get_latest_version(repo: str) -> str:
+    """
+    Get latest release version of a GitHub repo. The result is remembered for all
+    modules in the package, and only checked again after the time set by
+    set_latest_version_ttl (default one hour).
+
+    Args:
+        repo (str): GitHub repo, as "<owner-name>/<repo-name>"
+
+    Returns:
+        string of latest tagged version release
+    """
+    with _versions_lock:
+        if repo in _latest_versions:
+            found_time, version = _latest_versions[repo]
+            if time.monotonic() - found_time < _latest_version_ttl:
+                return version
+    # ask GitHub without holding the lock, so looking up other repos isn't held up
+    version = session.get(f"https://github.com/{repo}/releases/latest").url.split("/")[
+        -1
+    ]
+    with _versions_lock:
+        _latest_versions[repo] = (time.monotonic(), version)
+    return version
+
+
+def check_version_exists(repo: str, tag: str) -> bool:
+    """
+    Check a tagged release version of a GitHub repo exists. Like get_latest_version,
+    the result is remembered for all modules in the package. Only a found (200) or
+    not found (404) answer is remembered. Any other error response, e.g. 429 or 503
+    after the session has retried, is raised.
+
+    Args:
+        repo (str): GitHub repo, as "<owner-name>/<repo-name>"
+        tag (str): tagged release version
+
+    Returns:
+        bool: release version exists
+    """
+    cv_cache = cache.get_cache()
+    if cv_cache is not None and cv_cache.has_tag(repo, tag):
+        return True
+    with _versions_lock:
+        if (repo, tag) in _existing_versions:
+            found_time, exists = _existing_versions[(repo, tag)]
+            if time.monotonic() - found_time < _latest_version_ttl:
+                return exists
+    r = session.get(f"https://github.com/{repo}/releases/{tag}")
+    if r.status_code not in (200, 404):
+        r.raise_for_status()
+        return r.status_code == 200
+    exists = r.status_code == 200
+    with _versions_lock:
+        _existing_versions[(repo, tag)] = (time.monotonic(), exists)
+    return exists
+
 
 def get_latest_CVs_version() -> str:
     """
@@ -14,9 +105,7 @@ def get_latest_CVs_version() -> str:
     Returns:
         string of latest tagged version release
     """
-    return requests.get("https://github.com/ncasuk/AMF_CVs/releases/latest").url.split(
-        "/"
-    )[-1]
+    return get_latest_version("ncasuk/AMF_CVs")
 
 
 def get_latest_instrument_CVs_version() -> str:
@@ -26,9 +115,7 @@ def get_latest_instrument_CVs_version() -> str:
     Returns:
         string of latest tagged version release
     """
-    return requests.get(
-        "https://github.com/ncasuk/ncas-data-instrument-vocabs/releases/latest"
-    ).url.split("/")[-1]
+    return get_latest_version("ncasuk/ncas-data-instrument-vocabs")
 
 
 def get_common_attributes_url(
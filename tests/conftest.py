@@ -0,0 +1,119 @@
+import pytest
+import requests_mock
+from ncas_amof_netcdf_template import (
+    cache,
+    cv_index,
+    file_info,
+    remove_empty_variables,
+    tsv2dict,
+    values,
+)
+
+CVS_URL = (
+    "https://raw.githubusercontent.com/ncasuk/AMF_CVs/v2.0.0/product-definitions/tsv"
+)
+VOCABS_URL = (
+    "https://raw.githubusercontent.com/ncasuk/ncas-data-instrument-vocabs/v2.0.0"
+    "/product-definitions/tsv/_instrument_vocabs"
+)
+TSV_FILES = {
+    f"{CVS_URL}/_vocabularies/data-products.tsv": (
+        "Data Product\tDescription\nsurface-met\tMeteorology\n"
+    ),
+    f"{CVS_URL}/_common/global-attributes.tsv": (
+        "Name\tDescription\tFixed Value\n"
+        "Conventions\tconventions\tCF-1.6, NCAS-AMF-2.0.0\n"
+        "source\tsource of data\t\n"
+        "history\thistory of file\t\n"
+        "last_revised_date\tdate file last changed\t\n"
+    ),
+    f"{CVS_URL}/_common/dimensions-land.tsv": (
+        "Name\tLength\tunits\ntime\t<i>\tseconds\nlatitude\t1\tdegrees_north\n"
+    ),
+    f"{CVS_URL}/_common/variables-land.tsv": (
+        "Variable\tAttribute\tValue\texample value\n"
+        "time\t\t\t\n\ttype\tfloat64\t\n\tdimension\ttime\t\n"
+        "latitude\t\t\t\n\ttype\tfloat32\t\n\tdimension\tlatitude\t\n"
+    ),
+    f"{CVS_URL}/surface-met/global-attributes-specific.tsv": (
+        "Name\tDescription\tFixed Value\nsource\tinstrument descriptor\t\n"
+    ),
+    f"{CVS_URL}/surface-met/variables-specific.tsv": (
+        "Variable\tAttribute\tValue\texample value\n"
+        "air_temperature\t\t\t\n\ttype\tfloat32\t\n\tdimension\ttime\t\n"
+        "\tcell_methods\t\ttime: mean\n"
+        "time\t\t\t\n\ttype\tfloat64\t\n"
+    ),
+    f"{VOCABS_URL}/ncas-instrument-name-and-descriptors.tsv": (
+        "New Instrument Name\tDescriptor\tMobile/Fixed (loc)\tManufacturer"
+        "\tModel No.\tSerial Number\tData Product(s)\n"
+        "ncas-aws-10\tWeather station\tfixed - iao\tCampbell\tCR1000\tA1"
+        "\tsurface-met, mean-winds\n"
+    ),
+}
+
+
+@pytest.fixture
+def github():
+    with requests_mock.Mocker() as m:
+        m.get(requests_mock.ANY, status_code=404)
+        m.get("https://github.com/ncasuk/AMF_CVs/releases/v2.0.0", text="release")
+        m.get(
+            "https://github.com/ncasuk/ncas-data-instrument-vocabs/releases/latest",
+            status_code=302,
+            headers={
+                "Location": "https://github.com/ncasuk/ncas-data-instrument-vocabs"
+                "/releases/tag/v2.0.0"
+            },
+        )
+        m.get(
+            "https://github.com/ncasuk/ncas-data-instrument-vocabs/releases/tag/v2.0.0",
+            text="release",
+        )
+        for url, text in TSV_FILES.items():
+            m.get(url, text=text)
+        yield m
+
+
+@pytest.fixture(autouse=True)
+def tmp_cache(tmp_path):
+    # keep tests from reading or writing the user's cache
+    cv_cache = cache.configure_cache(directory=str(tmp_path / "cache"))
+    yield cv_cache
+    cache.configure_cache()
+
+
+@pytest.fixture(autouse=True)
+def clear_versions():
+    # release versions found in one test shouldn't leak into the next
+    values.clear_version_memo()
+    yield
+    values.clear_version_memo()
+
+
+@pytest.fixture(autouse=True)
+def clear_indexes():
+    cv_index.clear_index_memo()
+    yield
+    cv_index.clear_index_memo()
+
+
+@pytest.fixture(autouse=True)
+def clear_file_info_templates():
+    file_info.clear_file_info_templates()
+    yield
+    file_info.clear_file_info_templates()
+
+
+@pytest.fixture(autouse=True)
+def clear_instrument_indexes():
+    tsv2dict.clear_instrument_indexes()
+    yield
+    tsv2dict.clear_instrument_indexes()
+
+
+@pytest.fixture(autouse=True)
+def clear_product_variables():
+    remove_empty_variables.clear_product_variables_memo()
+    yield
+    remove_empty_variables.clear_product_variables_memo()
@@ -0,0 +1,191 @@
+import os
+import runpy
+import sys
+
+import pytest
+from conftest import CVS_URL, TSV_FILES, VOCABS_URL
+from netCDF4 import Dataset
+from ncas_amof_netcdf_template import batch, create_netcdf
+
+DATES = ["20240101", "20240102", "20240103"]
+
+
+def test_date_range():
+    assert batch.date_range("20240228", "20240301") == [
+        "20240228",
+        "20240229",
+        "20240301",
+    ]
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_make_netcdfs(github, tmp_path, max_workers):
+    result = batch.make_netcdfs(
+        "ncas-aws-10",
+        DATES,
+        products="surface-met",
+        dimension_lengths={"time": 5},
+        tag="v2.0.0",
+        file_location=str(tmp_path),
+        max_workers=max_workers,
+        chunksize=2,
+    )
+    assert result.ok
+    assert sorted(result.paths) == [
+        ("ncas-aws-10", "surface-met", date) for date in DATES
+    ]
+    for date in DATES:
+        path = result.paths[("ncas-aws-10", "surface-met", date)]
+        assert os.path.basename(path) == (f"ncas-aws-10_iao_{date}_surface-met_v1.0.nc")
+        with Dataset(path) as nc:
+            assert nc.variables["air_temperature"].size == 5
+
+
+def test_make_netcdfs_with_local_files(github, tmp_path, capsys):
+    tsv_dir = tmp_path / "cvs" / "v2.0.0" / "product-definitions" / "tsv"
+    for url, text in TSV_FILES.items():
+        path = url.replace(VOCABS_URL, str(tsv_dir / "_instrument_vocabs"))
+        path = path.replace(CVS_URL, str(tsv_dir))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+    with open(tsv_dir / "_common" / "global-attributes.tsv", "w") as f:
+        f.write(
+            "Name\tDescription\tFixed Value\tExample\n"
+            "amf_vocabularies_release\trelease\t\tlocal-release\n"
+        )
+    (tmp_path / "batch").mkdir()
+    (tmp_path / "main").mkdir()
+
+    result = batch.make_netcdfs(
+        "ncas-aws-10",
+        DATES[:1],
+        products="surface-met",
+        dimension_lengths={"time": 5},
+        platform="cao",
+        tag="v2.0.0",
+        use_local_files=str(tmp_path / "cvs"),
+        file_location=str(tmp_path / "batch"),
+        max_workers=1,
+    )
+    assert result.ok, result.errors
+    assert "Changing platform for an observatory instrument" in capsys.readouterr().out
+    nc = create_netcdf.main(
+        "ncas-aws-10",
+        date=DATES[0],
+        products="surface-met",
+        dimension_lengths={"time": 5},
+        platform="cao",
+        tag="v2.0.0",
+        use_local_files=str(tmp_path / "cvs"),
+        file_location=str(tmp_path / "main"),
+    )
+    nc.close()
+    assert "Changing platform for an observatory instrument" in capsys.readouterr().out
+
+    name = f"ncas-aws-10_cao_{DATES[0]}_surface-met_v1.0.nc"
+    with (
+        Dataset(tmp_path / "batch" / name) as batch_nc,
+        Dataset(tmp_path / "main" / name) as main_nc,
+    ):
+        assert batch_nc.amf_vocabularies_release == "local-release"
+        assert main_nc.amf_vocabularies_release == "local-release"
+
+
+# batch is already imported by the tests above when it is run as a script
+@pytest.mark.filterwarnings(
+    "ignore:'ncas_amof_netcdf_template.batch' found:RuntimeWarning"
+)
+def test_command_line(github, tmp_path, monkeypatch):
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "batch.py",
+            "ncas-aws-10",
+            "-d",
+            "20240101",
+            "-p",
+            "surface-met",
+            "-l",
+            "time",
+            "5",
+            "--platform",
+            "cao",
+            "--options",
+            "1m_test",
+            "-t",
+            "v2.0.0",
+            "-o",
+            str(out_dir),
+            "-j",
+            "1",
+        ],
+    )
+    with pytest.raises(SystemExit) as exit_info:
+        runpy.run_module("ncas_amof_netcdf_template.batch", run_name="__main__")
+    assert exit_info.value.code == 0
+    assert os.listdir(out_dir) == [
+        "ncas-aws-10_cao_20240101_surface-met_1m_test_v1.0.nc"
+    ]
+
+
+def test_make_netcdfs_reports_errors(github, tmp_path):
+    result = batch.make_netcdfs(
+        ["ncas-aws-10", "ncas-missing-1"],
+        DATES[:1],
+        tag="v2.0.0",
+        file_location=str(tmp_path),
+        max_workers=1,
+    )
+    assert not result.ok
+    # instrument's products are read from the instrument vocabulary, but no time
+    # dimension length was given
+    assert set(result.errors) == {
+        ("ncas-aws-10", "surface-met", "20240101"),
+        ("ncas-aws-10", "mean-winds", "20240101"),
+        ("ncas-missing-1", "", ""),
+    }
+    assert "dimension time" in str(
+        result.errors[("ncas-aws-10", "surface-met", "20240101")]
+    )
+    assert result.paths == {}
+
+
+def test_template_matches_make_netcdf(github, tmp_path):
+    template_dir = tmp_path / "template"
+    scratch_dir = tmp_path / "scratch"
+    for directory, use_template in [(template_dir, True), (scratch_dir, False)]:
+        directory.mkdir()
+        result = batch.make_netcdfs(
+            "ncas-aws-10",
+            DATES,
+            products="surface-met",
+            dimension_lengths={"time": 5},
+            tag="v2.0.0",
+            file_location=str(directory),
+            max_workers=1,
+            compression="zlib",
+            use_template=use_template,
+        )
+        assert result.ok
+    # template is removed once files are made
+    assert sorted(os.listdir(template_dir)) == sorted(os.listdir(scratch_dir))
+
+    for filename in os.listdir(scratch_dir):
+        with (
+            Dataset(template_dir / filename) as copied,
+            Dataset(scratch_dir / filename) as made,
+        ):
+            assert copied.ncattrs() == made.ncattrs()
+            for attr in copied.ncattrs():
+                if attr not in ["history", "last_revised_date"]:
+                    assert copied.getncattr(attr) == made.getncattr(attr)
+            assert copied.getncattr("history").endswith(made.getncattr("history")[19:])
+            assert copied.dimensions.keys() == made.dimensions.keys()
+            for name, var in made.variables.items():
+                assert copied[name].dimensions == var.dimensions
+                assert copied[name].filters() == var.filters()
+                assert copied[name].__dict__ == var.__dict__
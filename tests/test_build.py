@@ -1,3 +1,7 @@
+import subprocess
+import sys
+
+
 def test_check_requirements():
     with open("pyproject.toml") as f:
         p_data = f.read()
@@ -11,3 +15,20 @@ def test_check_requirements():
     )
     requirements_requirements = r_data.strip().replace(" ", "").split("\n")
     assert set(pyproject_requirements) == set(requirements_requirements)
+
+
+def test_import_is_lazy():
+    # importing the package, or only values, shouldn't import large dependencies
+    script = (
+        "import sys\n"
+        "import ncas_amof_netcdf_template as nant\n"
+        "from ncas_amof_netcdf_template import values\n"
+        "print(','.join(m for m in ['netCDF4', 'numpy', 'pandas', 'requests',"
+        " 'yaml'] if m in sys.modules))\n"
+        "nant.util\n"
+        "print('numpy' in sys.modules)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.split("\n")[:2] == ["", "True"]
@@ -0,0 +1,284 @@
+import io
+import os
+import zipfile
+import pytest
+import requests
+import requests_mock
+from ncas_amof_netcdf_template import cache
+
+TSV_URL = (
+    "https://raw.githubusercontent.com/ncasuk/AMF_CVs/v2.0.0"
+    "/product-definitions/tsv/_common/global-attributes.tsv"
+)
+ARCHIVE_URL = "https://github.com/ncasuk/AMF_CVs/archive/refs/tags/v2.0.0.zip"
+
+
+def make_archive(files):
+    content = io.BytesIO()
+    with zipfile.ZipFile(content, "w") as zf:
+        zf.writestr("AMF_CVs-2.0.0/", "")
+        for path, text in files.items():
+            zf.writestr(f"AMF_CVs-2.0.0/{path}", text)
+    return content.getvalue()
+
+
+def test_split_github_url():
+    assert cache.split_github_url(TSV_URL) == (
+        "ncasuk/AMF_CVs",
+        "v2.0.0",
+        "product-definitions/tsv/_common/global-attributes.tsv",
+    )
+    assert cache.split_github_url("/local/path/global-attributes.tsv") is None
+    assert cache.split_github_url("https://raw.githubusercontent.com/ncasuk") is None
+    assert (
+        cache.split_github_url(
+            "https://raw.githubusercontent.com/ncasuk/AMF_CVs/v2.0.0/../secret.tsv"
+        )
+        is None
+    )
+
+
+def test_is_pinned_tag():
+    assert cache.is_pinned_tag("v2.0.0")
+    assert cache.is_pinned_tag("2.1")
+    assert not cache.is_pinned_tag("main")
+    assert not cache.is_pinned_tag("latest")
+
+
+def test_cache_get_put(tmp_cache):
+    assert tmp_cache.get("ncasuk/AMF_CVs", "v2.0.0", "a/b.tsv") is None
+    tmp_cache.put("ncasuk/AMF_CVs", "v2.0.0", "a/b.tsv", b"Name\tValue\n")
+    assert tmp_cache.get("ncasuk/AMF_CVs", "v2.0.0", "a/b.tsv") == b"Name\tValue\n"
+    assert tmp_cache.contains("ncasuk/AMF_CVs", "v2.0.0", "a/b.tsv")
+    assert tmp_cache.has_tag("ncasuk/AMF_CVs", "v2.0.0")
+    assert not tmp_cache.has_tag("ncasuk/AMF_CVs", "v2.1.0")
+    stats = tmp_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["files"] == 1
+    assert stats["size"] == len(b"Name\tValue\n")
+
+    tmp_cache.clear()
+    assert tmp_cache.stats() == {"hits": 0, "misses": 0, "files": 0, "size": 0}
+
+
+def test_cache_get_file_evicted_by_other_process(tmp_cache, monkeypatch):
+    tmp_cache.put("ncasuk/AMF_CVs", "v2.0.0", "a.tsv", b"a")
+
+    # another process removes the file after it has been read
+    def utime(path):
+        os.remove(path)
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(cache.os, "utime", utime)
+    assert tmp_cache.get("ncasuk/AMF_CVs", "v2.0.0", "a.tsv") == b"a"
+
+
+def test_cache_evicts_least_recently_used(tmp_cache):
+    tmp_cache.max_size = 25
+    tmp_cache.put("ncasuk/AMF_CVs", "v2.0.0", "first.tsv", b"0123456789")
+    tmp_cache.put("ncasuk/AMF_CVs", "v2.0.0", "second.tsv", b"0123456789")
+    # make "first.tsv" older, then use it so "second.tsv" is least recently used
+    for name, mtime in [("first.tsv", 1000), ("second.tsv", 2000)]:
+        os.utime(tmp_cache._file_path("ncasuk/AMF_CVs", "v2.0.0", name), (mtime, mtime))
+    tmp_cache.get("ncasuk/AMF_CVs", "v2.0.0", "first.tsv")
+    tmp_cache.put("ncasuk/AMF_CVs", "v2.0.0", "third.tsv", b"0123456789")
+
+    assert tmp_cache.contains("ncasuk/AMF_CVs", "v2.0.0", "first.tsv")
+    assert not tmp_cache.contains("ncasuk/AMF_CVs", "v2.0.0", "second.tsv")
+    assert tmp_cache.contains("ncasuk/AMF_CVs", "v2.0.0", "third.tsv")
+    assert tmp_cache.size() <= 25
+
+
+def test_cache_evicts_only_when_too_large(tmp_cache, monkeypatch):
+    tmp_cache.max_size = 25
+    walks = []
+    walk = os.walk
+
+    def count_walks(directory):
+        walks.append(directory)
+        return walk(directory)
+
+    monkeypatch.setattr(cache.os, "walk", count_walks)
+    # size of cache is only found once, then kept up to date
+    tmp_cache.put("ncasuk/AMF_CVs", "v2.0.0", "first.tsv", b"0123456789")
+    tmp_cache.put("ncasuk/AMF_CVs", "v2.0.0", "first.tsv", b"0123456789")
+    tmp_cache.put("ncasuk/AMF_CVs", "v2.0.0", "second.tsv", b"0123456789")
+    assert len(walks) == 1
+    tmp_cache.put("ncasuk/AMF_CVs", "v2.0.0", "third.tsv", b"0123456789")
+    assert len(walks) == 2
+    assert tmp_cache.size() <= 25
+
+
+def test_cache_evicts_headers_with_files(tmp_cache):
+    tmp_cache.max_size = 100
+    repo = "ncasuk/AMF_CVs"
+    tmp_cache.put(repo, "main", "old.tsv", b"0123456789", {"ETag": '"abc"'})
+    old_path = tmp_cache._file_path(repo, "main", "old.tsv")
+    os.utime(old_path, (1000, 1000))
+    # headers left by a file removed before they were removed with it
+    orphan_path = tmp_cache._validators_path(repo, "main", "gone.tsv")
+    with open(orphan_path, "w") as f:
+        f.write("{}")
+    # another process is writing this file
+    tmp_path = tmp_cache._file_path(repo, "v2.0.0", "new.tsv.123.tmp")
+    os.makedirs(os.path.dirname(tmp_path))
+    with open(tmp_path, "wb") as f:
+        f.write(b"0" * 200)
+
+    tmp_cache.put(repo, "v2.0.0", "new.tsv", b"0" * 95)
+
+    assert not os.path.exists(old_path)
+    assert not os.path.exists(f"{old_path}.validators")
+    assert not os.path.exists(orphan_path)
+    assert os.path.exists(tmp_path)
+    assert tmp_cache.contains(repo, "v2.0.0", "new.tsv")
+
+
+def test_fetch_uses_cache_for_pinned_tags(tmp_cache):
+    branch_url = TSV_URL.replace("v2.0.0", "main")
+    with requests_mock.Mocker() as m:
+        m.get(TSV_URL, text="Name\tValue\n")
+        m.get(branch_url, text="Name\tValue\n")
+        assert cache.fetch(TSV_URL) == b"Name\tValue\n"
+        assert cache.fetch(TSV_URL) == b"Name\tValue\n"
+        assert cache.fetch(branch_url) == b"Name\tValue\n"
+        assert cache.fetch(branch_url) == b"Name\tValue\n"
+        assert m.call_count == 3
+    assert tmp_cache.hits == 1
+    assert tmp_cache.misses == 1
+    assert cache.is_cached(TSV_URL)
+    assert not cache.is_cached(branch_url)
+
+
+def test_fetch_with_cache_disabled():
+    cache.configure_cache(enabled=False)
+    assert cache.get_cache() is None
+    with requests_mock.Mocker() as m:
+        m.get(TSV_URL, text="Name\tValue\n")
+        cache.fetch(TSV_URL)
+        cache.fetch(TSV_URL)
+        assert m.call_count == 2
+
+
+def test_read_tsv():
+    with requests_mock.Mocker() as m:
+        m.get(TSV_URL, text="Name\tValue\nattr1\tvalue1\n")
+        df = cache.read_tsv(TSV_URL)
+    assert list(df["Name"]) == ["attr1"]
+    assert list(df["Value"]) == ["value1"]
+
+
+def test_load_tsv(tmp_path):
+    missing_url = TSV_URL.replace("global-attributes", "missing")
+    with requests_mock.Mocker() as m:
+        m.get(TSV_URL, text="Name\tValue\nattr1\tvalue1\n")
+        m.get(missing_url, status_code=404)
+        rows = cache.load_tsv(TSV_URL)
+        assert cache.load_tsv(missing_url) is None
+        assert m.call_count == 2
+    assert rows == [{"Name": "attr1", "Value": "value1"}]
+
+    local_file = tmp_path / "global-attributes.tsv"
+    local_file.write_text("Name\tValue\nattr2\tvalue2\n")
+    assert cache.load_tsv(str(local_file)) == [{"Name": "attr2", "Value": "value2"}]
+    assert cache.load_tsv(str(tmp_path / "missing.tsv")) is None
+
+
+def test_fetch_from_tag_archive(tmp_cache):
+    cache.configure_cache(directory=tmp_cache.directory, use_archives=True)
+    dims_url = TSV_URL.replace("global-attributes", "dimensions-land")
+    archive = make_archive(
+        {
+            "product-definitions/tsv/_common/global-attributes.tsv": "Name\tValue\n",
+            "product-definitions/tsv/_common/dimensions-land.tsv": "Name\tLength\n",
+        }
+    )
+    with requests_mock.Mocker() as m:
+        m.get(ARCHIVE_URL, content=archive)
+        assert cache.fetch(TSV_URL) == b"Name\tValue\n"
+        assert cache.fetch(dims_url) == b"Name\tLength\n"
+        assert cache.load_tsv(TSV_URL.replace("global-attributes", "missing")) is None
+        assert m.call_count == 1
+    assert cache.is_cached(dims_url)
+    assert not cache.is_cached(TSV_URL.replace("global-attributes", "missing"))
+
+    # archives are never downloaded just to check what is cached, even if there
+    # are files from the tag in the cache
+    other_tag_url = TSV_URL.replace("v2.0.0", "v2.0.1")
+    tmp_cache.put(
+        "ncasuk/AMF_CVs", "v2.0.1", "product-definitions/tsv/_common/x.tsv", b""
+    )
+    with requests_mock.Mocker() as m:
+        assert not cache.is_cached(other_tag_url)
+        assert m.call_count == 0
+
+    # archive is kept in the cache for later sessions
+    cache.configure_cache(directory=tmp_cache.directory, use_archives=True)
+    with requests_mock.Mocker() as m:
+        assert cache.fetch(TSV_URL) == b"Name\tValue\n"
+        assert m.call_count == 0
+
+
+def test_fetch_from_missing_tag_archive(tmp_cache):
+    cache.configure_cache(directory=tmp_cache.directory, use_archives=True)
+    missing_tag_url = TSV_URL.replace("v2.0.0", "v9.9.9")
+    with requests_mock.Mocker() as m:
+        m.get(requests_mock.ANY, status_code=404)
+        assert cache.load_tsv(missing_tag_url) is None
+        assert cache.fetch(missing_tag_url, missing_ok=True) is None
+        with pytest.raises(requests.HTTPError):
+            cache.fetch(missing_tag_url)
+
+
+def test_tag_archive_paths():
+    archive = cache.TagArchive(
+        make_archive({"README.md": "", "product-definitions/tsv/a.tsv": ""})
+    )
+    assert archive.paths("product-definitions/") == ["product-definitions/tsv/a.tsv"]
+    assert "README.md" in archive
+    assert archive.read("missing.tsv") is None
+
+
+def test_fetch_revalidates_branches(tmp_cache):
+    branch_url = TSV_URL.replace("v2.0.0", "main")
+    with requests_mock.Mocker() as m:
+        m.get(
+            branch_url,
+            [
+                {"text": "Name\tValue\n", "headers": {"ETag": '"abc"'}},
+                {"status_code": 304},
+                {"text": "Name\tValue\nattr1\tvalue1\n", "headers": {"ETag": '"def"'}},
+            ],
+        )
+        assert cache.fetch(branch_url) == b"Name\tValue\n"
+        assert "If-None-Match" not in m.request_history[0].headers
+        assert cache.fetch(branch_url) == b"Name\tValue\n"
+        assert m.request_history[1].headers["If-None-Match"] == '"abc"'
+        assert cache.fetch(branch_url) == b"Name\tValue\nattr1\tvalue1\n"
+        assert m.request_history[2].headers["If-None-Match"] == '"abc"'
+        assert m.call_count == 3
+    assert tmp_cache.hits == 1
+    assert tmp_cache.get_validated(
+        "ncasuk/AMF_CVs", "main", TSV_URL.split("v2.0.0/")[1]
+    ) == (
+        b"Name\tValue\nattr1\tvalue1\n",
+        {"ETag": '"def"'},
+    )
+    assert not cache.is_cached(branch_url)
+
+
+def test_fetch_revalidates_with_last_modified(tmp_cache):
+    branch_url = TSV_URL.replace("v2.0.0", "main")
+    last_modified = "Mon, 12 Oct 2026 10:00:00 GMT"
+    with requests_mock.Mocker() as m:
+        m.get(
+            branch_url,
+            [
+                {"text": "Name\tValue\n", "headers": {"Last-Modified": last_modified}},
+                {"status_code": 304},
+            ],
+        )
+        cache.fetch(branch_url)
+        assert cache.fetch(branch_url) == b"Name\tValue\n"
+        assert m.request_history[1].headers["If-Modified-Since"] == last_modified
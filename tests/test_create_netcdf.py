@@ -525,3 +525,71 @@ def test_make_product_netcdf():
     # Clean up
     nc.close()
     os.remove("instrument1_location1_20221117_product1_v1.0.nc")
+
+
+def test_creation_plan(tmp_path, monkeypatch):
+    (tmp_path / "_common").mkdir()
+    (tmp_path / "_common" / "global-attributes.tsv").write_text(
+        "Name\tDescription\tFixed Value\tExample\n"
+        "amf_vocabularies_release\trelease\t\thttps://example.com/v2.0.0\n"
+    )
+    tsv_reads = []
+    tsv2dict_attrs = nant.tsv2dict.tsv2dict_attrs
+    monkeypatch.setattr(
+        nant.tsv2dict,
+        "tsv2dict_attrs",
+        lambda tsv_file: tsv_reads.append(tsv_file) or tsv2dict_attrs(tsv_file),
+    )
+
+    file_info = nant.file_info.FileInfo(
+        "instrument-name", "product1", tag="v2.0.0", use_local_files=str(tmp_path)
+    )
+    file_info.instrument_data = {"Mobile/Fixed (loc)": "fixed - cao"}
+    for name in ["amf_vocabularies_release", "history", "platform"]:
+        file_info.attributes[name] = {"Fixed Value": ""}
+    file_info.dimensions = {"time": {"Length": 5}}
+    file_info.variables = {
+        "qc_flag": {
+            "type": "byte",
+            "dimension": "time",
+            "flag_values": "0b,1b,",
+            "flag_meanings": "not_used|good_data",
+        }
+    }
+
+    plan = nant.create_netcdf.CreationPlan(
+        file_info,
+        use_local_files=str(tmp_path),
+        chunk_by_dimension={"time": 5},
+        compression="zlib",
+    )
+    assert plan.volatile_attributes == ["history"]
+    for date in ["20240101", "20240102"]:
+        ncfile = plan.make_netcdf(date, file_location=str(tmp_path))
+        assert ncfile.filepath().endswith(
+            f"instrument-name_cao_{date}_product1_v1.0.nc"
+        )
+        assert ncfile.platform == "cao"
+        assert ncfile.amf_vocabularies_release == "https://example.com/v2.0.0"
+        assert "File created by" in ncfile.history
+        assert ncfile["qc_flag"].chunking() == [5]
+        assert ncfile["qc_flag"].filters()["zlib"]
+        assert list(ncfile["qc_flag"].flag_values) == [0, 1]
+        assert ncfile["qc_flag"].flag_meanings == "not_used good_data"
+        ncfile.close()
+    # local tsv file only read once, and definitions not changed
+    assert len(tsv_reads) == 1
+    assert file_info.instrument_data["Mobile/Fixed (loc)"] == "fixed - cao"
+    assert "chunksizes" not in file_info.variables["qc_flag"]
+
+    plan = nant.create_netcdf.CreationPlan(
+        file_info, use_local_files=str(tmp_path), unlimited_dimension="time"
+    )
+    ncfile = plan.make_netcdf("20240103", file_location=str(tmp_path))
+    assert ncfile.dimensions["time"].isunlimited()
+    assert len(ncfile.dimensions["time"]) == 0
+    with nant.util.RecordWriter(ncfile) as writer:
+        writer.append({"qc_flag": [1, 1]})
+        writer.append({"qc_flag": [0]})
+    assert list(ncfile["qc_flag"][:]) == [1, 1, 0]
+    ncfile.close()
@@ -0,0 +1,121 @@
+from conftest import VOCABS_URL
+from ncas_amof_netcdf_template import cache
+from ncas_amof_netcdf_template import create_netcdf, cv_index, file_info, tsv2dict
+from ncas_amof_netcdf_template import values
+
+
+def test_load_all_matches_serial_loading(github):
+    serial = file_info.FileInfo("ncas-aws-10", "surface-met", tag="v2.0.0")
+    serial.get_product_info()
+    serial.get_deployment_info()
+    serial.get_instrument_info()
+    serial.get_common_info()
+
+    concurrent = file_info.FileInfo("ncas-aws-10", "surface-met", tag="v2.0.0")
+    concurrent.load_all()
+
+    for prop in ["attributes", "dimensions", "variables", "instrument_data"]:
+        assert getattr(concurrent, prop) == getattr(serial, prop)
+        assert list(getattr(concurrent, prop)) == list(getattr(serial, prop))
+    assert concurrent.variables["air_temperature"]["cell_methods"] == (
+        "EXAMPLE: time: mean"
+    )
+    assert concurrent.dimensions["latitude"]["Length"] == 1
+    assert concurrent.instrument_data["Data Product(s)"] == [
+        "surface-met",
+        "mean-winds",
+    ]
+    # common tsv file read last, so overrides product-specific attribute
+    assert concurrent.attributes["source"]["Description"] == "source of data"
+
+
+def test_load_from_index_matches_load_all(github, tmp_path):
+    loaded = file_info.FileInfo("ncas-aws-10", "surface-met", tag="v2.0.0")
+    loaded.load_all()
+
+    indexed = file_info.FileInfo("ncas-aws-10", "surface-met", tag="v2.0.0")
+    indexed.load_from_index()
+    for prop in ["attributes", "dimensions", "variables", "instrument_data"]:
+        assert getattr(indexed, prop) == getattr(loaded, prop)
+        assert list(getattr(indexed, prop)) == list(getattr(loaded, prop))
+
+    # changing file info doesn't change the index
+    indexed.variables["time"]["type"] = "int32"
+    indexed.instrument_data["Mobile/Fixed (loc)"] = "iao"
+    index = cv_index.get_index("v2.0.0")
+    assert index.deployment_modes["land"]["variables"]["time"]["type"] == "float64"
+    assert index.instrument_info("ncas-aws-10")["Mobile/Fixed (loc)"] == "fixed - iao"
+
+    # index is saved in cache, so no tsv files are read again, and the release of
+    # the instrument vocabs isn't looked up
+    cv_index.clear_index_memo()
+    values.clear_version_memo()
+    github.reset_mock()
+    from_cache = file_info.FileInfo("ncas-aws-10", "surface-met", tag="v2.0.0")
+    from_cache.load_from_index()
+    assert from_cache.variables == loaded.variables
+    assert not [r for r in github.request_history if r.url.endswith(".tsv")]
+    assert not [r for r in github.request_history if "/releases/" in r.url]
+
+    index.save(str(tmp_path / "index.pickle"))
+    saved = cv_index.CVIndex.load(str(tmp_path / "index.pickle"))
+    assert saved.products == index.products
+    assert saved.instruments == index.instruments
+
+
+def test_get_index_remembers_only_pinned_tags(monkeypatch):
+    compiled = []
+
+    def fake_compile_index(tag="latest", use_local_files=None):
+        compiled.append(tag)
+        return cv_index.CVIndex(tag, tag, {}, {}, {})
+
+    monkeypatch.setattr(cv_index, "compile_index", fake_compile_index)
+    for _ in range(2):
+        cv_index.get_index("main")
+        cv_index.get_index("v2.0.0")
+        cv_index.get_index("main", use_local_files="/local")
+    assert compiled == ["main", "v2.0.0", "main", "main"]
+
+
+def test_get_file_info_reuses_template(github, tmp_path):
+    for date in ["20240101", "20240102"]:
+        nc = create_netcdf.main(
+            "ncas-aws-10",
+            date=date,
+            products="surface-met",
+            tag="v2.0.0",
+            file_location=str(tmp_path),
+            dimension_lengths={"time": 5},
+            chunk_by_dimension={"time": 5},
+            platform="cvao",
+        )
+        assert nc.variables["air_temperature"].chunking() == [5]
+        assert f"_cvao_{date}_" in nc.filepath()
+        nc.close()
+        if date == "20240101":
+            tsv_requests = github.call_count
+    # tsv files only read for the first file
+    assert github.call_count == tsv_requests
+
+    fresh = file_info.get_file_info("ncas-aws-10", "surface-met", tag="v2.0.0")
+    assert fresh.dimensions["time"]["Length"] == "<i>"
+    assert "chunksizes" not in fresh.variables["air_temperature"]
+    assert fresh.instrument_data["Mobile/Fixed (loc)"] == "fixed - iao"
+
+
+def test_instrument_index_read_once(github, capsys):
+    ncas_url = f"{VOCABS_URL}/ncas-instrument-name-and-descriptors.tsv"
+    cache.configure_cache(enabled=False)
+    for instrument in ["ncas-aws-10", "ncas-aws-10", "ncas-missing-1"]:
+        fi = file_info.FileInfo(instrument, "surface-met", tag="v2.0.0")
+        fi.get_instrument_info()
+    assert "No details found for instrument ncas-missing-1" in capsys.readouterr().out
+    assert [r.url for r in github.request_history].count(ncas_url) == 1
+
+    # changing the returned instruments doesn't change the index
+    instruments = tsv2dict.tsv2dict_instruments(ncas_url)
+    instruments["ncas-aws-10"]["Data Product(s)"].append("new-product")
+    index = tsv2dict.get_instrument_index(ncas_url)
+    assert index["ncas-aws-10"]["Data Product(s)"] == ["surface-met", "mean-winds"]
+    assert [r.url for r in github.request_history].count(ncas_url) == 1
@@ -0,0 +1,245 @@
+import json
+
+import numpy as np
+import pytest
+from netCDF4 import Dataset
+from ncas_amof_netcdf_template import remove_empty_variables
+
+JSON_URL = "https://raw.githubusercontent.com/ncasuk/AMF_CVs/v2.0.0/AMF_CVs"
+
+
+def make_file(path, air_temperature=None):
+    with Dataset(path, "w", format="NETCDF4_CLASSIC") as nc:
+        nc.title = "test file"
+        nc.createDimension("time", 4)
+        nc.createVariable("time", "f8", ("time",))[:] = np.arange(4)
+        var = nc.createVariable(
+            "air_temperature", "f4", ("time",), fill_value=-1e20, chunksizes=(2,)
+        )
+        var.units = "K"
+        if air_temperature is not None:
+            var[:] = air_temperature
+    return str(path)
+
+
+@pytest.fixture
+def product_json(github):
+    github.get(f"{JSON_URL}/AMF_product.json", json={"product": ["surface-met"]})
+    github.get(
+        f"{JSON_URL}/AMF_product_surface-met_variable.json",
+        json={"product_surface-met_variable": {"air_temperature": {"units": "K"}}},
+    )
+    return github
+
+
+def test_get_product_variables_metadata(product_json):
+    variables, var_dict = remove_empty_variables.get_product_variables_metadata(
+        "surface-met", tag="v2.0.0"
+    )
+    assert variables == ["air_temperature"]
+    var_dict["air_temperature"]["units"] = "changed"
+    # only fetched once, and not changed by the caller
+    variables, var_dict = remove_empty_variables.get_product_variables_metadata(
+        "surface-met", tag="v2.0.0"
+    )
+    assert var_dict == {"air_temperature": {"units": "K"}}
+    assert len(product_json.request_history) == 2
+
+
+@pytest.mark.parametrize("source", ["json", "tsv"])
+def test_get_product_variables_metadata_local(github, tmp_path, source):
+    if source == "json":
+        json_dir = tmp_path / "v2.0.0" / "AMF_CVs"
+        json_dir.mkdir(parents=True)
+        (json_dir / "AMF_product.json").write_text(
+            json.dumps({"product": ["surface-met"]})
+        )
+        (json_dir / "AMF_product_surface-met_variable.json").write_text(
+            json.dumps(
+                {"product_surface-met_variable": {"air_temperature": {"units": "K"}}}
+            )
+        )
+    else:
+        tsv_dir = tmp_path / "v2.0.0" / "product-definitions" / "tsv"
+        (tsv_dir / "_vocabularies").mkdir(parents=True)
+        (tsv_dir / "surface-met").mkdir()
+        (tsv_dir / "_vocabularies" / "data-products.tsv").write_text(
+            "Data Product\tDescription\nsurface-met\tMeteorology\n"
+        )
+        (tsv_dir / "surface-met" / "variables-specific.tsv").write_text(
+            "Variable\tAttribute\tValue\texample value\n"
+            "air_temperature\t\t\t\n\ttype\tfloat32\t\n\tunits\tK\t\n"
+        )
+
+    variables, var_dict = remove_empty_variables.get_product_variables_metadata(
+        "surface-met", tag="v2.0.0", use_local_files=str(tmp_path)
+    )
+    assert variables == ["air_temperature"]
+    assert var_dict["air_temperature"]["units"] == "K"
+    with pytest.raises(ValueError, match="product unknown is not in"):
+        remove_empty_variables.get_product_variables_metadata(
+            "unknown", tag="v2.0.0", use_local_files=str(tmp_path)
+        )
+    with pytest.raises(ValueError, match="'tag' version must be specified"):
+        remove_empty_variables.get_product_variables_metadata(
+            "surface-met", use_local_files=str(tmp_path)
+        )
+
+    path = make_file(tmp_path / "ncas-aws-10_iao_20240101_surface-met_v1.0.nc")
+    report = remove_empty_variables.remove_from_files(
+        [path], tag="v2.0.0", use_local_files=str(tmp_path), max_workers=1
+    )
+    assert report.removed == {path: ["air_temperature"]}
+    assert github.request_history == []
+
+
+def test_main(product_json, tmp_path):
+    path = make_file(tmp_path / "ncas-aws-10_iao_20240101_surface-met_v1.0.nc")
+    removed = remove_empty_variables.main(path, tag="v2.0.0")
+    assert removed == ["air_temperature"]
+    with Dataset(path) as nc:
+        assert list(nc.variables) == ["time"]
+        assert nc.title == "test file"
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_remove_from_files(product_json, tmp_path, max_workers):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    empty = [
+        make_file(data_dir / f"ncas-aws-10_iao_2024010{i}_surface-met_v1.0.nc")
+        for i in range(1, 4)
+    ]
+    full = make_file(
+        tmp_path / "ncas-aws-10_iao_20240104_surface-met_v1.0.nc",
+        air_temperature=[280, 281, 282, 283],
+    )
+    unknown = make_file(tmp_path / "ncas-aws-10_iao_20240104_unknown_v1.0.nc")
+    badly_named = make_file(tmp_path / "badly-named.nc")
+
+    report = remove_empty_variables.remove_from_files(
+        [str(data_dir), str(tmp_path / "*_v1.0.nc"), badly_named, full],
+        tag="v2.0.0",
+        max_workers=max_workers,
+        chunksize=2,
+    )
+    assert not report.ok
+    assert report.removed == {
+        **{path: ["air_temperature"] for path in empty},
+        full: [],
+    }
+    assert sorted(report.errors) == [badly_named, unknown]
+    assert "4 files, 2 errors" in report.summary()
+    # variables for each product only fetched once
+    assert [r.url for r in product_json.request_history].count(
+        f"{JSON_URL}/AMF_product_surface-met_variable.json"
+    ) == 1
+    with Dataset(empty[0]) as nc:
+        assert list(nc.variables) == ["time"]
+    with Dataset(full) as nc:
+        assert list(nc["air_temperature"][:]) == [280, 281, 282, 283]
+        assert nc["air_temperature"].chunking() == [2]
+
+
+def test_find_empty_variables(tmp_path, monkeypatch):
+    # read one row of chunks at a time
+    monkeypatch.setattr(remove_empty_variables, "_EMPTY_CHECK_BYTES", 1)
+    with Dataset(tmp_path / "test.nc", "w") as nc:
+        nc.createDimension("time", 6)
+        nc.createDimension("index", 2)
+        for name in ["unwritten", "fill", "last_chunk"]:
+            nc.createVariable(name, "f4", ("time", "index"), chunksizes=(2, 2))
+        nc["fill"][:] = np.ma.masked
+        nc["last_chunk"][5, 1] = 1.0
+        nc.createVariable("qc_flag", "i1", ("time",))[:2] = [1, 1]
+        missing = nc.createVariable("missing", "i2", ("time",), fill_value=-1)
+        missing.missing_value = np.array([7, 8], dtype="i2")
+        missing[:] = [7, 8, 7, 8, -1, -1]
+        out_of_range = nc.createVariable("out_of_range", "f8", ("time",))
+        out_of_range.valid_range = np.array([0.0, 1.0])
+        out_of_range[:] = [-1, 2, -1, 2, -1, 2]
+        nc.createVariable("name", str, ("time",))[0] = "a"
+        derived = nc.createVariable("derived", "f4", ("time",))
+        derived.setncattr_string("valid_min", "<derived from file>")
+        derived[:] = np.arange(6)
+
+    with Dataset(tmp_path / "test.nc") as nc:
+        variables = list(nc.variables)
+        assert remove_empty_variables._find_empty_variables(nc, variables) == [
+            "unwritten",
+            "fill",
+            "missing",
+            "out_of_range",
+            "derived",
+        ]
+        # gives the same answer as reading the whole of each variable
+        for name in variables:
+            if name != "derived":
+                assert remove_empty_variables._has_data(nc[name]) == (
+                    not np.all(np.ma.getmaskarray(nc[name][:]))
+                )
+
+
+def test_copy_keeps_layout(tmp_path):
+    data = np.arange(60, dtype="f4").reshape(12, 5)
+    with Dataset(tmp_path / "in.nc", "w", format="NETCDF4_CLASSIC") as nc:
+        nc.createDimension("time", None)
+        nc.createDimension("index", 5)
+        var = nc.createVariable(
+            "var",
+            "f4",
+            ("time", "index"),
+            compression="zlib",
+            complevel=6,
+            shuffle=False,
+            chunksizes=(4, 5),
+            fill_value=-1.0,
+        )
+        var.scale_factor = np.float32(2.0)
+        var[:] = data
+        var[3, 2] = np.ma.masked
+        nc.createVariable("empty", "f4", ("time",))
+
+    with Dataset(tmp_path / "in.nc") as nc:
+        # one chunk at a time
+        remove_empty_variables._copy_without(
+            nc, str(tmp_path / "out.nc"), ["empty"], max_memory=1
+        )
+
+    with Dataset(tmp_path / "in.nc") as src, Dataset(tmp_path / "out.nc") as dst:
+        assert list(dst.variables) == ["var"]
+        assert dst.dimensions["time"].isunlimited()
+        assert dst["var"].chunking() == [4, 5]
+        filters = dst["var"].filters()
+        assert filters["zlib"] and filters["complevel"] == 6
+        assert not filters["shuffle"]
+        assert dst["var"].scale_factor == 2.0
+        assert np.ma.allequal(dst["var"][:], src["var"][:])
+        assert np.ma.getmaskarray(dst["var"][:]).sum() == 1
+
+
+def test_unallocated_variables(tmp_path, monkeypatch):
+    pytest.importorskip("h5py")
+    with Dataset(tmp_path / "test.nc", "w") as nc:
+        nc.createDimension("time", 4)
+        nc.createVariable("written", "f4", ("time",))[:] = [1, 2, 3, 4]
+        nc.createVariable("unwritten", "f4", ("time",))
+
+    assert remove_empty_variables._unallocated_variables(
+        str(tmp_path / "test.nc"), ["written", "unwritten", "not_in_file"]
+    ) == {"unwritten"}
+
+    # unwritten variables are found without reading them
+    checked = []
+    has_data = remove_empty_variables._has_data
+
+    def spy(variable):
+        checked.append(variable.name)
+        return has_data(variable)
+
+    monkeypatch.setattr(remove_empty_variables, "_has_data", spy)
+    with Dataset(tmp_path / "test.nc") as nc:
+        assert remove_empty_variables._find_empty_variables(
+            nc, ["written", "unwritten"]
+        ) == ["unwritten"]
+    assert checked == ["written"]
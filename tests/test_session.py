@@ -0,0 +1,98 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from ncas_amof_netcdf_template import session
+
+
+@pytest.fixture
+def default_session():
+    yield
+    session.configure_session()
+
+
+@pytest.fixture
+def flaky_server():
+    # fails with each of the statuses in turn, then succeeds
+    statuses = [503, 429]
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            status = statuses.pop(0) if statuses else 200
+            self.send_response(status)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/file.tsv", statuses
+    server.shutdown()
+    server.server_close()
+
+
+def test_get_session_is_shared():
+    assert session.get_session() is session.get_session()
+
+
+def test_configure_session(default_session):
+    s = session.configure_session(max_connections=4, retries=2, backoff_factor=0)
+    assert session.get_session() is s
+    adapter = s.get_adapter("https://raw.githubusercontent.com")
+    assert adapter.max_retries.total == 2
+    assert 429 in adapter.max_retries.status_forcelist
+    assert adapter._pool_maxsize == 4
+
+
+def test_get_retries(default_session, flaky_server):
+    url, statuses = flaky_server
+    session.configure_session(backoff_factor=0)
+    r = session.get(url)
+    assert r.status_code == 200
+    assert statuses == []
+
+
+def test_get_gives_up(default_session, flaky_server):
+    url, _ = flaky_server
+    session.configure_session(retries=0, backoff_factor=0)
+    assert session.get(url).status_code == 503
+
+
+def test_get_limits_concurrent_requests(default_session):
+    session.configure_session(max_concurrent=2)
+    running = []
+    most_running = []
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                running.append(self)
+                most_running.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(self)
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    threads = [threading.Thread(target=session.get, args=(url,)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    server.shutdown()
+    server.server_close()
+    assert len(most_running) == 6
+    assert max(most_running) <= 2
@@ -2,7 +2,6 @@ import pytest
 import requests
 import tempfile
 import os
-import pandas as pd
 from ncas_amof_netcdf_template import tsv2dict
 
 
@@ -54,6 +53,29 @@ def test_tsv2dict_vars_empty_file():
     os.remove(tmp_path)
 
 
+def test_tsv2dict_vars_redefined_variable():
+    # Create a temporary TSV file
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".tsv") as tmp:
+        tmp_path = tmp.name
+        tmp.write(b"Variable\tAttribute\tValue\texample value\n")
+        tmp.write(b"\tattr0\tvalue0\t\n")
+        tmp.write(b"var1\tattr1\tvalue1\t\n")
+        tmp.write(b"\tattr2\t\texample1\n")
+        tmp.write(b"var2\t\t\t\n")
+        tmp.write(b"var1\tattr3\tvalue3\t\n")
+        tmp.write(b"\tattr3\tvalue4\t\n")
+
+    # Call the tsv2dict_vars function
+    result = tsv2dict.tsv2dict_vars(tmp_path)
+
+    # Check the result - second definition of var1 replaces the first
+    assert result == {"var1": {"attr3": "value4"}, "var2": {}}
+    assert list(result) == ["var1", "var2"]
+
+    # Delete the temporary file
+    os.remove(tmp_path)
+
+
 def test_tsv2dict_dims():
     # Create a temporary TSV file
     with tempfile.NamedTemporaryFile(delete=False, suffix=".tsv") as tmp:
@@ -260,14 +282,24 @@ def test_create_attributes_tsv_url():
     )
 
 
-def test_instrument_dict():
-    # Mock the tsv2dict_instruments and tsv2dict_attrs functions to return specific dictionaries
-    tsv2dict.tsv2dict_instruments = lambda url: {
-        "instrument1": {"Data Product(s)": ["product1"]}
-    }
-    tsv2dict.tsv2dict_attrs = lambda url: {"attr1": "value1"}
-    tsv2dict.tsv2dict_dims = lambda url: {"dim1": "value1"}
-    tsv2dict.tsv2dict_vars = lambda url: {"var1": {"attr1": "value1"}}
+@pytest.fixture
+def mock_tsv_readers(monkeypatch):
+    # Mock the get_instrument_index and tsv2dict_attrs functions to return specific dictionaries
+    monkeypatch.setattr(
+        tsv2dict,
+        "get_instrument_index",
+        lambda url, missing_ok=False: {
+            "instrument1": {"Data Product(s)": ["product1"]}
+        },
+    )
+    monkeypatch.setattr(tsv2dict, "tsv2dict_attrs", lambda url: {"attr1": "value1"})
+    monkeypatch.setattr(tsv2dict, "tsv2dict_dims", lambda url: {"dim1": "value1"})
+    monkeypatch.setattr(
+        tsv2dict, "tsv2dict_vars", lambda url: {"var1": {"attr1": "value1"}}
+    )
+
+
+def test_instrument_dict(mock_tsv_readers):
 
     # Call the instrument_dict function with a tag
     result = tsv2dict.instrument_dict("instrument1")
@@ -288,7 +320,44 @@ def test_instrument_dict():
     }
 
 
-def test_product_dict_with_local_files():
+def test_instrument_dict_copies_one_instrument(tmp_path, monkeypatch):
+    vocabs = tmp_path / "_instrument_vocabs"
+    vocabs.mkdir()
+    (vocabs / "ncas-instrument-name-and-descriptors.tsv").write_text(
+        "New Instrument Name\tData Product(s)\n"
+        "ncas-aws-10\tsurface-met\n"
+        "ncas-aws-11\tsurface-met\n"
+    )
+    (vocabs / "community-instrument-name-and-descriptors.tsv").write_text(
+        "New Instrument Name\tData Product(s)\ncommunity-1\tmean-winds\n"
+    )
+    for name in ["tsv2dict_attrs", "tsv2dict_dims", "tsv2dict_vars"]:
+        monkeypatch.setattr(tsv2dict, name, lambda url: {})
+    copied = []
+    copy_instrument = tsv2dict._copy_instrument
+
+    def spy(inst_dict):
+        copied.append(inst_dict["instrument_name"])
+        return copy_instrument(inst_dict)
+
+    monkeypatch.setattr(tsv2dict, "_copy_instrument", spy)
+
+    result = tsv2dict.instrument_dict("ncas-aws-10", use_local_files=str(tmp_path))
+    assert result["info"]["Data Product(s)"] == ["surface-met"]
+    assert copied == ["ncas-aws-10"]
+    # changing the result doesn't change the index
+    result["info"]["Data Product(s)"].append("mean-winds")
+    result = tsv2dict.instrument_dict("community-1", use_local_files=str(tmp_path))
+    assert result["info"]["Data Product(s)"] == ["mean-winds"]
+    assert copied == ["ncas-aws-10", "community-1"]
+    assert tsv2dict.instrument_dict("ncas-aws-10", use_local_files=str(tmp_path))[
+        "info"
+    ]["Data Product(s)"] == ["surface-met"]
+    with pytest.raises(KeyError):
+        tsv2dict.instrument_dict("ncas-missing-1", use_local_files=str(tmp_path))
+
+
+def test_product_dict_with_local_files(mock_tsv_readers):
     # Call the product_dict function with local files
     result = tsv2dict.product_dict(
         "product1",
@@ -305,26 +374,38 @@ def test_product_dict_with_local_files():
     assert result["info"]["Mobile/Fixed (loc)"] == "loc1"
 
 
-def test_product_dict():
+def test_product_dict(mock_tsv_readers, monkeypatch):
     # Mock the get_common_dimensions_url, get_common_variables_url, get_common_attributes_url,
     # create_attributes_tsv_url, create_dimensions_tsv_url, and create_variables_tsv_url functions
-    tsv2dict.values.get_common_dimensions_url = (
-        lambda use_local_files, tag, loc: "common_dimensions_url"
+    monkeypatch.setattr(
+        tsv2dict.values,
+        "get_common_dimensions_url",
+        lambda use_local_files, tag, loc: "common_dimensions_url",
     )
-    tsv2dict.values.get_common_variables_url = (
-        lambda use_local_files, tag, loc: "common_variables_url"
+    monkeypatch.setattr(
+        tsv2dict.values,
+        "get_common_variables_url",
+        lambda use_local_files, tag, loc: "common_variables_url",
     )
-    tsv2dict.values.get_common_attributes_url = (
-        lambda use_local_files, tag: "common_attributes_url"
+    monkeypatch.setattr(
+        tsv2dict.values,
+        "get_common_attributes_url",
+        lambda use_local_files, tag: "common_attributes_url",
     )
-    tsv2dict.create_attributes_tsv_url = (
-        lambda desired_product, use_local_files, tag: "attributes_url"
+    monkeypatch.setattr(
+        tsv2dict,
+        "create_attributes_tsv_url",
+        lambda desired_product, use_local_files, tag: "attributes_url",
     )
-    tsv2dict.create_dimensions_tsv_url = (
-        lambda desired_product, use_local_files, tag: "dimensions_url"
+    monkeypatch.setattr(
+        tsv2dict,
+        "create_dimensions_tsv_url",
+        lambda desired_product, use_local_files, tag: "dimensions_url",
     )
-    tsv2dict.create_variables_tsv_url = (
-        lambda desired_product, use_local_files, tag: "variables_url"
+    monkeypatch.setattr(
+        tsv2dict,
+        "create_variables_tsv_url",
+        lambda desired_product, use_local_files, tag: "variables_url",
     )
 
     # Call the product_dict function with the latest tag
@@ -342,15 +423,23 @@ def test_product_dict():
     assert result["info"]["Mobile/Fixed (loc)"] == "loc1"
 
 
-def test_list_all_products():
+def test_list_all_products(monkeypatch):
     # Mock the get_all_data_products_url function to return a URL
-    tsv2dict.values.get_all_data_products_url = (
-        lambda use_local_files, tag: "https://example.com/data_products.tsv"
+    monkeypatch.setattr(
+        tsv2dict.values,
+        "get_all_data_products_url",
+        lambda use_local_files, tag: "https://example.com/data_products.tsv",
     )
 
-    # Mock the pd.read_csv function to return a DataFrame
-    pd.read_csv = lambda url, sep: pd.DataFrame(
-        {"Data Product": ["product1", "product2", "product3"]}
+    # Mock the read_tsv_rows function to return the rows of the tsv file
+    monkeypatch.setattr(
+        tsv2dict.cache,
+        "read_tsv_rows",
+        lambda url: [
+            {"Data Product": "product1"},
+            {"Data Product": "product2"},
+            {"Data Product": "product3"},
+        ],
     )
 
     # Call the list_all_products function with a tag
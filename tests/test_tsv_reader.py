@@ -0,0 +1,48 @@
+import io
+import pandas as pd
+import pytest
+from ncas_amof_netcdf_template import tsv_reader
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "Name\tLength\tunits\ntime\t<i>\tseconds\nlatitude\t1\tdegrees_north\n",
+        "Name\tLength\nx\t1\ny\t\n",
+        "Name\tLength\n",
+        "Variable\tAttribute\tValue\texample value\nvar1\t\t\t\n\ttype\tfloat32\t\n",
+        "A\tB\tC\n1\tTrue\tNA\n2\tfalse\t\n",
+        "A\tB\n1e5\t-1.00E+20\n.5\tinf\n",
+        'A\tB\tC\nx\t"quoted\ttab"\tz\ny\tsay "hi"\t\n',
+        "A\t\tA\n1\t2\t3\n",
+        "A\tB\n\nx\ty\n\n",
+        "A\tB\tC\nx\ty\n",
+        "A\tB\tC\n 7\t1.5 \t inf\n8 \t .5\tz\n",
+        "A\tB\n\u0663\t1\n\uff17\t\u0661.5\n",
+        'A\tB\n  \nx\ty\n \t \n\t\n""\n" "\n \n',
+        "  \nA\tB\r\n   \r\n1\t2\r\n",
+    ],
+)
+def test_parse_tsv_matches_pandas(content):
+    expected = pd.read_csv(io.StringIO(content), sep="\t").fillna("")
+    rows = tsv_reader.parse_tsv(content.encode())
+    assert rows == expected.to_dict(orient="records")
+    for row, expected_row in zip(rows, expected.to_dict(orient="records")):
+        assert [type(v) for v in row.values()] == [
+            type(v) for v in expected_row.values()
+        ]
+
+
+def test_parse_tsv_with_pandas():
+    tsv_reader.use_pandas()
+    try:
+        rows = tsv_reader.parse_tsv("Name\tLength\nx\t1\n")
+    finally:
+        tsv_reader.use_pandas(False)
+    assert rows == [{"Name": "x", "Length": 1}]
+
+
+def test_read_tsv(tmp_path):
+    tsv_file = tmp_path / "global-attributes.tsv"
+    tsv_file.write_bytes("﻿Name\tValue\nattr1\tvalue1\n".encode())
+    assert tsv_reader.read_tsv(str(tsv_file)) == [{"Name": "attr1", "Value": "value1"}]
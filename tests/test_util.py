@@ -257,6 +257,29 @@ def test_get_times():
     assert result[10] == "20220101-010502"  # file_date
 
 
+def test_get_times_as_arrays():
+    import pandas as pd
+
+    dt_times = [
+        dt.datetime(2022, 1, 1, 1, 5, 2, 1),
+        dt.datetime(2022, 1, 1, 12, 0, 0),
+        dt.datetime(2022, 1, 2, 0, 0, 0),
+    ]
+    expected = util.get_times(dt_times)
+    for times in [
+        np.array(dt_times, dtype="datetime64[us]"),
+        pd.DatetimeIndex(dt_times),
+        pd.DatetimeIndex(dt_times).tz_localize("UTC"),
+        [i.replace(tzinfo=dt.timezone.utc) for i in dt_times],
+    ]:
+        result = util.get_times(times, as_arrays=True)
+        for values, expected_values in zip(result[:8], expected[:8]):
+            assert isinstance(values, np.ndarray)
+            assert np.array_equal(values, expected_values)
+        assert result[8:] == expected[8:]
+    assert result[2].dtype.kind == "i"
+
+
 def test_get_times_with_incompatible_dates():
     # Prepare a list of datetime objects
     dt_times = [
@@ -433,6 +456,10 @@ def test_update_variable_with_invalid_qc_flag():
         match=r"Invalid data being added to QC variable, only \[0, 1, 2\] are allowed.",
     ):
         util.update_variable(ncfile, "qc_var", [0, 1, 3])
+    with pytest.raises(
+        ValueError, match=r"Found 2 invalid values, the first at index \(0,\)."
+    ):
+        util.update_variable(ncfile, "qc_var", [4, 1, 3])
 
     ncfile.close()
 
@@ -440,6 +467,166 @@ def test_update_variable_with_invalid_qc_flag():
     os.remove(temp_path)
 
 
+def test_record_writer(tmp_path):
+    ncfile = Dataset(tmp_path / "records.nc", "w", format="NETCDF4")
+    ncfile.createDimension("time", None)
+    ncfile.createDimension("index", 2)
+    ncfile.createVariable("time", "f8", ("time",))
+    var = ncfile.createVariable("var", "f4", ("index", "time"))
+    var.valid_min = 0.0
+    var.valid_max = 0.0
+    qc = ncfile.createVariable("qc_flag", "i1", ("time",))
+    qc.flag_values = np.array([0, 1, 2], dtype="i1")
+    ncfile.createVariable("other", "f4", ("index",))
+
+    with util.RecordWriter(ncfile, sync_every=4) as writer:
+        assert writer.variables == ["time", "var", "qc_flag"]
+        writer.append(
+            {
+                "time": [0.0, 1.0, 2.0],
+                "var": [[0.5, 0.6, 0.7], [1.5, 1.6, np.nan]],
+                "qc_flag": [1, 1, 2],
+            }
+        )
+        # not synced yet
+        assert var.valid_max == np.float32(0.0)
+        writer.append({"time": [3.0, 4.0], "var": [[-0.5, 0.1], [0.2, 0.3]]})
+        assert var.valid_min == np.float32(-0.5)
+        assert var.valid_max == np.float32(1.6)
+        writer.append({"time": [5.0], "var": [[9.0], [0.0]]})
+        with pytest.raises(ValueError, match="has 2 records, expected 1"):
+            writer.append({"time": [6.0], "var": [[1.0, 2.0], [3.0, 4.0]]})
+        with pytest.raises(ValueError, match="Invalid data being added"):
+            writer.append({"qc_flag": [3]})
+        with pytest.raises(ValueError, match="does not use dimension time"):
+            writer.append({"other": [1.0, 2.0]})
+
+    assert writer.n_records == 6
+    assert len(ncfile.dimensions["time"]) == 6
+    assert np.allclose(ncfile.variables["time"][:], np.arange(6))
+    assert np.allclose(ncfile.variables["var"][0], [0.5, 0.6, 0.7, -0.5, 0.1, 9.0])
+    assert np.ma.getmaskarray(ncfile.variables["qc_flag"][:]).tolist() == [
+        False,
+        False,
+        False,
+        True,
+        True,
+        True,
+    ]
+    assert var.valid_max == np.float32(9.0)
+    ncfile.close()
+
+
+def test_record_writer_needs_unlimited_dimension(tmp_path):
+    ncfile = Dataset(tmp_path / "fixed.nc", "w", format="NETCDF4")
+    ncfile.createDimension("time", 3)
+    with pytest.raises(ValueError, match="Dimension time is not unlimited"):
+        util.RecordWriter(ncfile)
+    ncfile.close()
+
+
+def test_slab_writer(tmp_path):
+    ncfile = Dataset(tmp_path / "slabs.nc", "w", format="NETCDF4")
+    ncfile.createDimension("time", 4)
+    ncfile.createDimension("index", 3)
+    var = ncfile.createVariable("var", "f4", ("time", "index"))
+    var.valid_min = 0.0
+    var.valid_max = 0.0
+    qc = ncfile.createVariable("qc_flag", "i1", ("time",))
+    qc.flag_values = np.array([0, 1, 2], dtype="i1")
+    data = np.arange(12, dtype="f4").reshape(4, 3) - 2
+    data[1, 1] = np.nan
+    data[3, :] = np.nan
+
+    with util.SlabWriter(ncfile) as writer:
+        for i in range(4):
+            writer.update("var", data[i], index=np.s_[i, :])
+            writer.update("qc_flag", [1], index=slice(i, i + 1))
+        # attributes only set at the end
+        assert var.valid_max == np.float32(0.0)
+        assert writer.valid_range("var") == (-2.0, 6.0)
+        assert writer.nan_counts == {"var": 4, "qc_flag": 0}
+        with pytest.raises(ValueError, match="Invalid data being added"):
+            writer.update("qc_flag", [3], index=0)
+
+    assert var.valid_min == np.float32(-2.0)
+    assert var.valid_max == np.float32(6.0)
+    assert np.allclose(var[:3], data[:3], equal_nan=True)
+    assert list(qc[:]) == [1, 1, 1, 1]
+    ncfile.close()
+
+
+def test_update_variables(tmp_path):
+    ncfile = Dataset(tmp_path / "bulk.nc", "w", format="NETCDF4")
+    ncfile.createDimension("time", None)
+    ncfile.createDimension("index", 2)
+    ncfile.createVariable("time", "f8", ("time",))
+    var = ncfile.createVariable("var", "f4", ("time", "index"))
+    var.valid_min = 0.0
+    var.valid_max = 0.0
+    qc = ncfile.createVariable("qc_flag", "i1", ("time",))
+    qc.flag_values = np.array([0, 1, 2], dtype="i1")
+    ncfile.createVariable("index", "i4", ("index",))
+
+    util.update_variables(
+        ncfile,
+        {
+            "time": [0.0, 1.0, 2.0],
+            "var": [[0.5, np.nan], [0.6, 1.6], [-0.7, 0.0]],
+            "qc_flag": [1, 1, 2],
+            "index": [1, 2],
+        },
+    )
+    assert np.allclose(ncfile["time"][:], [0, 1, 2])
+    assert list(ncfile["index"][:]) == [1, 2]
+    assert var.valid_min == np.float32(-0.7)
+    assert var.valid_max == np.float32(1.6)
+
+    # every problem is reported, and nothing is written
+    with pytest.raises(ValueError) as excinfo:
+        util.update_variables(
+            ncfile,
+            {
+                "index": [3, 4, 5],
+                "var": [0.0, 1.0],
+                "qc_flag": [3, 3, 3],
+                "missing": [1],
+                "time": [5.0, 6.0, 7.0],
+            },
+        )
+    msg = str(excinfo.value)
+    assert "index: Data has length 3 in dimension index, expected 2." in msg
+    assert "var: Data has 1 dimensions, expected 2" in msg
+    assert "qc_flag: Invalid data being added to QC variable" in msg
+    assert "missing: Variable not in file." in msg
+    assert "time:" not in msg
+    assert np.allclose(ncfile["time"][:], [0, 1, 2])
+    ncfile.close()
+
+
+@pytest.mark.parametrize("n_flags", [3, 10])
+@pytest.mark.parametrize("dtype", ["i1", "i2", "i4", "f4"])
+def test_check_qc_flags(dtype, n_flags, monkeypatch):
+    # check blocks boundaries are handled
+    monkeypatch.setattr(util, "_QC_CHECK_BLOCK_SIZE", 4)
+    flag_values = np.arange(n_flags, dtype="i1")
+    data = np.array([[0, 1, 1, 2, 0], [1, 2, 2, 1, 1]], dtype=dtype)
+
+    result = util.check_qc_flags(data, flag_values)
+    assert result.ok
+    assert result.counts == {0: 2, 1: 5, 2: 3, **{i: 0 for i in range(3, n_flags)}}
+
+    data[0, 4] = -1
+    data[1, 1] = 100
+    data[1, 2] = 99
+    data = np.ma.masked_array(data, mask=[[0, 0, 0, 0, 0], [0, 0, 1, 0, 0]])
+    result = util.check_qc_flags(data, flag_values)
+    assert not result.ok
+    assert result.n_invalid == 2
+    assert [i.tolist() for i in result.invalid_positions] == [[0, 1], [4, 1]]
+    assert result.counts[2] == 1
+
+
 def test_zero_pad_number():
     # Test single digit number
     result = util.zero_pad_number(3)
@@ -1,4 +1,5 @@
 import pytest
+import requests
 import requests_mock
 from ncas_amof_netcdf_template import values
 
@@ -281,3 +282,54 @@ def test_get_all_data_products_url_with_specific_tag():
         result
         == "https://raw.githubusercontent.com/ncasuk/AMF_CVs/v1.2.3/product-definitions/tsv/_vocabularies/data-products.tsv"
     )
+
+
+def test_get_latest_version_is_remembered():
+    with requests_mock.Mocker() as m:
+        m.get(
+            "https://github.com/ncasuk/AMF_CVs/releases/latest",
+            status_code=302,
+            headers={
+                "Location": "https://github.com/ncasuk/AMF_CVs/releases/tag/v1.2.3"
+            },
+        )
+        m.get(
+            "https://github.com/ncasuk/AMF_CVs/releases/tag/v1.2.3", text="dummy text"
+        )
+        for loc in ["land", "sea", "air", "trajectory"]:
+            values.get_common_variables_url(loc=loc)
+        assert values.get_latest_version("ncasuk/AMF_CVs") == "v1.2.3"
+        assert m.call_count == 2
+
+        values.set_latest_version_ttl(0)
+        try:
+            values.get_latest_CVs_version()
+        finally:
+            values.set_latest_version_ttl(3600)
+        assert m.call_count == 4
+
+
+def test_check_version_exists():
+    with requests_mock.Mocker() as m:
+        m.get("https://github.com/ncasuk/AMF_CVs/releases/v1.2.3", text="dummy text")
+        m.get("https://github.com/ncasuk/AMF_CVs/releases/v0.0.0", status_code=404)
+        assert values.check_version_exists("ncasuk/AMF_CVs", "v1.2.3")
+        assert values.check_version_exists("ncasuk/AMF_CVs", "v1.2.3")
+        assert not values.check_version_exists("ncasuk/AMF_CVs", "v0.0.0")
+        assert m.call_count == 2
+
+
+def test_check_version_exists_does_not_remember_errors():
+    url = "https://github.com/ncasuk/AMF_CVs/releases/v1.2.3"
+    with requests_mock.Mocker() as m:
+
+        def found(request, context):
+            # other lookups aren't held up while waiting for GitHub
+            assert not values._versions_lock.locked()
+            return "dummy text"
+
+        m.get(url, [{"status_code": 503}, {"text": found}])
+        with pytest.raises(requests.HTTPError):
+            values.check_version_exists("ncasuk/AMF_CVs", "v1.2.3")
+        assert values.check_version_exists("ncasuk/AMF_CVs", "v1.2.3")
+        assert m.call_count == 2